@@ -0,0 +1,37 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class QueryCachePort(ABC):
+    """検索結果キャッシュのインターフェース"""
+
+    @abstractmethod
+    def get(self, key: str) -> dict[str, Any] | None:
+        """キャッシュされた値を取得
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            キャッシュされた値（ない場合や期限切れの場合はNone）
+        """
+        ...
+
+    @abstractmethod
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        """値をキャッシュに格納
+
+        Args:
+            key: キャッシュキー
+            value: JSONにできる値
+        """
+        ...
+
+    @abstractmethod
+    def get_stats(self) -> dict[str, Any]:
+        """キャッシュの統計を取得
+
+        Returns:
+            統計の辞書
+        """
+        ...
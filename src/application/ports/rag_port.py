@@ -1,4 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from typing import Any
 
 
@@ -31,6 +33,35 @@ class RAGPort(ABC):
         """
         ...
 
+    def search_and_generate_stream(
+        self, query: str, top_k: int = 5
+    ) -> Iterator[dict[str, Any]]:
+        """検索拡張生成（RAG）の回答を逐次返す
+
+        イベントは {"type": "text", "text": ...}、
+        {"type": "citation", "citation": {...}}、
+        最後に {"type": "done", "session_id": ..., "metadata": {...}} の順に返す。
+        既定では search_and_generate の結果を1つのテキストとして返す。
+        ストリーミングできる実装はオーバーライドする。
+
+        Args:
+            query: 検索クエリ
+            top_k: 検索する結果数
+
+        Yields:
+            回答のイベント
+        """
+        result = self.search_and_generate(query, top_k)
+        if result.get("answer"):
+            yield {"type": "text", "text": result["answer"]}
+        for citation in result.get("citations", []):
+            yield {"type": "citation", "citation": citation}
+        yield {
+            "type": "done",
+            "session_id": result.get("session_id"),
+            "metadata": result.get("metadata", {}),
+        }
+
     @abstractmethod
     def get_status(self) -> dict[str, Any]:
         """RAGシステムの状態を取得
@@ -39,3 +70,38 @@ class RAGPort(ABC):
             システム状態の辞書
         """
         ...
+
+    async def asearch(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        """ベクトル検索を非同期に実行
+
+        既定ではスレッドで search を実行する。イベントループ上で
+        I/Oを待てる実装はオーバーライドする。
+
+        Args:
+            query: 検索クエリ
+            top_k: 取得する結果数
+
+        Returns:
+            検索結果のリスト
+        """
+        return await asyncio.to_thread(self.search, query, top_k)
+
+    async def asearch_and_generate(self, query: str, top_k: int = 5) -> dict[str, Any]:
+        """検索拡張生成（RAG）を非同期に実行
+
+        Args:
+            query: 検索クエリ
+            top_k: 検索する結果数
+
+        Returns:
+            検索結果と生成された回答を含む辞書
+        """
+        return await asyncio.to_thread(self.search_and_generate, query, top_k)
+
+    async def aget_status(self) -> dict[str, Any]:
+        """RAGシステムの状態を非同期に取得
+
+        Returns:
+            システム状態の辞書
+        """
+        return await asyncio.to_thread(self.get_status)
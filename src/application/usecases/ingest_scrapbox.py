@@ -2,6 +2,7 @@ import logging
 from typing import Any
 
 from infrastructure.adapters.etl import ScrapboxETLProcessor
+from infrastructure.adapters.scrapbox_export import iter_export_pages, open_export
 
 logger = logging.getLogger(__name__)
 
@@ -58,9 +59,12 @@ class IngestScrapboxUseCase:
                 "error": str(e),
             }
 
-    def ingest_all_pages(self) -> dict[str, Any]:
+    def ingest_all_pages(self, incremental: bool | None = None) -> dict[str, Any]:
         """プロジェクトの全ページを取り込み
 
+        Args:
+            incremental: 更新されたページのみ取り込むか（省略時は設定値）
+
         Returns:
             取り込み結果を含む辞書
         """
@@ -68,7 +72,7 @@ class IngestScrapboxUseCase:
             logger.info("Starting batch ingest for all pages")
 
             # ETLプロセッサで全ページ処理
-            result = self.etl_processor.process_all_pages()
+            result = self.etl_processor.process_all_pages(incremental=incremental)
 
             # 結果を整理
             response = {
@@ -76,15 +80,16 @@ class IngestScrapboxUseCase:
                 "total_pages": result.get("total_pages", 0),
                 "successful": result.get("successful", 0),
                 "failed": result.get("failed", 0),
+                "skipped": result.get("skipped", 0),
+                "uploads": result.get("uploads", {"written": 0, "skipped": 0}),
                 "success_rate": 0.0,
                 "status": "completed",
             }
 
-            # 成功率を計算
-            if response["total_pages"] > 0:
-                response["success_rate"] = (
-                    response["successful"] / response["total_pages"]
-                )
+            # 成功率を計算（差分同期でスキップしたページは分母に含めない）
+            attempted = response["total_pages"] - response["skipped"]
+            if attempted > 0:
+                response["success_rate"] = response["successful"] / attempted
 
             if result.get("error"):
                 response["error"] = result["error"]
@@ -102,11 +107,104 @@ class IngestScrapboxUseCase:
                 "total_pages": 0,
                 "successful": 0,
                 "failed": 0,
+                "skipped": 0,
                 "success_rate": 0.0,
                 "status": "error",
                 "error": str(e),
             }
 
+    def ingest_all_pages_resumable(self, context: Any = None) -> dict[str, Any]:
+        """チェックポイントから再開しながらプロジェクトの全ページを取り込み
+
+        Lambdaのタイムアウト前に処理を止め、次回の呼び出しで続きから再開する。
+
+        Args:
+            context: Lambdaのcontext
+
+        Returns:
+            今回の呼び出しの取り込み結果を含む辞書
+        """
+        try:
+            result = self.etl_processor.process_all_pages_resumable(context=context)
+
+            response = {
+                "project": result.get("project"),
+                "status": result.get("status"),
+                "cursor": result.get("cursor", 0),
+                "successful": result.get("successful", 0),
+                "failed": result.get("failed", 0),
+                "completed_total": result.get("completed_total", 0),
+                "failed_total": result.get("failed_total", 0),
+            }
+            if result.get("error"):
+                response["error"] = result["error"]
+                response["status"] = "error"
+
+            logger.info(
+                f"Resumable ingest stopped at cursor {response['cursor']} "
+                f"with status: {response['status']}"
+            )
+            return response
+
+        except Exception as e:
+            logger.error(f"Error in ingest_all_pages_resumable: {e}")
+            return {"project": None, "status": "error", "error": str(e)}
+
+    def ingest_export(
+        self, source: str, max_workers: int | None = None
+    ) -> dict[str, Any]:
+        """Scrapboxのエクスポートファイルから全ページを取り込み
+
+        ページごとのAPI呼び出しを行わず、エクスポートファイルを
+        ストリーミングで読みながら各ページをS3に保存する。
+
+        Args:
+            source: ローカルファイルパス、または s3://bucket/key 形式のURI
+            max_workers: S3書き込みの並行数（省略時は設定値）
+
+        Returns:
+            取り込み結果を含む辞書
+        """
+        response = {
+            "source": source,
+            "total_pages": 0,
+            "successful": 0,
+            "failed": 0,
+            "success_rate": 0.0,
+            "status": "completed",
+        }
+
+        try:
+            logger.info(f"Starting export ingest from: {source}")
+
+            with open_export(source, s3_client=self.etl_processor.s3) as stream:
+                for result in self.etl_processor.process_pages_data(
+                    iter_export_pages(stream), max_workers=max_workers
+                ):
+                    response["total_pages"] += 1
+                    if result.get("success"):
+                        response["successful"] += 1
+                    else:
+                        response["failed"] += 1
+
+            # 成功率を計算
+            if response["total_pages"] > 0:
+                response["success_rate"] = (
+                    response["successful"] / response["total_pages"]
+                )
+
+            logger.info(
+                f"Export ingest completed: {response['successful']}/"
+                f"{response['total_pages']} pages successful"
+            )
+            return response
+
+        except Exception as e:
+            logger.error(f"Error in ingest_export: {e}")
+            response["status"] = "error"
+            response["error"] = str(e)
+            return response
+
     def get_ingest_status(self, page_title: str = None) -> dict[str, Any]:
         """取り込み状態を取得
 
@@ -1,7 +1,13 @@
+import asyncio
 import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
 from typing import Any
 
+from application.ports.query_cache_port import QueryCachePort
 from application.ports.rag_port import RAGPort
+from domain.values.query import SearchQuery
 
 logger = logging.getLogger(__name__)
 
@@ -9,9 +15,30 @@ logger = logging.getLogger(__name__)
 class SearchKnowledgeUseCase:
     """ナレッジベースを検索するユースケース"""
 
-    def __init__(self, rag_port: RAGPort):
+    def __init__(
+        self,
+        rag_port: RAGPort,
+        query_cache: QueryCachePort | None = None,
+        corpus_version: Callable[[], str | None] | None = None,
+    ):
+        """
+        初期化
+
+        Args:
+            rag_port: 検索に使うRAGポート
+            query_cache: 検索結果のキャッシュ（Noneで無効）
+            corpus_version: 現在のコーパスのバージョンを返す関数
+                （キャッシュキーに含め、取り込みで更新されたら以前の結果を使わない）
+        """
         self.rag_port = rag_port
-        logger.info("SearchKnowledgeUseCase initialized")
+        self.query_cache = query_cache
+        self.corpus_version = corpus_version
+        self._cache_stats = {"hits": 0, "misses": 0, "saved_latency_seconds": 0.0}
+        self._cache_lock = threading.Lock()
+        logger.info(
+            f"SearchKnowledgeUseCase initialized "
+            f"(query cache: {type(query_cache).__name__ if query_cache else None})"
+        )
 
     def search_documents(self, query: str, top_k: int = 5) -> dict[str, Any]:
         """ドキュメントのベクトル検索を実行
@@ -26,15 +53,8 @@ class SearchKnowledgeUseCase:
         try:
             logger.info(f"Searching documents for query: {query[:50]}...")
 
-            # バリデーション
-            if not query.strip():
-                raise ValueError("検索クエリが空です")
-
-            if top_k <= 0 or top_k > 20:
-                raise ValueError("top_kは1-20の範囲で指定してください")
-
-            # RAGポートで検索実行
-            search_results = self.rag_port.search(query, top_k)
+            self._validate_search(query, top_k)
+            search_results = self._cached_search(query, top_k)
 
             result = {
                 "query": query,
@@ -56,6 +76,59 @@ class SearchKnowledgeUseCase:
                 "error": str(e),
             }
 
+    async def asearch_documents(self, query: str, top_k: int = 5) -> dict[str, Any]:
+        """ドキュメントのベクトル検索を非同期に実行
+
+        Args:
+            query: 検索クエリ
+            top_k: 取得する結果数
+
+        Returns:
+            検索結果を含む辞書（search_documents と同じ形式）
+        """
+        try:
+            logger.info(f"Searching documents for query: {query[:50]}...")
+            self._validate_search(query, top_k)
+            search_results = await self._acached_search(query, top_k)
+
+            logger.info(f"Found {len(search_results)} documents")
+            return {
+                "query": query,
+                "results": search_results,
+                "total_count": len(search_results),
+                "status": "success",
+            }
+
+        except Exception as e:
+            logger.error(f"Error in asearch_documents: {e}")
+            return {
+                "query": query,
+                "results": [],
+                "total_count": 0,
+                "status": "error",
+                "error": str(e),
+            }
+
+    async def asearch_many(
+        self, queries: list[str], top_k: int = 5
+    ) -> list[dict[str, Any]]:
+        """複数のクエリの検索を並行に実行
+
+        検索はイベントループ上で待つため、クエリごとにスレッドを占有しない。
+
+        Args:
+            queries: 検索クエリのリスト
+            top_k: クエリごとに取得する結果数
+
+        Returns:
+            クエリと同じ順の検索結果の辞書のリスト（失敗したクエリは status が error）
+        """
+        return list(
+            await asyncio.gather(
+                *(self.asearch_documents(query, top_k) for query in queries)
+            )
+        )
+
     def search_and_answer(self, query: str, top_k: int = 5) -> dict[str, Any]:
         """検索拡張生成（RAG）で質問に回答
 
@@ -102,6 +175,58 @@ class SearchKnowledgeUseCase:
                 "error": str(e),
             }
 
+    def search_and_answer_stream(
+        self, query: str, top_k: int = 5
+    ) -> Iterator[dict[str, Any]]:
+        """検索拡張生成（RAG）の回答を生成されたものから逐次返す
+
+        最後の done イベントに、最初のテキストまでの時間（time_to_first_token_ms）
+        と全体の時間（total_ms）を含める。
+
+        Args:
+            query: 質問
+            top_k: 検索する結果数
+
+        Yields:
+            text・citation・done のイベント（失敗した場合は error のイベント）
+        """
+        started = time.perf_counter()
+        first_token: float | None = None
+        try:
+            logger.info(f"Streaming answer for query: {query[:50]}...")
+
+            # バリデーション
+            if not query.strip():
+                raise ValueError("質問が空です")
+
+            if top_k <= 0 or top_k > 20:
+                raise ValueError("top_kは1-20の範囲で指定してください")
+
+            for event in self.rag_port.search_and_generate_stream(query, top_k):
+                if event["type"] == "text" and first_token is None:
+                    first_token = time.perf_counter() - started
+                    logger.info(f"Time to first token: {first_token * 1000:.1f} ms")
+                if event["type"] == "done":
+                    total = time.perf_counter() - started
+                    event = {
+                        **event,
+                        "query": query,
+                        "metrics": {
+                            "time_to_first_token_ms": (
+                                round(first_token * 1000, 3)
+                                if first_token is not None
+                                else None
+                            ),
+                            "total_ms": round(total * 1000, 3),
+                        },
+                    }
+                    logger.info(f"Answer streamed in {total * 1000:.1f} ms")
+                yield event
+
+        except Exception as e:
+            logger.error(f"Error in search_and_answer_stream: {e}")
+            yield {"type": "error", "query": query, "error": str(e)}
+
     def get_system_status(self) -> dict[str, Any]:
         """システム状態を取得
 
@@ -110,7 +235,95 @@ class SearchKnowledgeUseCase:
         """
         try:
             status = self.rag_port.get_status()
-            return {"status": "success", "system_info": status}
+            result = {"status": "success", "system_info": status}
+            if self.query_cache is not None:
+                result["query_cache"] = self.get_cache_stats()
+            return result
         except Exception as e:
             logger.error(f"Error getting system status: {e}")
             return {"status": "error", "error": str(e), "system_info": {}}
+
+    def get_cache_stats(self) -> dict[str, Any]:
+        """検索結果キャッシュのヒット率と、ヒットで省いた検索時間を取得
+
+        Returns:
+            キャッシュの統計の辞書
+        """
+        with self._cache_lock:
+            hits = self._cache_stats["hits"]
+            misses = self._cache_stats["misses"]
+            saved = self._cache_stats["saved_latency_seconds"]
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "saved_latency_ms": round(saved * 1000, 3),
+            "backend": self.query_cache.get_stats() if self.query_cache else {},
+        }
+
+    @staticmethod
+    def _validate_search(query: str, top_k: int) -> None:
+        """検索の引数を検証する"""
+        if not query.strip():
+            raise ValueError("検索クエリが空です")
+
+        if top_k <= 0 or top_k > 20:
+            raise ValueError("top_kは1-20の範囲で指定してください")
+
+    def _cached_search(self, query: str, top_k: int) -> list[dict[str, Any]]:
+        """キャッシュにあればそれを返し、なければRAGポートで検索して格納する"""
+        if self.query_cache is None:
+            return self.rag_port.search(query, top_k)
+
+        key = self._cache_key(query, top_k)
+        cached = self._cache_lookup(key, query)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        search_results = self.rag_port.search(query, top_k)
+        self._cache_store(key, search_results, time.perf_counter() - started)
+        return search_results
+
+    async def _acached_search(self, query: str, top_k: int) -> list[dict[str, Any]]:
+        """_cached_search の非同期版（キャッシュの読み書きはスレッドで行う）"""
+        if self.query_cache is None:
+            return await self.rag_port.asearch(query, top_k)
+
+        key = await asyncio.to_thread(self._cache_key, query, top_k)
+        cached = await asyncio.to_thread(self._cache_lookup, key, query)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        search_results = await self.rag_port.asearch(query, top_k)
+        latency = time.perf_counter() - started
+        await asyncio.to_thread(self._cache_store, key, search_results, latency)
+        return search_results
+
+    def _cache_key(self, query: str, top_k: int) -> str:
+        """コーパスのバージョンと正規化したクエリによるキャッシュキー"""
+        version = self.corpus_version() if self.corpus_version else None
+        return f"{version or 'unversioned'}/{SearchQuery(query, top_k).cache_key}"
+
+    def _cache_lookup(self, key: str, query: str) -> list[dict[str, Any]] | None:
+        """キャッシュされた検索結果を取得し、ヒットを記録する"""
+        entry = self.query_cache.get(key)
+        if entry is None:
+            return None
+        with self._cache_lock:
+            self._cache_stats["hits"] += 1
+            self._cache_stats["saved_latency_seconds"] += entry["latency_seconds"]
+        logger.info(f"Query cache hit for query: {query[:50]}...")
+        return entry["results"]
+
+    def _cache_store(
+        self, key: str, search_results: list[dict[str, Any]], latency: float
+    ) -> None:
+        """検索結果と検索にかかった時間をキャッシュし、ミスを記録する"""
+        with self._cache_lock:
+            self._cache_stats["misses"] += 1
+        self.query_cache.put(
+            key, {"results": search_results, "latency_seconds": latency}
+        )
@@ -1,17 +1,51 @@
 """
-ダミーのEmbeddingsクライアント
+Embeddingsクライアント
 
-将来的にAWS Bedrock Titan Embeddingsに置き換え予定
-現在はテスト用のダミーベクトルを生成
+EmbeddingsClient はテスト・負荷試験用のダミーベクトルを生成し、
+BedrockEmbeddingsClient は AWS Bedrock の埋め込みモデルを呼び出す。
 """
 
 import hashlib
+import json
 import logging
-
+import random
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import boto3
 import numpy as np
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import (
+    ClientError,
+    ConnectTimeoutError,
+    ReadTimeoutError,
+)
+from botocore.exceptions import ConnectionError as BotoConnectionError
+
+from infrastructure.config.config import CONFIG
 
 logger = logging.getLogger(__name__)
 
+# embed_batch 用のスレッドプール（大きさごとに全インスタンスで共有）
+# クライアントを作るたびにワーカースレッドが増え続けないようにする
+_EXECUTORS: dict[int, ThreadPoolExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def _shared_executor(max_workers: int) -> ThreadPoolExecutor:
+    """指定した大きさの共有スレッドプールを返す（初回に作成）"""
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.get(max_workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="bedrock-embed"
+            )
+            _EXECUTORS[max_workers] = executor
+        return executor
+
 
 class EmbeddingsClient:
     """テキストのベクトル化を行うクライアント"""
@@ -30,7 +64,7 @@ class EmbeddingsClient:
             f"EmbeddingsClient initialized with model: {model_id}, dimension: {dimension}"
         )
 
-    def embed_text(self, text: str) -> list[float]:
+    def embed_text(self, text: str) -> np.ndarray:
         """
         テキストをベクトル化
 
@@ -38,25 +72,15 @@ class EmbeddingsClient:
             text: ベクトル化するテキスト
 
         Returns:
-            ベクトル（float配列）
+            float32 の1次元配列のベクトル
         """
-        # テキストのハッシュを基にダミーベクトルを生成
-        # 同じテキストからは常に同じベクトルが生成される（決定的）
-        text_hash = hashlib.sha256(text.encode()).hexdigest()
-        seed = int(text_hash[:8], 16)
-        np.random.seed(seed)
-
-        # -1から1の範囲で正規化されたベクトルを生成
-        vector = np.random.randn(self.dimension).astype(np.float32)
-        # L2正規化
-        vector = vector / np.linalg.norm(vector)
-
+        vector = self._generate_vectors([text])[0]
         logger.debug(f"Generated embedding for text (length: {len(text)})")
-        return vector.tolist()
+        return vector
 
     def embed_batch(
         self, texts: list[str], batch_size: int | None = None
-    ) -> list[list[float]]:
+    ) -> np.ndarray:
         """
         複数のテキストをバッチでベクトル化
 
@@ -65,19 +89,50 @@ class EmbeddingsClient:
             batch_size: バッチサイズ（将来的な実装用）
 
         Returns:
-            ベクトルのリスト
+            ベクトルを行とする float32 の (len(texts), dimension) 行列
         """
         logger.info(f"Embedding batch of {len(texts)} texts")
-        embeddings = []
+        return self._generate_vectors(texts)
+
+    def embed_batch_as_lists(
+        self, texts: list[str], batch_size: int | None = None
+    ) -> list[list[float]]:
+        """
+        複数のテキストをバッチでベクトル化し、リストのリストで返す（互換用）
+
+        Args:
+            texts: ベクトル化するテキストのリスト
+            batch_size: バッチサイズ
+
+        Returns:
+            ベクトルのリスト
+        """
+        return self.embed_batch(texts, batch_size).tolist()
 
-        for text in texts:
-            embedding = self.embed_text(text)
-            embeddings.append(embedding)
+    def _generate_vectors(self, texts: list[str]) -> np.ndarray:
+        """テキストのハッシュからダミーベクトルの行列を生成する
 
-        return embeddings
+        同じテキストからは常に同じベクトルが生成される（決定的）。
+        テキストごとに独立した乱数生成器を使うため、グローバルな乱数状態を
+        変更せず、複数スレッドから同時に呼び出しても結果が混ざらない。
+        """
+        matrix = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for row, text in zip(matrix, texts, strict=True):
+            digest = hashlib.sha256(text.encode()).digest()
+            rng = np.random.default_rng(int.from_bytes(digest[:8], "little"))
+            rng.standard_normal(dtype=np.float32, out=row)
+
+        # L2正規化
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix
+
+    def flush(self) -> None:
+        """バッファしている書き込みを反映する（キャッシュ付きのクライアント用）"""
 
     def compute_similarity(
-        self, embedding1: list[float], embedding2: list[float]
+        self,
+        embedding1: np.ndarray | Sequence[float],
+        embedding2: np.ndarray | Sequence[float],
     ) -> float:
         """
         2つのベクトル間のコサイン類似度を計算
@@ -89,8 +144,8 @@ class EmbeddingsClient:
         Returns:
             コサイン類似度（-1から1）
         """
-        vec1 = np.array(embedding1)
-        vec2 = np.array(embedding2)
+        vec1 = np.asarray(embedding1, dtype=np.float32)
+        vec2 = np.asarray(embedding2, dtype=np.float32)
 
         # コサイン類似度計算
         dot_product = np.dot(vec1, vec2)
@@ -119,24 +174,92 @@ class EmbeddingsClient:
 
 class BedrockEmbeddingsClient(EmbeddingsClient):
     """
-    AWS Bedrock Titan Embeddingsを使用するクライアント（将来の実装用）
+    AWS Bedrock の埋め込みモデル（Titan / Cohere）を使用するクライアント
+
+    テキストを CONFIG.embedding_batch_size 件ずつのバッチ（1テキスト/呼び出しの
+    モデルでは1件ずつ）に分け、上限付きのスレッドプールで並行して
+    invoke_model を呼び出す。
     """
 
+    # 1回の呼び出しで複数テキストを受け付けるモデル（Titanは1テキスト/呼び出し）
+    MULTI_TEXT_MODEL_PREFIXES = ("cohere.embed",)
+    # 1回の呼び出しで渡せるテキスト数の上限（Cohere Embed）
+    MAX_TEXTS_PER_INVOCATION = 96
+    # モデルIDの先頭 -> 既定の次元数
+    DEFAULT_DIMENSIONS = {
+        "amazon.titan-embed-text-v1": 1536,
+        "amazon.titan-embed-text-v2": 1024,
+        "cohere.embed": 1024,
+    }
+    # スロットリング・一時的な障害として再試行するエラーコード
+    RETRYABLE_ERROR_CODES = frozenset(
+        {
+            "ThrottlingException",
+            "TooManyRequestsException",
+            "ServiceUnavailableException",
+            "ModelNotReadyException",
+            "InternalServerException",
+        }
+    )
+    # 再試行の待ち時間の基準値と上限（秒）
+    BACKOFF_BASE_SECONDS = 0.5
+    BACKOFF_MAX_SECONDS = 20.0
+
     def __init__(
-        self, model_id: str = "amazon.titan-embed-text-v1", dimension: int = 1536
+        self,
+        model_id: str | None = None,
+        dimension: int | None = None,
+        client: Any = None,
+        batch_size: int | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+        timeout_seconds: int | None = None,
     ):
         """
         初期化
 
         Args:
-            model_id: Bedrockのモデル ID
-            dimension: ベクトルの次元数
+            model_id: Bedrockのモデル ID（省略時は CONFIG.embedding_model_id）
+            dimension: ベクトルの次元数（省略時はモデルの既定値）
+            client: bedrock-runtime クライアント（テストではスタブを渡す）
+            batch_size: 1タスクで処理するテキスト数（省略時は CONFIG の値。
+                1テキスト/呼び出しのモデルでは使わない）
+            max_concurrency: 同時に実行するタスク数（省略時は CONFIG の値）
+            max_retries: スロットリング時の再試行回数（省略時は CONFIG の値）
+            timeout_seconds: 1回の呼び出しのタイムアウト（省略時は CONFIG の値）
         """
-        super().__init__(model_id, dimension)
-        # TODO: boto3クライアントの初期化
-        logger.info("BedrockEmbeddingsClient initialized (placeholder)")
+        model_id = model_id or CONFIG.embedding_model_id
+        super().__init__(model_id, dimension or self._default_dimension(model_id))
+
+        self.batch_size = max(batch_size or CONFIG.embedding_batch_size, 1)
+        self.max_concurrency = max(
+            max_concurrency or CONFIG.embedding_max_concurrency, 1
+        )
+        self.max_retries = (
+            CONFIG.embedding_max_retries if max_retries is None else max_retries
+        )
+        self.timeout_seconds = timeout_seconds or CONFIG.embedding_timeout_seconds
+        self.multi_text = model_id.startswith(self.MULTI_TEXT_MODEL_PREFIXES)
+
+        # 再試行はこのクラスで行うため、botocore側の再試行は無効にする
+        self.client = client or boto3.client(
+            "bedrock-runtime",
+            region_name=CONFIG.aws_region,
+            config=BotoConfig(
+                connect_timeout=self.timeout_seconds,
+                read_timeout=self.timeout_seconds,
+                retries={"max_attempts": 1, "mode": "standard"},
+                max_pool_connections=max(self.max_concurrency, 10),
+            ),
+        )
+        self._stats = {"invocations": 0, "retries": 0}
+        self._stats_lock = threading.Lock()
+        logger.info(
+            f"BedrockEmbeddingsClient initialized (batch_size: {self.batch_size}, "
+            f"concurrency: {self.max_concurrency})"
+        )
 
-    def embed_text(self, text: str) -> list[float]:
+    def embed_text(self, text: str) -> np.ndarray:
         """
         Bedrockを使用してテキストをベクトル化
 
@@ -144,14 +267,51 @@ class BedrockEmbeddingsClient(EmbeddingsClient):
             text: ベクトル化するテキスト
 
         Returns:
-            ベクトル
+            float32 の1次元配列のベクトル
         """
-        # TODO: 実際のBedrock API呼び出し実装
-        # 現在はダミー実装を使用
-        logger.warning(
-            "BedrockEmbeddingsClient.embed_text is not implemented yet, using dummy implementation"
-        )
-        return super().embed_text(text)
+        return self._embed_chunk([text])[0]
+
+    def embed_batch(
+        self, texts: list[str], batch_size: int | None = None
+    ) -> np.ndarray:
+        """
+        Bedrockを使用して複数のテキストを並行にベクトル化
+
+        Args:
+            texts: ベクトル化するテキストのリスト
+            batch_size: 1タスクで処理するテキスト数（省略時は初期化時の値。
+                1テキスト/呼び出しのモデルでは使わない）
+
+        Returns:
+            ベクトルを行とする float32 の (len(texts), dimension) 行列
+        """
+        if self.multi_text:
+            size = min(
+                max(batch_size or self.batch_size, 1), self.MAX_TEXTS_PER_INVOCATION
+            )
+        else:
+            # 1テキスト/呼び出しのモデルは、タスク内で順に呼ぶと並行にならないため
+            # 呼び出しごとにタスクを分ける
+            size = 1
+        matrix = np.empty((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return matrix
+
+        starts = range(0, len(texts), size)
+        if len(starts) == 1:
+            matrix[:] = self._embed_chunk(texts)
+            return matrix
+
+        logger.info(f"Embedding {len(texts)} texts in {len(starts)} batches")
+        executor = _shared_executor(self.max_concurrency)
+        futures = [
+            (start, executor.submit(self._embed_chunk, texts[start : start + size]))
+            for start in starts
+        ]
+        for start, future in futures:
+            vectors = future.result()
+            matrix[start : start + len(vectors)] = vectors
+        return matrix
 
     def get_model_info(self) -> dict:
         """
@@ -165,3 +325,95 @@ class BedrockEmbeddingsClient(EmbeddingsClient):
             "dimension": self.dimension,
             "type": "bedrock_embeddings",
         }
+
+    def get_invocation_stats(self) -> dict[str, int]:
+        """invoke_model の呼び出し回数と再試行回数を取得"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _embed_chunk(self, texts: list[str]) -> np.ndarray:
+        """1タスク分のテキストをベクトル化する"""
+        if self.multi_text:
+            vectors = self._invoke(
+                {"texts": texts, "input_type": "search_document", "truncate": "END"}
+            )["embeddings"]
+        else:
+            vectors = [
+                self._invoke(self._titan_body(text))["embedding"] for text in texts
+            ]
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.shape != (len(texts), self.dimension):
+            raise ValueError(
+                f"Unexpected embedding shape {matrix.shape} from {self.model_id} "
+                f"(expected {(len(texts), self.dimension)})"
+            )
+        return matrix
+
+    def _titan_body(self, text: str) -> dict[str, Any]:
+        body: dict[str, Any] = {"inputText": text}
+        if not self.model_id.startswith("amazon.titan-embed-text-v1"):
+            body["dimensions"] = self.dimension
+            body["normalize"] = True
+        return body
+
+    def _invoke(self, body: dict[str, Any]) -> dict[str, Any]:
+        """invoke_model を呼び出し、スロットリング時は指数バックオフで再試行する"""
+        attempt = 0
+        while True:
+            self._count("invocations")
+            try:
+                response = self.client.invoke_model(
+                    modelId=self.model_id,
+                    body=json.dumps(body),
+                    contentType="application/json",
+                    accept="application/json",
+                )
+                return json.loads(response["body"].read())
+            except (
+                ClientError,
+                BotoConnectionError,
+                ConnectTimeoutError,
+                ReadTimeoutError,
+            ) as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                # Full Jitter: 0〜(基準値×2^試行回数) の一様乱数だけ待つ
+                delay = random.uniform(
+                    0,
+                    min(
+                        self.BACKOFF_MAX_SECONDS, self.BACKOFF_BASE_SECONDS * 2**attempt
+                    ),
+                )
+                attempt += 1
+                self._count("retries")
+                logger.warning(
+                    f"Retrying invoke_model ({attempt}/{self.max_retries}) "
+                    f"in {delay:.2f}s: {e}"
+                )
+                time.sleep(delay)
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, ClientError):
+            code = error.response.get("Error", {}).get("Code", "")
+            return code in self.RETRYABLE_ERROR_CODES
+        # 接続エラー・タイムアウトは再試行する
+        return True
+
+    @classmethod
+    def _default_dimension(cls, model_id: str) -> int:
+        for prefix, dimension in cls.DEFAULT_DIMENSIONS.items():
+            if model_id.startswith(prefix):
+                return dimension
+        return 1536
+
+
+def create_embeddings_client() -> EmbeddingsClient:
+    """CONFIG.use_bedrock_embeddings に従ってEmbeddingsクライアントを生成する"""
+    if CONFIG.use_bedrock_embeddings:
+        return BedrockEmbeddingsClient()
+    return EmbeddingsClient()
@@ -0,0 +1,390 @@
+"""
+EmbeddingsClientのコンテンツアドレス型キャッシュ
+
+(モデルID, 次元数, テキストのSHA-256) をキーに、以下の順で参照する。
+1. プロセス内のLRU
+2. /tmp のディスク（ウォームなLambdaコンテナでは呼び出しを跨いで再利用される）
+3. S3のシャード（オプション、コンテナ間で共有する。読み込んだシャードは
+   サイズの上限まで最近使った順に保持し、見つかったベクトルはLRUに入れる）
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from core.clients.embeddings import EmbeddingsClient
+from infrastructure.config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbeddingsClient(EmbeddingsClient):
+    """任意のEmbeddingsClientの結果をキャッシュするクライアント"""
+
+    # S3のシャードを決めるダイジェストの先頭文字数（16^2 = 256シャード）
+    SHARD_PREFIX_LENGTH = 2
+    # ディスクの空きがこれを下回ったらディスクへの書き込みをやめる
+    DISK_MIN_FREE_BYTES = 64 * 1024 * 1024
+
+    def __init__(
+        self,
+        inner: EmbeddingsClient,
+        max_entries: int = 10000,
+        cache_dir: str | None = None,
+        s3_client: Any = None,
+        s3_bucket: str | None = None,
+        s3_prefix: str | None = None,
+        max_shard_bytes: int = 64 * 1024 * 1024,
+    ):
+        """
+        初期化
+
+        Args:
+            inner: キャッシュにないテキストをベクトル化するクライアント
+            max_entries: プロセス内のLRUに保持する件数（0で無効）
+            cache_dir: ディスクキャッシュのディレクトリ（Noneで無効）
+            s3_client: S3のシャードを読み書きするS3Client（Noneで無効）
+            s3_bucket: シャードを保存するバケット
+            s3_prefix: シャードを保存するキーのプレフィックス
+            max_shard_bytes: 読み込んだシャードを保持するサイズの上限
+                （超えたら最も古く参照したシャードを捨てる。0で保持しない）
+        """
+        self.inner = inner
+        self.model_id = inner.model_id
+        self.dimension = inner.dimension
+        # モデルと次元数が異なるベクトルが混ざらないよう、共有する階層は名前空間で分ける
+        self.namespace = (
+            f"{re.sub(r'[^A-Za-z0-9._-]', '_', self.model_id)}/{self.dimension}"
+        )
+
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "s3_hits": 0,
+            "misses": 0,
+            "shard_evictions": 0,
+        }
+
+        self.cache_dir = Path(cache_dir) / self.namespace if cache_dir else None
+
+        self.s3 = s3_client if s3_client is not None and s3_bucket else None
+        self.s3_bucket = s3_bucket
+        self.s3_prefix = (s3_prefix or "embedding-cache").rstrip("/")
+        self.max_shard_bytes = max_shard_bytes
+        # シャード -> {ダイジェスト: ベクトル}（S3から読み込んだもの。最近使った順）
+        self._shards: OrderedDict[str, dict[str, np.ndarray]] = OrderedDict()
+        self._shard_bytes = 0
+        self._shard_locks: dict[str, threading.Lock] = {}
+        # シャード -> {ダイジェスト: ベクトル}（まだS3に書き出していないもの）
+        self._pending: dict[str, dict[str, np.ndarray]] = {}
+
+        logger.info(
+            f"CachedEmbeddingsClient initialized for {self.namespace} "
+            f"(memory: {max_entries}, disk: {self.cache_dir}, "
+            f"s3: {self.s3_prefix if self.s3 else None})"
+        )
+
+    @classmethod
+    def from_config(
+        cls, inner: EmbeddingsClient, s3_client: Any = None
+    ) -> "CachedEmbeddingsClient":
+        """CONFIGの設定でキャッシュを構成する
+
+        Args:
+            inner: キャッシュ対象のクライアント
+            s3_client: S3のシャードに使うS3Client
+                （CONFIG.embedding_cache_s3_prefix が空の場合は使わない）
+
+        Returns:
+            キャッシュ付きのクライアント
+        """
+        s3_prefix = CONFIG.embedding_cache_s3_prefix
+        return cls(
+            inner,
+            max_entries=CONFIG.embedding_cache_size,
+            cache_dir=CONFIG.embedding_cache_dir or None,
+            s3_client=s3_client if s3_prefix else None,
+            s3_bucket=CONFIG.s3_bucket,
+            s3_prefix=s3_prefix,
+            max_shard_bytes=CONFIG.embedding_cache_shard_memory_mb * 1024 * 1024,
+        )
+
+    def embed_text(self, text: str) -> np.ndarray:
+        """
+        テキストをベクトル化（キャッシュにあれば再利用）
+
+        Args:
+            text: ベクトル化するテキスト
+
+        Returns:
+            float32 の1次元配列のベクトル
+        """
+        return self.embed_batch([text])[0]
+
+    def embed_batch(
+        self, texts: list[str], batch_size: int | None = None
+    ) -> np.ndarray:
+        """
+        複数のテキストをベクトル化し、キャッシュにないものだけを内部クライアントに渡す
+
+        Args:
+            texts: ベクトル化するテキストのリスト
+            batch_size: 内部クライアントに渡すバッチサイズ
+
+        Returns:
+            ベクトルを行とする float32 の (len(texts), dimension) 行列
+        """
+        matrix = np.empty((len(texts), self.dimension), dtype=np.float32)
+        # ダイジェスト -> そのテキストが現れる行（同じテキストは1度だけベクトル化する）
+        missing: dict[str, list[int]] = {}
+
+        for row, text in enumerate(texts):
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            if digest in missing:
+                missing[digest].append(row)
+                continue
+            vector = self._lookup(digest)
+            if vector is None:
+                missing[digest] = [row]
+            else:
+                matrix[row] = vector
+
+        if missing:
+            miss_texts = [texts[rows[0]] for rows in missing.values()]
+            computed = np.asarray(
+                self.inner.embed_batch(miss_texts, batch_size), dtype=np.float32
+            )
+            for (digest, rows), vector in zip(missing.items(), computed, strict=True):
+                matrix[rows] = vector
+                self._store(digest, vector)
+            self._count("misses", len(missing))
+
+        return matrix
+
+    def flush(self) -> None:
+        """変更したS3のシャードを書き出す
+
+        他のコンテナが同じシャードに書き込んでいる可能性があるため、
+        書き出す直前に読み直してマージする（競合した場合は後勝ちで、
+        失われたエントリは次回のミスで再計算される）。
+        """
+        if self.s3 is None:
+            return
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        for shard, new_entries in sorted(pending.items()):
+            with self._shard_lock(shard):
+                entries = self._download_shard(shard)
+                entries.update(new_entries)
+                try:
+                    self.s3.upload_bytes(
+                        bucket=self.s3_bucket,
+                        key=self._shard_key(shard),
+                        body=self._encode_shard(entries),
+                    )
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to write embedding cache shard {shard}: {e}"
+                    )
+                    continue
+                self._keep_shard(shard, entries)
+        if pending:
+            logger.info(f"Flushed {len(pending)} embedding cache shards")
+
+    def get_cache_stats(self) -> dict[str, int]:
+        """階層ごとのヒット数とミス数、保持しているエントリ・シャードの数を取得"""
+        with self._lock:
+            return {
+                **self._stats,
+                "memory_entries": len(self._memory),
+                "resident_shards": len(self._shards),
+            }
+
+    def get_model_info(self) -> dict:
+        """
+        使用中のモデル情報とキャッシュの統計を取得
+
+        Returns:
+            モデル情報の辞書
+        """
+        return {**self.inner.get_model_info(), "cache": self.get_cache_stats()}
+
+    def _lookup(self, digest: str) -> np.ndarray | None:
+        """上位の階層から順に探し、見つかった階層より上にも格納する"""
+        with self._lock:
+            vector = self._memory.get(digest)
+            if vector is not None:
+                self._memory.move_to_end(digest)
+                self._stats["memory_hits"] += 1
+                return vector
+
+        vector = self._disk_get(digest)
+        if vector is not None:
+            self._count("disk_hits")
+            self._memory_put(digest, vector)
+            return vector
+
+        vector = self._s3_get(digest)
+        if vector is not None:
+            self._count("s3_hits")
+            self._memory_put(digest, vector)
+            self._disk_put(digest, vector)
+            return vector
+        return None
+
+    def _store(self, digest: str, vector: np.ndarray) -> None:
+        """新しく計算したベクトルを全階層に格納する"""
+        vector = np.array(vector, dtype=np.float32)
+        vector.flags.writeable = False
+        self._memory_put(digest, vector)
+        self._disk_put(digest, vector)
+        self._s3_put(digest, vector)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += n
+
+    # --- 1. プロセス内のLRU ---
+    def _memory_put(self, digest: str, vector: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[digest] = vector
+            self._memory.move_to_end(digest)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # --- 2. /tmp のディスク ---
+    def _disk_path(self, digest: str) -> Path:
+        return self.cache_dir / digest[:2] / f"{digest}.npy"
+
+    def _disk_get(self, digest: str) -> np.ndarray | None:
+        if self.cache_dir is None:
+            return None
+        try:
+            vector = np.load(self._disk_path(digest))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding cache file {digest}: {e}")
+            return None
+        if vector.shape != (self.dimension,):
+            return None
+        vector.flags.writeable = False
+        return vector
+
+    def _disk_put(self, digest: str, vector: np.ndarray) -> None:
+        if self.cache_dir is None:
+            return
+        path = self._disk_path(digest)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if shutil.disk_usage(path.parent).free < self.DISK_MIN_FREE_BYTES:
+                return
+            # 読み込み途中のファイルを見せないよう、一時ファイルに書いてから置き換える
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, vector)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write embedding cache file {digest}: {e}")
+
+    # --- 3. S3のシャード ---
+    def _shard_key(self, shard: str) -> str:
+        return f"{self.s3_prefix}/{self.namespace}/{shard}.npz"
+
+    def _shard_lock(self, shard: str) -> threading.Lock:
+        with self._lock:
+            return self._shard_locks.setdefault(shard, threading.Lock())
+
+    def _shard_entries(self, shard: str) -> dict[str, np.ndarray]:
+        """保持していないシャードのみS3から読み込む（シャードのロックを取得して呼ぶこと）"""
+        with self._lock:
+            entries = self._shards.get(shard)
+            if entries is not None:
+                self._shards.move_to_end(shard)
+                return entries
+        entries = self._download_shard(shard)
+        self._keep_shard(shard, entries)
+        return entries
+
+    def _keep_shard(self, shard: str, entries: dict[str, np.ndarray]) -> None:
+        """シャードを保持し、サイズの上限を超えた分を古い順に捨てる"""
+        size = self._shard_size(entries)
+        with self._lock:
+            previous = self._shards.pop(shard, None)
+            if previous is not None:
+                self._shard_bytes -= self._shard_size(previous)
+            if size > self.max_shard_bytes:
+                return
+            self._shards[shard] = entries
+            self._shard_bytes += size
+            while self._shard_bytes > self.max_shard_bytes:
+                _, evicted = self._shards.popitem(last=False)
+                self._shard_bytes -= self._shard_size(evicted)
+                self._stats["shard_evictions"] += 1
+
+    def _shard_size(self, entries: dict[str, np.ndarray]) -> int:
+        return len(entries) * self.dimension * np.dtype(np.float32).itemsize
+
+    def _download_shard(self, shard: str) -> dict[str, np.ndarray]:
+        try:
+            data = self.s3.download_bytes(
+                bucket=self.s3_bucket, key=self._shard_key(shard)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to read embedding cache shard {shard}: {e}")
+            return {}
+        if data is None:
+            return {}
+
+        with np.load(io.BytesIO(data)) as archive:
+            digests = archive["digests"]
+            vectors = archive["vectors"]
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            return {}
+        vectors.flags.writeable = False
+        return dict(zip(digests.tolist(), vectors, strict=True))
+
+    def _encode_shard(self, entries: dict[str, np.ndarray]) -> bytes:
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            digests=np.array(list(entries), dtype="U64"),
+            vectors=np.stack(list(entries.values())).astype(np.float32, copy=False),
+        )
+        return buffer.getvalue()
+
+    def _s3_get(self, digest: str) -> np.ndarray | None:
+        if self.s3 is None:
+            return None
+        shard = digest[: self.SHARD_PREFIX_LENGTH]
+        with self._lock:
+            vector = self._pending.get(shard, {}).get(digest)
+        if vector is not None:
+            return vector
+        with self._shard_lock(shard):
+            return self._shard_entries(shard).get(digest)
+
+    def _s3_put(self, digest: str, vector: np.ndarray) -> None:
+        if self.s3 is None:
+            return
+        shard = digest[: self.SHARD_PREFIX_LENGTH]
+        # 書き出すまで別に持つため、保持しているシャードはいつでも捨てられる
+        with self._lock:
+            self._pending.setdefault(shard, {})[digest] = vector
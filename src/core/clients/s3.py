@@ -1,40 +1,202 @@
+import hashlib
+import logging
+import threading
 from typing import Any
 
 import boto3
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
 
 from infrastructure.config.config import CONFIG
 
+logger = logging.getLogger(__name__)
+
+# (bucket, key) -> 最後に書き込み・確認したコンテンツのダイジェスト
+# ウォームなLambdaコンテナでは呼び出しを跨いで再利用される
+_DIGEST_CACHE: dict[tuple[str, str], str] = {}
+_DIGEST_CACHE_LOCK = threading.Lock()
+
 
 class S3Client:
-    def __init__(self):
+    # ダイジェスト計算から除外する、内容が同じでも実行ごとに変わるフィールド
+    VOLATILE_FIELDS = frozenset({"processed_at", "accessed", "lastAccessed", "views"})
+    # ダイジェストを保存するユーザーメタデータのキー
+    DIGEST_METADATA_KEY = "content-sha256"
+
+    def __init__(self, skip_unchanged: bool = True):
         self.s3 = boto3.client(
             "s3",
             region_name=CONFIG.aws_region,
+            config=BotoConfig(max_pool_connections=max(CONFIG.etl_max_workers, 10)),
         )
+        self.skip_unchanged = skip_unchanged
+        self._stats = {"written": 0, "skipped": 0}
+        self._stats_lock = threading.Lock()
 
-    def upload_json_file(self, bucket: str, key: str, data: dict[str, Any]) -> None:
-        """JSONファイルをS3にアップロードする"""
+    def upload_json_file(self, bucket: str, key: str, data: dict[str, Any]) -> bool:
+        """JSONファイルをS3にアップロードする
+
+        Returns:
+            書き込んだ場合はTrue、内容が変わらずスキップした場合はFalse
+        """
         import json
 
-        self.s3.put_object(
-            Bucket=bucket,
-            Key=key,
-            Body=json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"),
-            ContentType="application/json",
+        return self._put_if_changed(
+            bucket,
+            key,
+            json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"),
+            self._content_digest(data),
         )
 
     def upload_metadata_file(
         self, bucket: str, key: str, metadata: dict[str, Any]
-    ) -> None:
-        """メタデータJSONファイルをS3にアップロードする"""
+    ) -> bool:
+        """メタデータJSONファイルをS3にアップロードする
+
+        Returns:
+            書き込んだ場合はTrue、内容が変わらずスキップした場合はFalse
+        """
         import json
 
+        return self._put_if_changed(
+            bucket,
+            key,
+            json.dumps(metadata, indent=2).encode("utf-8"),
+            self._content_digest(metadata),
+        )
+
+    def upload_text_file(
+        self,
+        bucket: str,
+        key: str,
+        text: str,
+        content_type: str = "text/markdown; charset=utf-8",
+    ) -> bool:
+        """テキストファイルをS3にアップロードする
+
+        Returns:
+            書き込んだ場合はTrue、内容が変わらずスキップした場合はFalse
+        """
+        body = text.encode("utf-8")
+        return self._put_if_changed(
+            bucket, key, body, hashlib.sha256(body).hexdigest(), content_type
+        )
+
+    def upload_bytes(
+        self,
+        bucket: str,
+        key: str,
+        body: bytes,
+        content_type: str = "application/octet-stream",
+    ) -> bool:
+        """バイナリファイルをS3にアップロードする
+
+        Returns:
+            書き込んだ場合はTrue、内容が変わらずスキップした場合はFalse
+        """
+        return self._put_if_changed(
+            bucket, key, body, hashlib.sha256(body).hexdigest(), content_type
+        )
+
+    def get_upload_stats(self) -> dict[str, int]:
+        """書き込み・スキップした件数を取得する"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _put_if_changed(
+        self,
+        bucket: str,
+        key: str,
+        body: bytes,
+        digest: str,
+        content_type: str = "application/json",
+    ) -> bool:
+        """保存済みのダイジェストと異なる場合のみ put_object する"""
+        if self.skip_unchanged and self._stored_digest(bucket, key) == digest:
+            self._count("skipped")
+            return False
+
         self.s3.put_object(
             Bucket=bucket,
             Key=key,
-            Body=json.dumps(metadata, indent=2).encode("utf-8"),
-            ContentType="application/json",
+            Body=body,
+            ContentType=content_type,
+            Metadata={self.DIGEST_METADATA_KEY: digest},
         )
+        with _DIGEST_CACHE_LOCK:
+            _DIGEST_CACHE[(bucket, key)] = digest
+        self._count("written")
+        return True
+
+    def _stored_digest(self, bucket: str, key: str) -> str | None:
+        """ローカルキャッシュ、なければオブジェクトのユーザーメタデータからダイジェストを取得"""
+        with _DIGEST_CACHE_LOCK:
+            cached = _DIGEST_CACHE.get((bucket, key))
+        if cached is not None:
+            return cached
+
+        try:
+            response = self.s3.head_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            # s3:ListBucket のないロールでは存在しないキーも403になるため、
+            # どのエラーでもダイジェストは不明として書き込む
+            code = e.response.get("Error", {}).get("Code")
+            if code not in ("NoSuchKey", "404"):
+                logger.warning(f"Could not read digest of {key} ({code}), uploading")
+            return None
+
+        digest = response.get("Metadata", {}).get(self.DIGEST_METADATA_KEY)
+        if digest:
+            with _DIGEST_CACHE_LOCK:
+                _DIGEST_CACHE[(bucket, key)] = digest
+        return digest
+
+    def _content_digest(self, data: dict[str, Any]) -> str:
+        """揮発性フィールドを除いたコンテンツのSHA-256ダイジェストを計算する"""
+        import json
+
+        stable = {k: v for k, v in data.items() if k not in self.VOLATILE_FIELDS}
+        payload = json.dumps(stable, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, outcome: str) -> None:
+        with self._stats_lock:
+            self._stats[outcome] += 1
+
+    def download_json_file(self, bucket: str, key: str) -> dict[str, Any] | None:
+        """S3のJSONファイルを読み込む（存在しない場合はNone）"""
+        import json
+
+        try:
+            response = self.s3.get_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+
+        return json.loads(response["Body"].read())
+
+    def download_bytes(self, bucket: str, key: str) -> bytes | None:
+        """S3オブジェクトをバイト列として読み込む（存在しない場合はNone）"""
+        try:
+            response = self.s3.get_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+
+        return response["Body"].read()
+
+    def open_stream(self, bucket: str, key: str) -> Any:
+        """S3オブジェクトを読み込み用のストリームとして開く"""
+        response = self.s3.get_object(Bucket=bucket, Key=key)
+        return response["Body"]
+
+    def delete_file(self, bucket: str, key: str) -> None:
+        """S3オブジェクトを削除する（存在しない場合も成功する）"""
+        self.s3.delete_object(Bucket=bucket, Key=key)
+        with _DIGEST_CACHE_LOCK:
+            _DIGEST_CACHE.pop((bucket, key), None)
 
     def list_objects(self, bucket: str, prefix: str = "") -> list[str]:
         """指定されたプレフィックスでS3バケット内のオブジェクトをリストする"""
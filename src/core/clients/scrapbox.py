@@ -1,6 +1,9 @@
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from infrastructure.config.config import CONFIG
 
@@ -8,23 +11,73 @@ from infrastructure.config.config import CONFIG
 class ScrapboxClient:
     """Scrapbox APIとやり取りするためのクライアント"""
 
-    def __init__(self, project: str, api_token: str):
-        self.project = CONFIG.scrapbox_project
-        self.api_token = CONFIG.scrapbox_api_token
+    # /api/pages/:project が1リクエストで返す最大件数
+    PAGE_LIST_LIMIT = 1000
+
+    def __init__(self, project: str | None = None, api_token: str | None = None):
+        self.project = project or CONFIG.scrapbox_project
+        self.api_token = api_token or CONFIG.scrapbox_api_token
         self.base_url = "https://scrapbox.io/api"
         self.session = requests.Session()
+        # 並行ETL時にコネクションプールが枯渇しないようワーカー数に合わせる
+        adapter = HTTPAdapter(pool_maxsize=max(CONFIG.etl_max_workers, 10))
+        self.session.mount("https://", adapter)
 
         if self.api_token:
             self.session.headers.update({"Cookie": f"connect.sid={self.api_token}"})
 
     def get_pages(self) -> list[dict[str, Any]]:
         """Scrapboxプロジェクトからすべてのページを取得する"""
+        return list(self.iter_pages())
+
+    def iter_pages(
+        self, limit: int = PAGE_LIST_LIMIT, prefetch: bool = True
+    ) -> Iterator[dict[str, Any]]:
+        """skip/limit でページ一覧を辿り、取得した順にページを返す
+
+        Args:
+            limit: 1リクエストあたりの取得件数
+            prefetch: 現在のウィンドウを処理している間に次のウィンドウを取得するか
+
+        Yields:
+            ページ一覧APIの各ページ
+        """
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        next_window: Future | None = None
+        skip = 0
+
+        try:
+            data = self._get_pages_window(skip, limit)
+            while True:
+                pages = data.get("pages", [])
+                count = data.get("count")
+                skip += len(pages)
+                has_next = len(pages) >= limit and (count is None or skip < count)
+
+                if has_next and executor:
+                    next_window = executor.submit(self._get_pages_window, skip, limit)
+
+                yield from pages
+
+                if not has_next:
+                    return
+
+                if next_window:
+                    data = next_window.result()
+                    next_window = None
+                else:
+                    data = self._get_pages_window(skip, limit)
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_pages_window(self, skip: int, limit: int) -> dict[str, Any]:
+        """ページ一覧APIの1ウィンドウ分を取得する"""
         url = f"{self.base_url}/pages/{self.project}"
-        response = self.session.get(url)
+        response = self.session.get(url, params={"skip": skip, "limit": limit})
         response.raise_for_status()
 
-        data = response.json()
-        return data.get("pages", [])
+        return response.json()
 
     def get_page_content(self, title: str) -> dict[str, Any]:
         """特定のページの詳細なコンテンツを取得する"""
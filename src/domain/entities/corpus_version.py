@@ -0,0 +1,59 @@
+"""
+検索対象のコーパスのバージョンのドメインエンティティ
+"""
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+
+@dataclass(frozen=True)
+class CorpusVersion:
+    """取り込みのたびに更新されるコーパスのバージョン
+
+    検索結果のキャッシュはこのバージョンをキーに含め、取り込みで
+    コーパスが変わると以前のエントリを参照しなくなる。
+    """
+
+    project: str
+    version: str
+    published_at: str = ""
+
+    FORMAT_VERSION = 1
+
+    @staticmethod
+    def s3_key(project: str) -> str:
+        """バージョンを保存するS3キー（KBの取り込み対象 scrapbox/ の外に置く）"""
+        return f"sync/{project}/corpus_version.json"
+
+    @classmethod
+    def new(cls, project: str) -> "CorpusVersion":
+        """新しいバージョンを発行"""
+        return cls(
+            project=project,
+            version=uuid.uuid4().hex,
+            published_at=datetime.now().isoformat(),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """S3保存用の辞書に変換"""
+        return {
+            "format_version": self.FORMAT_VERSION,
+            "project": self.project,
+            "version": self.version,
+            "published_at": self.published_at,
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, Any] | None, project: str
+    ) -> "CorpusVersion | None":
+        """S3から読み込んだ辞書から生成（未発行または互換性がなければNone）"""
+        if not data or data.get("format_version") != cls.FORMAT_VERSION:
+            return None
+        return cls(
+            project=project,
+            version=str(data["version"]),
+            published_at=data.get("published_at", ""),
+        )
@@ -0,0 +1,61 @@
+"""
+全ページETLのチェックポイントのドメインエンティティ
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class SyncCheckpoint:
+    """複数のLambda呼び出しに跨る全ページETLの進捗"""
+
+    project: str
+    # 直近の呼び出しで一覧の先頭から辿った件数（進捗の表示用。一覧の並びは
+    # 呼び出しの間に変わるため、再開位置には使わない）
+    cursor: int = 0
+    # 処理に成功したページのタイトル（この実行では再処理しない）
+    completed: set[str] = field(default_factory=set)
+    # 処理に失敗したページのタイトル -> エラー内容（次回の呼び出しで再試行する）
+    failed: dict[str, str] = field(default_factory=dict)
+    status: str = "in_progress"
+
+    FORMAT_VERSION = 1
+
+    @property
+    def is_finished(self) -> bool:
+        """全ページの処理を終えたかどうか"""
+        return self.status == "completed"
+
+    def record(self, page_title: str, success: bool, error: str | None = None) -> None:
+        """ページの処理結果を記録"""
+        if success:
+            self.completed.add(page_title)
+            self.failed.pop(page_title, None)
+        else:
+            self.failed[page_title] = error or "Unknown error"
+
+    def to_dict(self) -> dict[str, Any]:
+        """S3保存用の辞書に変換"""
+        return {
+            "version": self.FORMAT_VERSION,
+            "project": self.project,
+            "cursor": self.cursor,
+            "status": self.status,
+            "completed": sorted(self.completed),
+            "failed": self.failed,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None, project: str) -> "SyncCheckpoint":
+        """S3から読み込んだ辞書からチェックポイントを生成（互換性がなければ空）"""
+        if not data or data.get("version") != cls.FORMAT_VERSION:
+            return cls(project=project)
+
+        return cls(
+            project=project,
+            cursor=data.get("cursor", 0),
+            completed=set(data.get("completed", [])),
+            failed=dict(data.get("failed", {})),
+            status=data.get("status", "in_progress"),
+        )
@@ -0,0 +1,57 @@
+"""
+Scrapbox同期マニフェストのドメインエンティティ
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class SyncManifest:
+    """最後に取り込んだページの (updated, commitId) を保持するマニフェスト"""
+
+    project: str
+    # タイトル -> (updated, commitId)
+    pages: dict[str, tuple[int, str | None]] = field(default_factory=dict)
+
+    FORMAT_VERSION = 1
+
+    @staticmethod
+    def stamp_of(page: dict[str, Any]) -> tuple[int, str | None]:
+        """ページ一覧APIのページから更新スタンプを取り出す"""
+        return page.get("updated", 0), page.get("commitId")
+
+    def is_changed(self, page: dict[str, Any]) -> bool:
+        """前回の取り込み以降にページが更新されたかどうか"""
+        return self.pages.get(page.get("title", "")) != self.stamp_of(page)
+
+    def mark_synced(self, page: dict[str, Any]) -> None:
+        """ページを取り込み済みとして記録"""
+        self.pages[page.get("title", "")] = self.stamp_of(page)
+
+    def prune(self, live_titles: set[str]) -> list[str]:
+        """一覧に存在しなくなったページを除去し、除去したタイトルを返す"""
+        removed = [title for title in self.pages if title not in live_titles]
+        for title in removed:
+            del self.pages[title]
+        return removed
+
+    def to_dict(self) -> dict[str, Any]:
+        """S3保存用の辞書に変換"""
+        return {
+            "version": self.FORMAT_VERSION,
+            "project": self.project,
+            "pages": {title: list(stamp) for title, stamp in self.pages.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any] | None, project: str) -> "SyncManifest":
+        """S3から読み込んだ辞書からマニフェストを生成（互換性がなければ空）"""
+        if not data or data.get("version") != cls.FORMAT_VERSION:
+            return cls(project=project)
+
+        pages = {
+            title: (stamp[0], stamp[1])
+            for title, stamp in data.get("pages", {}).items()
+        }
+        return cls(project=project, pages=pages)
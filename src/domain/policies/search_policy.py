@@ -2,12 +2,21 @@
 検索に関するドメインポリシー
 """
 
+import heapq
 import logging
 from datetime import datetime
 from typing import Any
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# (経過日数の上限, ブースト係数)。上から順に判定する
+RECENCY_BOOSTS = ((7, 1.3), (30, 1.2), (90, 1.1))
+
+# チャンクのスコアをページのスコアにまとめる方法
+PAGE_AGGREGATIONS = ("max", "sum_top_n")
+
 
 class SearchPolicy:
     """検索結果のフィルタリングとランキングポリシー"""
@@ -69,26 +78,9 @@ class SearchPolicy:
 
             if updated_at_str:
                 try:
-                    # Unix timestampの場合
-                    if isinstance(updated_at_str, (int, float)):
-                        updated_at = datetime.fromtimestamp(updated_at_str)
-                    else:
-                        # ISO形式の場合
-                        updated_at = datetime.fromisoformat(
-                            updated_at_str.replace("Z", "+00:00")
-                        )
-
-                    # 経過日数を計算
-                    days_ago = (current_time - updated_at).days
-
-                    # 最近のドキュメントほど高いブーストを適用
-                    if days_ago <= 7:
-                        boost_factor = 1.3  # 1週間以内
-                    elif days_ago <= 30:
-                        boost_factor = 1.2  # 1ヶ月以内
-                    elif days_ago <= 90:
-                        boost_factor = 1.1  # 3ヶ月以内
-
+                    boost_factor = SearchPolicy._recency_boost(
+                        updated_at_str, current_time
+                    )
                 except (ValueError, TypeError):
                     logger.warning(f"Invalid date format: {updated_at_str}")
 
@@ -104,6 +96,35 @@ class SearchPolicy:
 
         return boosted_results
 
+    @staticmethod
+    def _recency_boost(updated_at: Any, current_time: datetime) -> float:
+        """
+        更新日時からブースト係数を求める
+
+        Args:
+            updated_at: UNIX timestamp またはISO形式の文字列
+            current_time: 現在時刻（UTCのnaiveなdatetime）
+
+        Returns:
+            ブースト係数
+
+        Raises:
+            ValueError, TypeError: 日時として解釈できない場合
+        """
+        if isinstance(updated_at, (int, float)):
+            # Unix timestampの場合（ローカル時刻になる）
+            updated = datetime.fromtimestamp(updated_at)
+        else:
+            # ISO形式の場合
+            updated = datetime.fromisoformat(updated_at.replace("Z", "+00:00"))
+
+        # 最近のドキュメントほど高いブーストを適用
+        days_ago = (current_time - updated).days
+        for max_days, boost_factor in RECENCY_BOOSTS:
+            if days_ago <= max_days:
+                return boost_factor
+        return 1.0
+
     @staticmethod
     def remove_duplicates(results: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """
@@ -153,6 +174,196 @@ class SearchPolicy:
 
         return ranked
 
+    @staticmethod
+    def page_key(result: dict[str, Any]) -> Any:
+        """
+        チャンクが属するページのキー
+
+        Bedrock KBのソースURI、ページID、結果のIDの順に使う。
+
+        Args:
+            result: 検索結果
+
+        Returns:
+            ページのキー
+        """
+        metadata = result.get("metadata") or {}
+        return (
+            metadata.get("x-amz-bedrock-kb-source-uri")
+            or metadata.get("page_id")
+            or result.get("id")
+            or hash(result.get("content", "")[:100])
+        )
+
+    @classmethod
+    def collapse_to_pages(
+        cls,
+        results: list[dict[str, Any]],
+        top_k: int,
+        aggregation: str = "max",
+        top_n: int = 3,
+    ) -> list[dict[str, Any]]:
+        """
+        チャンク単位の検索結果をページ単位にまとめ、上位k件のページを返す
+
+        ページのスコアはチャンクのスコアの最大値（max）か、上位n件の
+        合計（sum_top_n）とする。ページごとに保持するスコアは上位n件、
+        全体の選択は大きさkのヒープで行う。
+
+        Args:
+            results: チャンク単位の検索結果
+            top_k: 返すページ数
+            aggregation: スコアのまとめ方（"max" または "sum_top_n"）
+            top_n: sum_top_n で合計するチャンク数
+
+        Returns:
+            ページごとに最もスコアの高いチャンクのコピー（score をページの
+            スコアにし、chunk_score・matched_chunks・page_key を追加）
+        """
+        if aggregation not in PAGE_AGGREGATIONS:
+            raise ValueError(f"未対応の集約方法です: {aggregation}")
+        keep = 1 if aggregation == "max" else max(top_n, 1)
+
+        # ページのキー -> [出現順, 代表のチャンク, 上位のスコアの最小ヒープ, 件数]
+        pages: dict[Any, list[Any]] = {}
+        for result in results:
+            score = result.get("score", 0.0)
+            key = cls.page_key(result)
+            page = pages.get(key)
+            if page is None:
+                pages[key] = [len(pages), result, [score], 1]
+                continue
+            if score > page[1].get("score", 0.0):
+                page[1] = result
+            page[3] += 1
+            if len(page[2]) < keep:
+                heapq.heappush(page[2], score)
+            elif score > page[2][0]:
+                heapq.heapreplace(page[2], score)
+
+        def page_score(page: list[Any]) -> float:
+            return max(page[2]) if aggregation == "max" else sum(page[2])
+
+        # 同じスコアは先に現れたページを優先する
+        best = heapq.nsmallest(
+            max(top_k, 0),
+            pages.items(),
+            key=lambda item: (-page_score(item[1]), item[1][0]),
+        )
+        collapsed = []
+        for key, page in best:
+            representative = page[1]
+            collapsed.append(
+                {
+                    **representative,
+                    "score": page_score(page),
+                    "chunk_score": representative.get("score", 0.0),
+                    "matched_chunks": page[3],
+                    "page_key": key,
+                }
+            )
+
+        logger.debug(f"Collapsed {len(results)} chunks into {len(pages)} pages")
+        return collapsed
+
+    @staticmethod
+    def mmr_select(
+        embeddings: np.ndarray,
+        relevance: np.ndarray,
+        top_k: int,
+        lambda_mult: float = 0.5,
+    ) -> list[int]:
+        """
+        Maximal Marginal Relevance で関連度と多様性を両立する候補を選ぶ
+
+        各ステップで λ·関連度 - (1-λ)·選択済みとの最大類似度 が最大の候補を
+        選ぶ。最大類似度は候補ごとの配列で持ち、選んだ候補と全候補の類似度
+        （行列ベクトル積1回）で更新するため、n×n の類似度行列を作らずに
+        O(k·n) 回の比較で済む。
+
+        Args:
+            embeddings: 候補のベクトルを行とする (候補数, 次元数) の行列
+            relevance: 候補ごとの関連度（クエリとの類似度など）
+            top_k: 選ぶ候補数
+            lambda_mult: 関連度の重み（1で関連度のみ、0で多様性のみ）
+
+        Returns:
+            選んだ順の候補の行番号
+        """
+        if not 0.0 <= lambda_mult <= 1.0:
+            raise ValueError("lambda_multは0-1の範囲で指定してください")
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        count = min(max(top_k, 0), len(vectors))
+        if count == 0:
+            return []
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+        weighted_relevance = lambda_mult * np.asarray(relevance, dtype=np.float32)
+
+        selected = [int(np.argmax(weighted_relevance))]
+        # 各候補と選択済みの候補との最大類似度
+        max_similarity = vectors @ vectors[selected[0]]
+        available = np.ones(len(vectors), dtype=bool)
+        available[selected[0]] = False
+        for _ in range(count - 1):
+            marginal = weighted_relevance - (1 - lambda_mult) * max_similarity
+            marginal[~available] = -np.inf
+            chosen = int(np.argmax(marginal))
+            selected.append(chosen)
+            available[chosen] = False
+            np.maximum(max_similarity, vectors @ vectors[chosen], out=max_similarity)
+        return selected
+
+    @classmethod
+    def diversify(
+        cls,
+        results: list[dict[str, Any]],
+        embeddings: np.ndarray,
+        top_k: int | None = None,
+        lambda_mult: float = 0.5,
+        query_embedding: np.ndarray | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        MMRで検索結果を並べ替え、似た結果が上位を占めないようにする
+
+        Args:
+            results: 検索結果のリスト
+            embeddings: 検索結果と同じ順のベクトルの行列
+            top_k: 返す結果数（Noneの場合はすべて）
+            lambda_mult: 関連度の重み（1で関連度のみ、0で多様性のみ）
+            query_embedding: クエリのベクトル（指定した場合は関連度を
+                クエリとのコサイン類似度にし、省略時は score を使う）
+
+        Returns:
+            MMRの選択順に並べた結果（mmr_rank を追加したコピー）
+        """
+        if len(embeddings) != len(results):
+            raise ValueError(
+                f"検索結果とベクトルの件数が一致しません "
+                f"({len(results)}, {len(embeddings)})"
+            )
+        if query_embedding is not None:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            vectors = np.asarray(embeddings, dtype=np.float32)
+            row_norms = np.linalg.norm(vectors, axis=1)
+            row_norms[row_norms == 0] = 1.0
+            relevance = (vectors @ query) / (row_norms * (norm or 1.0))
+        else:
+            relevance = np.array(
+                [result.get("score", 0.0) for result in results], dtype=np.float32
+            )
+
+        order = cls.mmr_select(
+            embeddings,
+            relevance,
+            len(results) if top_k is None else top_k,
+            lambda_mult,
+        )
+        return [{**results[row], "mmr_rank": rank} for rank, row in enumerate(order, 1)]
+
     @classmethod
     def apply_search_policies(
         cls,
@@ -160,6 +371,7 @@ class SearchPolicy:
         min_score: float = 0.1,
         boost_recent: bool = True,
         remove_dups: bool = True,
+        top_k: int | None = None,
     ) -> list[dict[str, Any]]:
         """
         すべての検索ポリシーを適用
@@ -169,6 +381,7 @@ class SearchPolicy:
             min_score: 最小スコア閾値
             boost_recent: 最近のドキュメントをブーストするかどうか
             remove_dups: 重複を除去するかどうか
+            top_k: 上位k件だけを返す（Noneの場合はすべて）
 
         Returns:
             ポリシーが適用された結果
@@ -186,7 +399,14 @@ class SearchPolicy:
         if boost_recent:
             processed_results = cls.boost_recent_documents(processed_results)
 
-        # 4. ランキング
+        # 4. ランキング（top_k の場合は全件を並べ替えずに上位k件だけを選ぶ。
+        # nlargest は sorted(..., reverse=True)[:k] と同じ安定な順序になる）
+        if top_k is not None:
+            processed_results = heapq.nlargest(
+                max(top_k, 0),
+                processed_results,
+                key=lambda x: x.get("score", 0.0),
+            )
         processed_results = cls.rank_results(processed_results)
 
         logger.info(
@@ -2,6 +2,9 @@
 検索クエリの値オブジェクト
 """
 
+import hashlib
+import json
+import unicodedata
 from dataclasses import dataclass
 
 
@@ -27,8 +30,22 @@ class SearchQuery:
 
     @property
     def normalized_text(self) -> str:
-        """正規化されたクエリテキスト"""
-        return self.text.strip().lower()
+        """正規化されたクエリテキスト（NFKC・小文字化・空白の統一）"""
+        return " ".join(unicodedata.normalize("NFKC", self.text).lower().split())
+
+    @property
+    def cache_key(self) -> str:
+        """検索結果が同じになるクエリで共通のキャッシュキー"""
+        payload = json.dumps(
+            [
+                self.normalized_text,
+                self.top_k,
+                sorted(self.filters or []),
+                self.include_metadata,
+            ],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
     def is_simple_query(self) -> bool:
         """シンプルなクエリかどうか（フィルターなし）"""
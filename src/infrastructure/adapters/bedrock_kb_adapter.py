@@ -2,20 +2,44 @@
 AWS Bedrock Knowledge BaseのRAGPort実装
 """
 
+import asyncio
 import logging
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 try:
     import boto3
+    from botocore.config import Config as BotoConfig
     from botocore.exceptions import ClientError
 except ImportError:
     boto3 = None
+    BotoConfig = None
     ClientError = Exception
 
 from application.ports.rag_port import RAGPort
+from infrastructure.config.config import CONFIG
 
 logger = logging.getLogger(__name__)
 
+# 非同期メソッド用のスレッドプール（大きさごとに全インスタンスで共有）
+# ナレッジベースごとにアダプターを作っても、プールは接続数の上限ごとに1つで済む
+_EXECUTORS: dict[int, ThreadPoolExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def _shared_executor(max_workers: int) -> ThreadPoolExecutor:
+    """指定した大きさの共有スレッドプールを返す（初回に作成）"""
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.get(max_workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="bedrock-kb"
+            )
+            _EXECUTORS[max_workers] = executor
+        return executor
+
 
 class BedrockKBAdapter(RAGPort):
     """AWS Bedrock Knowledge BaseのRAGPort実装"""
@@ -25,6 +49,8 @@ class BedrockKBAdapter(RAGPort):
         knowledge_base_id: str,
         region_name: str = "us-east-1",
         model_id: str = "anthropic.claude-3-sonnet-20240229-v1:0",
+        max_concurrency: int | None = None,
+        read_timeout: float | None = None,
     ):
         """
         初期化
@@ -33,6 +59,10 @@ class BedrockKBAdapter(RAGPort):
             knowledge_base_id: Bedrock Knowledge BaseのID
             region_name: AWSリージョン
             model_id: 使用するLLMモデルID
+            max_concurrency: 非同期メソッドで同時に実行するBedrock呼び出しの上限
+                （コネクションプールの大きさ。省略時は CONFIG.bedrock_max_concurrency）
+            read_timeout: Bedrockの応答の読み込みを待つ秒数
+                （省略時はbotocoreの既定値の60秒）
         """
         if boto3 is None:
             raise ImportError("boto3が必要です。pip install boto3を実行してください。")
@@ -40,10 +70,17 @@ class BedrockKBAdapter(RAGPort):
         self.knowledge_base_id = knowledge_base_id
         self.region_name = region_name
         self.model_id = model_id
+        self.max_concurrency = max_concurrency or CONFIG.bedrock_max_concurrency
 
         # Bedrock Knowledge Baseクライアントを初期化
+        # （同時呼び出しが接続を待たないよう、プールを上限に合わせる）
+        boto_options: dict[str, Any] = {"max_pool_connections": self.max_concurrency}
+        if read_timeout is not None:
+            boto_options["read_timeout"] = read_timeout
         self.bedrock_agent_runtime = boto3.client(
-            "bedrock-agent-runtime", region_name=region_name
+            "bedrock-agent-runtime",
+            region_name=region_name,
+            config=BotoConfig(**boto_options),
         )
 
         logger.info(f"BedrockKBAdapter initialized with KB ID: {knowledge_base_id}")
@@ -105,16 +142,7 @@ class BedrockKBAdapter(RAGPort):
         try:
             response = self.bedrock_agent_runtime.retrieve_and_generate(
                 input={"text": query},
-                retrieveAndGenerateConfiguration={
-                    "type": "KNOWLEDGE_BASE",
-                    "knowledgeBaseConfiguration": {
-                        "knowledgeBaseId": self.knowledge_base_id,
-                        "modelArn": f"arn:aws:bedrock:{self.region_name}::foundation-model/{self.model_id}",
-                        "retrievalConfiguration": {
-                            "vectorSearchConfiguration": {"numberOfResults": top_k}
-                        },
-                    },
-                },
+                retrieveAndGenerateConfiguration=self._generation_config(top_k),
             )
 
             # レスポンスを整理
@@ -133,12 +161,7 @@ class BedrockKBAdapter(RAGPort):
             # 引用情報を追加
             for citation in response.get("citations", []):
                 for reference in citation.get("retrievedReferences", []):
-                    citation_info = {
-                        "content": reference.get("content", {}).get("text", ""),
-                        "location": reference.get("location", {}),
-                        "metadata": reference.get("metadata", {}),
-                    }
-                    result["citations"].append(citation_info)
+                    result["citations"].append(self._citation_info(reference))
 
             logger.info(f"Generated answer for query: {query[:50]}...")
             return result
@@ -150,6 +173,132 @@ class BedrockKBAdapter(RAGPort):
             logger.error(f"Unexpected error in search_and_generate: {e}")
             raise
 
+    def search_and_generate_stream(
+        self, query: str, top_k: int = 5
+    ) -> Iterator[dict[str, Any]]:
+        """
+        検索拡張生成（RAG）の回答を retrieve_and_generate_stream で逐次返す
+
+        Args:
+            query: 検索クエリ
+            top_k: 検索する結果数
+
+        Yields:
+            回答のテキスト・引用のイベントと、最後に完了のイベント
+        """
+        try:
+            response = self.bedrock_agent_runtime.retrieve_and_generate_stream(
+                input={"text": query},
+                retrieveAndGenerateConfiguration=self._generation_config(top_k),
+            )
+
+            for event in response.get("stream", []):
+                if "output" in event:
+                    text = event["output"].get("text", "")
+                    if text:
+                        yield {"type": "text", "text": text}
+                elif "citation" in event:
+                    citation = event["citation"]
+                    # 旧形式では citation の下にもう1段ネストしている
+                    references = citation.get("retrievedReferences") or citation.get(
+                        "citation", {}
+                    ).get("retrievedReferences", [])
+                    for reference in references:
+                        yield {
+                            "type": "citation",
+                            "citation": self._citation_info(reference),
+                        }
+
+            yield {
+                "type": "done",
+                "session_id": response.get("sessionId"),
+                "metadata": {
+                    "model_id": self.model_id,
+                    "knowledge_base_id": self.knowledge_base_id,
+                    "top_k": top_k,
+                },
+            }
+            logger.info(f"Streamed answer for query: {query[:50]}...")
+
+        except ClientError as e:
+            logger.error(f"Bedrock RAG stream error: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in search_and_generate_stream: {e}")
+            raise
+
+    def _generation_config(self, top_k: int) -> dict[str, Any]:
+        """retrieve_and_generate(_stream) に渡すKnowledge Baseの設定"""
+        return {
+            "type": "KNOWLEDGE_BASE",
+            "knowledgeBaseConfiguration": {
+                "knowledgeBaseId": self.knowledge_base_id,
+                "modelArn": (
+                    f"arn:aws:bedrock:{self.region_name}"
+                    f"::foundation-model/{self.model_id}"
+                ),
+                "retrievalConfiguration": {
+                    "vectorSearchConfiguration": {"numberOfResults": top_k}
+                },
+            },
+        }
+
+    @staticmethod
+    def _citation_info(reference: dict[str, Any]) -> dict[str, Any]:
+        """retrievedReferences の要素を引用情報に変換"""
+        return {
+            "content": reference.get("content", {}).get("text", ""),
+            "location": reference.get("location", {}),
+            "metadata": reference.get("metadata", {}),
+        }
+
+    async def asearch(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        """
+        Bedrock Knowledge Baseでベクトル検索を非同期に実行
+
+        Args:
+            query: 検索クエリ
+            top_k: 取得する結果数
+
+        Returns:
+            検索結果のリスト
+        """
+        return await self._run_bounded(self.search, query, top_k)
+
+    async def asearch_and_generate(self, query: str, top_k: int = 5) -> dict[str, Any]:
+        """
+        検索拡張生成（RAG）を非同期に実行
+
+        Args:
+            query: 検索クエリ
+            top_k: 検索する結果数
+
+        Returns:
+            検索結果と生成された回答を含む辞書
+        """
+        return await self._run_bounded(self.search_and_generate, query, top_k)
+
+    async def aget_status(self) -> dict[str, Any]:
+        """
+        Bedrock Knowledge Baseの状態を非同期に取得
+
+        Returns:
+            システム状態の辞書
+        """
+        return await self._run_bounded(self.get_status)
+
+    async def _run_bounded(self, func, *args: Any) -> Any:
+        """Bedrockの呼び出しを上限つきのスレッドプールで実行し、完了を待つ
+
+        boto3 はブロッキングのため、イベントループのスレッドを塞がないよう
+        プールのスレッドで実行する。プールの大きさは max_pool_connections と
+        同じため、スレッドが接続を待つことはなく、上限を超えた呼び出しは
+        プールのキューで待つ。
+        """
+        loop = asyncio.get_running_loop()
+        executor = _shared_executor(self.max_concurrency)
+        return await loop.run_in_executor(executor, func, *args)
+
     def get_status(self) -> dict[str, Any]:
         """
         Bedrock Knowledge Baseの状態を取得
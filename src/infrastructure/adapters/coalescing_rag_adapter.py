@@ -0,0 +1,108 @@
+"""
+同時に実行される同一の検索をまとめるRAGPortのデコレータ
+
+実行中の (メソッド, クエリ, top_k) と同じ呼び出しが来たら、新たに
+内部のRAGPortを呼ばずに実行中の呼び出しの結果（または例外）を待つ。
+"""
+
+import copy
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+from application.ports.rag_port import RAGPort
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingRAGAdapter(RAGPort):
+    """同一の同時リクエストを1回の呼び出しにまとめるRAGPort実装"""
+
+    def __init__(self, inner: RAGPort):
+        """
+        初期化
+
+        Args:
+            inner: 実際に検索・生成を行うRAGPort
+        """
+        self.inner = inner
+        # (メソッド, クエリ, top_k) -> 実行中の呼び出しの結果
+        self._in_flight: dict[tuple[str, str, int], Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "coalesced": 0}
+
+    def search(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        """
+        ベクトル検索を実行（同じ検索が実行中ならその結果を共有する）
+
+        Args:
+            query: 検索クエリ
+            top_k: 取得する結果数
+
+        Returns:
+            検索結果のリスト
+        """
+        return self._single_flight("search", query, top_k, self.inner.search)
+
+    def search_and_generate(self, query: str, top_k: int = 5) -> dict[str, Any]:
+        """
+        検索拡張生成を実行（同じ質問が実行中ならその回答を共有する）
+
+        Args:
+            query: 検索クエリ
+            top_k: 検索する結果数
+
+        Returns:
+            検索結果と生成された回答を含む辞書
+        """
+        return self._single_flight(
+            "search_and_generate", query, top_k, self.inner.search_and_generate
+        )
+
+    def get_status(self) -> dict[str, Any]:
+        """
+        内部のRAGPortの状態と、まとめた呼び出しの統計を取得
+
+        Returns:
+            システム状態の辞書
+        """
+        with self._lock:
+            stats = {**self._stats, "in_flight": len(self._in_flight)}
+        return {**self.inner.get_status(), "coalescing": stats}
+
+    def _single_flight(
+        self, method: str, query: str, top_k: int, call: Callable[[str, int], Any]
+    ) -> Any:
+        """実行中の同じ呼び出しがあれば待ち、なければ自分で実行して結果を公開する"""
+        key = (method, query, top_k)
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self._stats["calls"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            logger.info(f"Coalesced {method} for query: {query[:50]}...")
+            # 呼び出し側が結果を変更しても他の待機者に影響しないようコピーする
+            return copy.deepcopy(future.result())
+
+        try:
+            result = call(query, top_k)
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return copy.deepcopy(result)
+
+    def _finish(self, key: tuple[str, str, int]) -> None:
+        """完了した呼び出しを外す（以降の同じ呼び出しは新たに実行する）"""
+        with self._lock:
+            del self._in_flight[key]
@@ -4,12 +4,18 @@ Bedrock Knowledge BaseがS3を監視してEmbedding処理とベクトルDB登録
 """
 
 import logging
+from collections.abc import Iterable, Iterator
 from datetime import datetime
 from typing import Any
 
+from domain.entities.corpus_version import CorpusVersion
+from domain.entities.sync_checkpoint import SyncCheckpoint
+from domain.entities.sync_manifest import SyncManifest
 from infrastructure.adapters.s3 import S3Client
 from infrastructure.adapters.scrapbox import ScrapboxClient
 from infrastructure.config.config import CONFIG
+from shared.pipeline import Pipeline, Stage
+from shared.scrapbox_markdown import to_markdown
 
 logger = logging.getLogger(__name__)
 
@@ -17,17 +23,20 @@ logger = logging.getLogger(__name__)
 class ScrapboxETLProcessor:
     """
     ScrapboxページのETL処理を行うプロセッサ
-    
+
     責務:
     - Scrapboxからページデータを取得
     - S3にmarkdownファイルとして保存
     - メタデータをS3に保存
-    
+
     注意:
     - Embedding生成とベクトルDB登録はBedrock Knowledge Baseが自動実行
     - Pinecone直接操作は不要
     """
 
+    # 完了すると検索対象の内容が変わるステップ
+    CHANGE_STEPS = ("s3_upload", "markdown_upload", "metadata_upload")
+
     def __init__(
         self,
         scrapbox_client: ScrapboxClient | None = None,
@@ -39,6 +48,35 @@ class ScrapboxETLProcessor:
         )
         self.s3 = s3_client or S3Client()
 
+    def build_pipeline(
+        self,
+        max_workers: int | None = None,
+        fetch: bool = True,
+        max_in_flight: int | None = None,
+    ) -> Pipeline:
+        """ETLの各段階をステージとしたパイプラインを組み立てる
+
+        fetch と s3_write はネットワーク待ちが支配的なため max_workers で
+        並行化し、CPUのみを使う transform は1ワーカーで動かす。
+
+        Args:
+            max_workers: fetch/s3_write ステージのワーカー数
+            fetch: Scrapboxからの取得ステージを含めるか
+            max_in_flight: パイプライン内に同時に存在できるページ数の上限
+                （省略時はキュー容量とワーカー数の合計）
+
+        Returns:
+            パイプライン
+        """
+        workers = max_workers or CONFIG.etl_max_workers
+        queue_size = max(16, workers * 2)
+        stages = [
+            Stage("fetch", self._fetch_stage, workers, queue_size),
+            Stage("transform", self._transform_stage, 1, queue_size),
+            Stage("s3_write", self._s3_write_stage, workers, queue_size),
+        ]
+        return Pipeline(stages if fetch else stages[1:], max_in_flight)
+
     def process_page(self, page_title: str) -> dict[str, Any]:
         """単一のScrapboxページを処理する
 
@@ -48,119 +86,436 @@ class ScrapboxETLProcessor:
         Returns:
             処理結果の辞書
         """
-        result = {
+        item = self._new_work_item(page_title)
+        result = self._run_stages_inline(item, self.build_pipeline(1).stages)
+        if self._has_changes(result):
+            self._publish_corpus_version()
+        return result
+
+    def process_page_data(self, page_data: dict[str, Any]) -> dict[str, Any]:
+        """取得済みのScrapboxページデータを処理する
+
+        エクスポートファイルからの一括取り込みなど、APIからの取得を
+        伴わない経路で使用する。
+
+        Args:
+            page_data: Scrapboxページデータ
+
+        Returns:
+            処理結果の辞書
+        """
+        item = self._new_work_item(page_data.get("title", ""), page_data)
+        return self._run_stages_inline(item, self.build_pipeline(1, fetch=False).stages)
+
+    def process_pages_data(
+        self, pages: Iterable[dict[str, Any]], max_workers: int | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """取得済みのページデータをパイプラインで処理し、結果を入力順に返す
+
+        Args:
+            pages: Scrapboxページデータ
+            max_workers: s3_write ステージのワーカー数
+
+        Yields:
+            各ページの処理結果の辞書
+        """
+        pipeline = self.build_pipeline(max_workers, fetch=False)
+        items = (
+            self._new_work_item(page_data.get("title", ""), page_data)
+            for page_data in pages
+        )
+        changed = False
+        try:
+            for outcome in pipeline.run(items, ordered=True):
+                page_result = self._complete_work_item(outcome.value, outcome.error)
+                changed = changed or self._has_changes(page_result)
+                yield page_result
+        finally:
+            if changed:
+                self._publish_corpus_version()
+
+    def _has_changes(self, page_result: dict[str, Any]) -> bool:
+        """ページの処理で検索対象の内容を書き換えたか（内容が同じで省略した書き込みは除く）"""
+        steps = page_result["steps"]
+        return any(steps.get(step) == "completed" for step in self.CHANGE_STEPS)
+
+    def _new_work_item(
+        self, page_title: str, page_data: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """パイプラインの各ステージが受け渡す作業単位を生成する"""
+        return {
             "page_title": page_title,
-            "success": False,
-            "steps": {},
+            "page_data": page_data,
+            "result": {"page_title": page_title, "success": False, "steps": {}},
         }
 
+    def _run_stages_inline(
+        self, item: dict[str, Any], stages: list[Stage]
+    ) -> dict[str, Any]:
+        """ステージを呼び出し元のスレッドで順に実行する"""
         try:
-            # 1. Scrapboxからページを取得
-            logger.info(f"Fetching page: {page_title}")
-            page_data = self.scrapbox.get_page_content(page_title)
-            result["steps"]["fetch"] = "completed"
-
-            # 2. S3に保存（元データ）
-            s3_key = f"scrapbox/{CONFIG.scrapbox_project}/{page_title}.json"
-            logger.info(f"Saving to S3: {s3_key}")
-            self.s3.upload_json_file(
-                bucket=CONFIG.s3_bucket, key=s3_key, data=page_data
-            )
-            result["steps"]["s3_upload"] = "completed"
-
-            # 3. メタデータ準備
-            metadata = self._prepare_metadata(page_data, s3_key)
-
-            # 4. メタデータをS3に保存
-            metadata_key = f"metadata/{CONFIG.scrapbox_project}/{page_title}.json"
-            metadata_dict = {
-                "page_id": f"{CONFIG.scrapbox_project}#{page_title}",
-                "metadata": metadata,
-                "processed_at": datetime.utcnow().isoformat(),
-            }
-            self.s3.upload_metadata_file(
-                bucket=CONFIG.s3_bucket, key=metadata_key, metadata=metadata_dict
-            )
-            result["steps"]["metadata_upload"] = "completed"
-
-            # 注意: Embedding生成とPineconeインデックス作成は
-            # Bedrock Knowledge Baseが自動実行するため不要
+            for stage in stages:
+                item = stage.func(item)
+        except Exception as e:
+            return self._complete_work_item(item, e)
+        return self._complete_work_item(item, None)
 
+    def _complete_work_item(
+        self, item: dict[str, Any], error: Exception | None
+    ) -> dict[str, Any]:
+        """作業単位の処理結果を確定させる"""
+        result = item["result"]
+        if error is None:
             result["success"] = True
-            logger.info(f"Successfully processed page: {page_title}")
+            logger.info(f"Successfully processed page: {item['page_title']}")
+        else:
+            logger.error(f"Error processing page {item['page_title']}: {error}")
+            result["error"] = str(error)
+        return result
 
-        except Exception as e:
-            logger.error(f"Error processing page {page_title}: {e}")
-            result["error"] = str(e)
+    def _fetch_stage(self, item: dict[str, Any]) -> dict[str, Any]:
+        """1. Scrapboxからページを取得"""
+        logger.info(f"Fetching page: {item['page_title']}")
+        item["page_data"] = self.scrapbox.get_page_content(item["page_title"])
+        item["result"]["steps"]["fetch"] = "completed"
+        return item
+
+    def _transform_stage(self, item: dict[str, Any]) -> dict[str, Any]:
+        """2. Markdown変換とS3キー・メタデータの準備"""
+        page_title = item["page_title"]
+        # KBの取り込み対象 scrapbox/ にはMarkdownのみを置き、元データは raw/ に置く
+        item["raw_key"] = f"raw/{CONFIG.scrapbox_project}/{page_title}.json"
+        item["s3_key"] = f"scrapbox/{CONFIG.scrapbox_project}/{page_title}.md"
+        # Markdown変換前は元データのJSONをKBの取り込み対象に置いていた
+        item["legacy_key"] = f"scrapbox/{CONFIG.scrapbox_project}/{page_title}.json"
+        item["markdown"] = self._extract_text_from_page(item["page_data"])
+        item["metadata_key"] = f"metadata/{CONFIG.scrapbox_project}/{page_title}.json"
+        item["metadata"] = {
+            "page_id": f"{CONFIG.scrapbox_project}#{page_title}",
+            "metadata": self._prepare_metadata(item["page_data"], item["s3_key"]),
+            "processed_at": datetime.utcnow().isoformat(),
+        }
+        return item
 
-        return result
+    def _s3_write_stage(self, item: dict[str, Any]) -> dict[str, Any]:
+        """3. 元データ・Markdown・メタデータをS3に保存"""
+        steps = item["result"]["steps"]
+
+        logger.info(f"Saving to S3: {item['s3_key']}")
+        written = self.s3.upload_json_file(
+            bucket=CONFIG.s3_bucket, key=item["raw_key"], data=item["page_data"]
+        )
+        steps["s3_upload"] = "completed" if written else "skipped"
+
+        written = self.s3.upload_text_file(
+            bucket=CONFIG.s3_bucket, key=item["s3_key"], text=item["markdown"]
+        )
+        steps["markdown_upload"] = "completed" if written else "skipped"
+        if written:
+            # 旧形式の文書が残るとKBで同じページが二重に索引されるため消す
+            self.s3.delete_file(bucket=CONFIG.s3_bucket, key=item["legacy_key"])
+            steps["legacy_document_delete"] = "completed"
+
+        written = self.s3.upload_metadata_file(
+            bucket=CONFIG.s3_bucket, key=item["metadata_key"], metadata=item["metadata"]
+        )
+        steps["metadata_upload"] = "completed" if written else "skipped"
+
+        # 注意: Embedding生成とPineconeインデックス作成は
+        # Bedrock Knowledge Baseが自動実行するため不要
+        return item
+
+    def process_all_pages(
+        self, max_workers: int | None = None, incremental: bool | None = None
+    ) -> dict[str, Any]:
+        """プロジェクトの全ページを処理する
+
+        Args:
+            max_workers: fetch/s3_write ステージのワーカー数
+                （省略時は CONFIG.etl_max_workers）
+            incremental: 前回から updated/commitId が変わったページのみ処理するか
+                （省略時は CONFIG.etl_incremental）
+
+        Returns:
+            処理結果の辞書
+        """
+        if incremental is None:
+            incremental = CONFIG.etl_incremental
 
-    def process_all_pages(self) -> dict[str, Any]:
-        """プロジェクトの全ページを処理する"""
         results = {
             "project": CONFIG.scrapbox_project,
             "total_pages": 0,
             "successful": 0,
             "failed": 0,
+            "skipped": 0,
+            # S3への書き込み件数（内容が変わらず省略したものは skipped）
+            "uploads": {"written": 0, "skipped": 0},
             "pages": [],
         }
 
-        try:
-            # 全ページのリストを取得
-            logger.info(f"Fetching all pages from project: {CONFIG.scrapbox_project}")
-            pages = self.scrapbox.get_pages()
-            results["total_pages"] = len(pages)
+        manifest = self._load_sync_manifest() if incremental else None
+        live_titles: set[str] = set()
+        listing_completed = False
+        changed = False
 
-            # 各ページを処理
-            for page in pages:
+        def work_items():
+            nonlocal listing_completed
+            # ページ一覧を取得しながら流す（一覧の取得完了を待たない）
+            for page in self.scrapbox.iter_pages():
+                results["total_pages"] += 1
                 page_title = page.get("title", "")
                 if not page_title:
                     continue
 
-                logger.info(
-                    f"Processing page {results['successful'] + results['failed'] + 1}/{len(pages)}: {page_title}"
-                )
-                page_result = self.process_page(page_title)
+                if manifest is not None:
+                    live_titles.add(page_title)
+                    if not manifest.is_changed(page):
+                        results["skipped"] += 1
+                        continue
 
+                item = self._new_work_item(page_title)
+                item["listing_page"] = page
+                yield item
+            listing_completed = True
+
+        pipeline = self.build_pipeline(max_workers)
+        try:
+            logger.info(
+                f"Processing pages from project: {CONFIG.scrapbox_project} "
+                f"(incremental: {incremental})"
+            )
+
+            # 結果の集計はこのスレッドのみで行う
+            for outcome in pipeline.run(work_items(), ordered=True):
+                page_result = self._complete_work_item(outcome.value, outcome.error)
+                changed = changed or self._has_changes(page_result)
                 if page_result["success"]:
                     results["successful"] += 1
+                    if manifest is not None:
+                        manifest.mark_synced(outcome.value["listing_page"])
                 else:
                     results["failed"] += 1
 
+                for step in ("s3_upload", "markdown_upload", "metadata_upload"):
+                    step_outcome = page_result["steps"].get(step)
+                    if step_outcome == "completed":
+                        results["uploads"]["written"] += 1
+                    elif step_outcome == "skipped":
+                        results["uploads"]["skipped"] += 1
+
                 results["pages"].append(page_result)
+                logger.info(
+                    f"Processed page {len(results['pages'])}: "
+                    f"{page_result['page_title']}"
+                )
 
         except Exception as e:
             logger.error(f"Error in batch processing: {e}")
             results["error"] = str(e)
 
+        results["pipeline"] = pipeline.get_stats()
+
+        if manifest is not None:
+            # 一覧を最後まで取得できた場合のみ削除済みページを除去する
+            if listing_completed:
+                manifest.prune(live_titles)
+            self._save_sync_manifest(manifest)
+
+        if changed:
+            self._publish_corpus_version()
+        return results
+
+    def process_all_pages_resumable(
+        self, context: Any = None, max_workers: int | None = None
+    ) -> dict[str, Any]:
+        """チェックポイントを保存しながら全ページを処理する
+
+        Lambdaの残り時間が CONFIG.etl_timeout_margin_seconds を下回ると
+        新しいページの投入を止め、処理中のページ（最大でワーカー数）を終えてから
+        チェックポイントを保存して終了する。次回の呼び出しはページ一覧を先頭から辿り直し、
+        成功済みのページを飛ばして再開する（一覧は更新日時順で呼び出しの間に
+        並びが変わるため、件数のオフセットでは再開しない）。失敗したページは
+        completed に入らないため、次回の呼び出しで再試行する。
+
+        Args:
+            context: Lambdaのcontext（get_remaining_time_in_millis を使用）
+            max_workers: fetch/s3_write ステージのワーカー数
+                （省略時は CONFIG.etl_max_workers）
+
+        Returns:
+            今回の呼び出しの処理結果の辞書
+        """
+        margin_ms = CONFIG.etl_timeout_margin_seconds * 1000
+        interval = max(CONFIG.etl_checkpoint_interval, 1)
+
+        checkpoint = self._load_sync_checkpoint()
+        if checkpoint.is_finished:
+            # 前回の実行が完了していれば最初から新しい実行を始める
+            checkpoint = SyncCheckpoint(project=CONFIG.scrapbox_project)
+        resumed_completed = len(checkpoint.completed)
+
+        results = {
+            "project": CONFIG.scrapbox_project,
+            "status": "in_progress",
+            "resumed_completed": resumed_completed,
+            "successful": 0,
+            "failed": 0,
+            "pages": [],
+        }
+        consumed = 0
+        listing_completed = False
+        changed = False
+
+        def work_items():
+            nonlocal consumed, listing_completed
+            for listing_index, page in enumerate(self.scrapbox.iter_pages()):
+                if context is not None and (
+                    context.get_remaining_time_in_millis() < margin_ms
+                ):
+                    logger.info("Approaching Lambda timeout, stopping before next page")
+                    return
+                consumed += 1
+
+                # 空タイトルと成功済みのページは処理しない
+                page_title = page.get("title", "")
+                if not page_title or page_title in checkpoint.completed:
+                    continue
+
+                item = self._new_work_item(page_title)
+                item["listing_index"] = listing_index
+                yield item
+            listing_completed = True
+
+        # 残り時間を確認した後に投入済みのページが締め切りを越えて処理され続けない
+        # よう、パイプライン内のページ数をワーカー数までに抑える
+        workers = max_workers or CONFIG.etl_max_workers
+        pipeline = self.build_pipeline(workers, max_in_flight=workers)
+        try:
+            logger.info(
+                f"Resuming pages from project: {CONFIG.scrapbox_project} "
+                f"with {resumed_completed} pages already completed"
+            )
+
+            # 結果は一覧の順に返るため、カーソルは今回辿った一覧の処理済みの範囲を指す
+            for outcome in pipeline.run(work_items(), ordered=True):
+                page_result = self._complete_work_item(outcome.value, outcome.error)
+                changed = changed or self._has_changes(page_result)
+                checkpoint.cursor = outcome.value["listing_index"] + 1
+                checkpoint.record(
+                    page_result["page_title"],
+                    page_result["success"],
+                    page_result.get("error"),
+                )
+                if page_result["success"]:
+                    results["successful"] += 1
+                else:
+                    results["failed"] += 1
+                results["pages"].append(page_result)
+
+                if len(results["pages"]) % interval == 0:
+                    self._save_sync_checkpoint(checkpoint)
+
+            if listing_completed:
+                checkpoint.status = "completed"
+
+        except Exception as e:
+            logger.error(f"Error in resumable batch processing: {e}")
+            results["error"] = str(e)
+
+        # パイプラインは投入済みの要素を処理し終えているため、読み出した分だけ進める
+        checkpoint.cursor = consumed
+        self._save_sync_checkpoint(checkpoint)
+
+        results["status"] = checkpoint.status
+        results["cursor"] = checkpoint.cursor
+        results["completed_total"] = len(checkpoint.completed)
+        results["failed_total"] = len(checkpoint.failed)
+        if changed:
+            self._publish_corpus_version()
+        results["pipeline"] = pipeline.get_stats()
         return results
 
+    def _sync_manifest_key(self) -> str:
+        """同期マニフェストのS3キー（KBの取り込み対象 scrapbox/ の外に置く）"""
+        return f"sync/{CONFIG.scrapbox_project}/manifest.json"
+
+    def _load_sync_manifest(self) -> SyncManifest:
+        """S3から同期マニフェストを読み込む"""
+        data = self.s3.download_json_file(
+            bucket=CONFIG.s3_bucket, key=self._sync_manifest_key()
+        )
+        manifest = SyncManifest.from_dict(data, project=CONFIG.scrapbox_project)
+        logger.info(f"Loaded sync manifest with {len(manifest.pages)} pages")
+        return manifest
+
+    def _save_sync_manifest(self, manifest: SyncManifest) -> None:
+        """同期マニフェストをS3に保存する"""
+        try:
+            self.s3.upload_json_file(
+                bucket=CONFIG.s3_bucket,
+                key=self._sync_manifest_key(),
+                data=manifest.to_dict(),
+            )
+        except Exception as e:
+            logger.error(f"Error saving sync manifest: {e}")
+
+    def _sync_checkpoint_key(self) -> str:
+        """チェックポイントのS3キー（KBの取り込み対象 scrapbox/ の外に置く）"""
+        return f"sync/{CONFIG.scrapbox_project}/checkpoint.json"
+
+    def _load_sync_checkpoint(self) -> SyncCheckpoint:
+        """S3からチェックポイントを読み込む"""
+        data = self.s3.download_json_file(
+            bucket=CONFIG.s3_bucket, key=self._sync_checkpoint_key()
+        )
+        return SyncCheckpoint.from_dict(data, project=CONFIG.scrapbox_project)
+
+    def _save_sync_checkpoint(self, checkpoint: SyncCheckpoint) -> None:
+        """チェックポイントをS3に保存する"""
+        try:
+            self.s3.upload_json_file(
+                bucket=CONFIG.s3_bucket,
+                key=self._sync_checkpoint_key(),
+                data=checkpoint.to_dict(),
+            )
+        except Exception as e:
+            logger.error(f"Error saving sync checkpoint: {e}")
+
+    def _publish_corpus_version(self) -> None:
+        """コーパスの新しいバージョンを発行し、検索結果のキャッシュを無効にする
+
+        Bedrock KBの取り込み（データソースの同期）はS3への書き込みの後に
+        非同期で行われるため、バージョンは取り込みの完了前に発行される。
+        取り込みが終わるまでの間に検索された結果は、古い内容のまま新しい
+        バージョンのキーでキャッシュされ、TTL（CONFIG.query_cache_ttl_seconds）が
+        切れるまで返り続ける。
+        """
+        corpus_version = CorpusVersion.new(CONFIG.scrapbox_project)
+        try:
+            self.s3.upload_json_file(
+                bucket=CONFIG.s3_bucket,
+                key=CorpusVersion.s3_key(CONFIG.scrapbox_project),
+                data=corpus_version.to_dict(),
+            )
+            logger.info(f"Published corpus version {corpus_version.version}")
+        except Exception as e:
+            logger.error(f"Error publishing corpus version: {e}")
+
     def _extract_text_from_page(self, page_data: dict[str, Any]) -> str:
         """Scrapboxページからテキストを抽出する
 
+        Scrapbox記法はMarkdownに変換する（見出し・リンク・コードブロックを
+        KBのチャンク分割とEmbeddingが扱える形にするため）。
+
         Args:
             page_data: Scrapbox API から取得したページデータ
 
         Returns:
-            抽出したテキスト
+            抽出したテキスト（Markdown）
         """
-        # タイトル
         title = page_data.get("title", "")
-
-        # 本文（各行のテキストを結合）
-        lines = page_data.get("lines", [])
-        body_lines = []
-        for line in lines:
-            text = line.get("text", "")
-            if text:
-                body_lines.append(text)
-
-        body = "\n".join(body_lines)
-
-        # タイトルと本文を結合
-        full_text = f"{title}\n\n{body}"
-
-        return full_text
+        lines = [line.get("text", "") for line in page_data.get("lines", [])]
+        return to_markdown(CONFIG.scrapbox_project, title, lines)
 
     def _prepare_metadata(
         self, page_data: dict[str, Any], s3_key: str
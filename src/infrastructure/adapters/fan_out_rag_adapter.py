@@ -0,0 +1,263 @@
+"""
+複数のRAGPortに並行に検索し、結果をマージするRAGPort実装
+
+プロジェクトごとのKnowledge Baseなど、複数のバックエンドに同じクエリを
+投げ、バックエンドごとにスコアを最大値で正規化してから、k-wayのヒープ
+マージで上位k件を返す。時間内に応答しなかったバックエンドは待たずに
+部分的な結果を返す。
+
+バックエンドごとに上限付きのスレッドプールを持つため、応答の遅い
+バックエンドの呼び出しが溜まっても他のバックエンドの検索は待たされない。
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any
+
+from application.ports.rag_port import RAGPort
+from infrastructure.config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_scores(name: str, results: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """スコアをバックエンド内の最大値で割って正規化し、降順に並べる
+
+    min-max正規化と違い、各バックエンドの最下位の結果も0にならず
+    min_score で捨てられない。件数やスコアの分布によらずすべての
+    バックエンドに同じ規則を適用するため、各バックエンドの先頭は常に1.0になる。
+    最大値が0以下の場合は割れないため元のスコアを使う。
+    元のスコアは raw_score に残す。
+    """
+    if not results:
+        return []
+    scores = [result.get("score", 0.0) for result in results]
+    high = max(scores)
+    normalized = [
+        {
+            **result,
+            "score": score / high if high > 0 else score,
+            "raw_score": score,
+            "backend": name,
+        }
+        for result, score in zip(results, scores, strict=True)
+    ]
+    normalized.sort(key=lambda result: result["score"], reverse=True)
+    return normalized
+
+
+class FanOutRAGAdapter(RAGPort):
+    """複数のRAGPortに並行に検索するRAGPort実装"""
+
+    def __init__(
+        self,
+        backends: dict[str, RAGPort],
+        timeout_seconds: float | None = None,
+        max_workers: int | None = None,
+    ):
+        """
+        初期化
+
+        Args:
+            backends: 名前 -> RAGPort（先頭を回答生成に使う）
+            timeout_seconds: バックエンドごとの応答の待ち時間
+                （省略時は CONFIG.fan_out_timeout_seconds）
+            max_workers: バックエンドごとの検索に使うスレッド数（省略時は4。
+                タイムアウトした呼び出しも完了までスレッドを使う）
+        """
+        if not backends:
+            raise ValueError("バックエンドを1つ以上指定してください")
+
+        self.backends = dict(backends)
+        self.timeout_seconds = (
+            CONFIG.fan_out_timeout_seconds
+            if timeout_seconds is None
+            else timeout_seconds
+        )
+        # 呼び出しごとにスレッドを作らないよう、プールは使い回す
+        # （遅いバックエンドが他のバックエンドのスレッドを使い切らないよう分ける）
+        self._executors = {
+            name: ThreadPoolExecutor(
+                max_workers=max_workers or 4,
+                thread_name_prefix=f"fan-out-{name}",
+            )
+            for name in self.backends
+        }
+        self._lock = threading.Lock()
+        self._timeouts = dict.fromkeys(self.backends, 0)
+        self._queued = dict.fromkeys(self.backends, 0)
+
+        logger.info(
+            f"FanOutRAGAdapter initialized with backends: {list(self.backends)} "
+            f"(timeout: {self.timeout_seconds}s)"
+        )
+
+    @classmethod
+    def from_config(cls, timeout_seconds: float | None = None) -> "FanOutRAGAdapter":
+        """CONFIG.knowledge_base_ids のKnowledge Baseごとに BedrockKBAdapter を作成
+
+        待ち時間を過ぎた呼び出しがスレッドを使い続けないよう、Bedrockの
+        応答の読み込みも同じ秒数で打ち切る。
+
+        Args:
+            timeout_seconds: バックエンドごとの応答の待ち時間
+
+        Returns:
+            全Knowledge Baseを検索するアダプター
+        """
+        from infrastructure.adapters.bedrock_kb_adapter import BedrockKBAdapter
+
+        if timeout_seconds is None:
+            timeout_seconds = CONFIG.fan_out_timeout_seconds
+        backends = {
+            name: BedrockKBAdapter(
+                knowledge_base_id,
+                region_name=CONFIG.aws_region,
+                model_id=CONFIG.bedrock_model_id,
+                read_timeout=timeout_seconds,
+            )
+            for name, knowledge_base_id in CONFIG.knowledge_base_ids.items()
+        }
+        return cls(backends, timeout_seconds)
+
+    def search(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        """
+        全バックエンドで検索し、正規化したスコアの上位k件を返す
+
+        Args:
+            query: 検索クエリ
+            top_k: 取得する結果数
+
+        Returns:
+            検索結果のリスト（backend と raw_score を追加する）
+        """
+        return self.search_with_status(query, top_k)["results"]
+
+    def search_with_status(self, query: str, top_k: int = 5) -> dict[str, Any]:
+        """
+        全バックエンドで検索し、結果とバックエンドごとの状態を返す
+
+        Args:
+            query: 検索クエリ
+            top_k: 取得する結果数
+
+        Returns:
+            results（マージした上位k件）、backends（名前 -> status・件数）、elapsed_ms、
+            partial（応答しなかったバックエンドがあるか）を含む辞書。status は
+            ok・error・timeout（呼び出しが応答しなかった）・queued（バックエンドの
+            スレッドが埋まっていて呼び出しを始められなかった）のいずれか
+        """
+        started = time.perf_counter()
+        futures: dict[str, Future] = {
+            name: self._executors[name].submit(backend.search, query, top_k)
+            for name, backend in self.backends.items()
+        }
+        # 全バックエンドで共通の締め切りまで待つ
+        wait(futures.values(), timeout=self.timeout_seconds)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+
+        ranked_lists = []
+        backends: dict[str, dict[str, Any]] = {}
+        for name, future in futures.items():
+            if not future.done():
+                # 取り消せるのは始まっていない呼び出しのみ（実行中のものは完了まで続く）
+                if future.cancel():
+                    with self._lock:
+                        self._queued[name] += 1
+                    backends[name] = {"status": "queued", "count": 0}
+                    logger.warning(
+                        f"Backend {name} had no free worker within "
+                        f"{self.timeout_seconds}s"
+                    )
+                    continue
+                with self._lock:
+                    self._timeouts[name] += 1
+                backends[name] = {"status": "timeout", "count": 0}
+                logger.warning(
+                    f"Backend {name} timed out after {self.timeout_seconds}s"
+                )
+                continue
+            try:
+                results = future.result()
+            except Exception as e:
+                backends[name] = {"status": "error", "count": 0, "error": str(e)}
+                logger.error(f"Backend {name} search error: {e}")
+                continue
+            backends[name] = {"status": "ok", "count": len(results)}
+            ranked_lists.append(_normalize_scores(name, results))
+
+        # 各リストは降順のため、k-wayマージで先頭k件だけを取り出す
+        merged = list(
+            itertools.islice(
+                heapq.merge(*ranked_lists, key=lambda result: -result["score"]),
+                top_k,
+            )
+        )
+        partial = any(status["status"] != "ok" for status in backends.values())
+        logger.info(
+            f"Fan-out search returned {len(merged)} results from "
+            f"{len(ranked_lists)}/{len(futures)} backends in {elapsed_ms} ms"
+        )
+        return {
+            "results": merged,
+            "backends": backends,
+            "partial": partial,
+            "elapsed_ms": elapsed_ms,
+        }
+
+    def search_and_generate(self, query: str, top_k: int = 5) -> dict[str, Any]:
+        """
+        先頭のバックエンドで検索拡張生成（RAG）を実行
+
+        回答は1つのKnowledge Baseの検索結果からしか生成できないため、
+        先頭のバックエンドに委ねる。
+
+        Args:
+            query: 検索クエリ
+            top_k: 検索する結果数
+
+        Returns:
+            検索結果と生成された回答を含む辞書
+        """
+        name, backend = next(iter(self.backends.items()))
+        result = backend.search_and_generate(query, top_k)
+        return {**result, "metadata": {**result.get("metadata", {}), "backend": name}}
+
+    def get_status(self) -> dict[str, Any]:
+        """
+        全バックエンドの状態を並行に取得
+
+        Returns:
+            バックエンドごとの状態と、タイムアウト・開始できなかった回数を含む辞書
+        """
+        futures = {
+            name: self._executors[name].submit(backend.get_status)
+            for name, backend in self.backends.items()
+        }
+        wait(futures.values(), timeout=self.timeout_seconds)
+
+        statuses = {}
+        for name, future in futures.items():
+            if not future.done():
+                future.cancel()
+                statuses[name] = {"status": "TIMEOUT"}
+                continue
+            try:
+                statuses[name] = future.result()
+            except Exception as e:
+                statuses[name] = {"status": "ERROR", "error": str(e)}
+
+        with self._lock:
+            timeouts = dict(self._timeouts)
+            queued = dict(self._queued)
+        return {
+            "status": "AVAILABLE",
+            "timeout_seconds": self.timeout_seconds,
+            "backends": statuses,
+            "timeouts": timeouts,
+            "queued": queued,
+        }
@@ -0,0 +1,245 @@
+"""
+HNSWグラフによるローカルのベクトルインデックスのRAGPort実装
+
+LocalVectorIndexAdapter の全件走査を HNSW の近似探索に置き換え、
+ETLからのインクリメンタルな追加とトゥームストーンによる削除に対応する。
+"""
+
+import json
+import logging
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from infrastructure.adapters.local_vector_index_adapter import (
+    METADATA_FILE,
+    LocalVectorIndexAdapter,
+    _replace_atomically,
+)
+from infrastructure.config.config import CONFIG
+from schema.vector import VectorData
+from shared.hnsw import HNSWIndex
+
+logger = logging.getLogger(__name__)
+
+GRAPH_FILE = "hnsw.npz"
+
+
+class HNSWVectorIndexAdapter(LocalVectorIndexAdapter):
+    """HNSWグラフによるローカルのベクトルインデックスのRAGPort実装
+
+    PineConeClient と同じ upsert_batch / delete を持つため、ETLの
+    pinecone_client として渡すとページの更新分だけをグラフに反映する。
+    """
+
+    def __init__(
+        self,
+        index_dir: str | Path,
+        embeddings_client: Any = None,
+        m: int | None = None,
+        ef_construction: int | None = None,
+        ef_search: int | None = None,
+        compact_ratio: float | None = None,
+    ):
+        """
+        初期化
+
+        Args:
+            index_dir: インデックスのディレクトリ（存在しない場合は空で作成）
+            embeddings_client: クエリのベクトル化に使うクライアント
+            m: 各ノードが持つ近傍数（新規作成時のみ有効）
+            ef_construction: 追加時に探索する候補数（新規作成時のみ有効）
+            ef_search: 検索時に探索する候補数
+            compact_ratio: トゥームストーンがノード数のこの割合を超えたら
+                グラフを作り直す（省略時は CONFIG.hnsw_compact_ratio）
+        """
+        self.m = m or CONFIG.hnsw_m
+        self.ef_construction = ef_construction or CONFIG.hnsw_ef_construction
+        self.ef_search = ef_search
+        self.compact_ratio = (
+            CONFIG.hnsw_compact_ratio if compact_ratio is None else compact_ratio
+        )
+        self._lock = threading.Lock()
+        self._node_by_id: dict[str, int] = {}
+        super().__init__(index_dir, embeddings_client)
+
+    def _load_index(self) -> None:
+        """index_dir からグラフとメタデータを読み込む（ない場合は空で始める）"""
+        if (self.index_dir / GRAPH_FILE).exists():
+            with open(self.index_dir / METADATA_FILE, encoding="utf-8") as f:
+                sidecar = json.load(f)
+            self.model_info: dict[str, Any] = sidecar.get("model", {})
+            self.ids: list[str] = sidecar["ids"]
+            self.metadata: list[dict[str, Any]] = sidecar["metadata"]
+            self.graph: HNSWIndex | None = HNSWIndex.load(self.index_dir / GRAPH_FILE)
+            self.dimension: int = self.graph.dimension
+            self._node_by_id = {
+                id: node
+                for node, id in enumerate(self.ids)
+                if not self.graph.is_deleted(node)
+            }
+        else:
+            self.model_info = self.embeddings.get_model_info()
+            self.ids = []
+            self.metadata = []
+            self.graph = None
+            self.dimension = 0
+        # 全件走査用のベクトルと符号は持たない
+        self.codec = None
+        self.codes = None
+        self.vectors = None
+
+        if self.graph is not None:
+            if self.ef_search:
+                self.graph.ef_search = self.ef_search
+            self.ef_search = self.graph.ef_search
+        else:
+            self.ef_search = self.ef_search or CONFIG.hnsw_ef_search
+
+        logger.info(
+            f"HNSWVectorIndexAdapter initialized with {len(self._node_by_id)} vectors "
+            f"from {self.index_dir}"
+        )
+
+    def upsert_batch(self, vectors: Iterable[VectorData], **_: Any) -> dict[str, int]:
+        """
+        ベクトルをグラフに追加（同じIDの既存ノードはトゥームストーンにする）
+
+        Args:
+            vectors: 追加するベクトル
+
+        Returns:
+            追加した件数
+        """
+        upserted = 0
+        with self._lock:
+            for vector in vectors:
+                if self.graph is None:
+                    self.dimension = len(vector.values)
+                    self.graph = HNSWIndex(
+                        self.dimension, self.m, self.ef_construction, self.ef_search
+                    )
+                if len(vector.values) != self.dimension:
+                    raise ValueError(
+                        f"ベクトルの次元数がインデックスと一致しません "
+                        f"({len(vector.values)} != {self.dimension})"
+                    )
+                previous = self._node_by_id.get(vector.id)
+                if previous is not None:
+                    self.graph.delete(previous)
+                # 検索がノード番号からIDを引けるよう、グラフより先に追加する
+                self.ids.append(vector.id)
+                self.metadata.append(vector.metadata.model_dump(exclude_none=True))
+                self._node_by_id[vector.id] = self.graph.add(vector.values)
+                upserted += 1
+            self._compact_if_needed()
+        return {"upserted_count": upserted, "request_count": 1}
+
+    def upsert(self, vectors: list[VectorData]) -> dict[str, int]:
+        """ベクトルをグラフに追加する"""
+        return self.upsert_batch(vectors)
+
+    def delete(self, ids: list[str] | None = None, **_: Any) -> None:
+        """ID指定でベクトルにトゥームストーンを付ける"""
+        with self._lock:
+            for id in ids or []:
+                node = self._node_by_id.pop(id, None)
+                if node is not None:
+                    self.graph.delete(node)
+            self._compact_if_needed()
+
+    def _compact_if_needed(self) -> None:
+        """トゥームストーンが増えすぎたらグラフを作り直す（ロックを持って呼ぶ）"""
+        graph = self.graph
+        if (
+            graph is None
+            or graph.deleted_count <= self.compact_ratio * graph.node_count
+        ):
+            return
+        compacted, kept = graph.compact()
+        self.graph = compacted
+        self.ids = [self.ids[node] for node in kept]
+        self.metadata = [self.metadata[node] for node in kept]
+        self._node_by_id = {id: node for node, id in enumerate(self.ids)}
+        logger.info(
+            f"Compacted HNSW index: {graph.node_count} -> {compacted.node_count} nodes"
+        )
+
+    def save(self, index_dir: str | Path | None = None) -> Path:
+        """
+        グラフとメタデータをディレクトリに保存
+
+        Args:
+            index_dir: 保存先のディレクトリ（省略時は読み込んだディレクトリ）
+
+        Returns:
+            保存先のディレクトリ
+        """
+        index_path = Path(index_dir or self.index_dir)
+        index_path.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if self.graph is None:
+                raise ValueError("空のインデックスは保存できません")
+            sidecar = {
+                "dimension": self.dimension,
+                "model": self.model_info,
+                "ids": list(self.ids),
+                "metadata": list(self.metadata),
+            }
+            _replace_atomically(index_path / GRAPH_FILE, self.graph.save)
+        _replace_atomically(
+            index_path / METADATA_FILE,
+            lambda f: f.write(json.dumps(sidecar, ensure_ascii=False).encode("utf-8")),
+        )
+        logger.info(f"Saved HNSW index: {len(sidecar['ids'])} nodes to {index_path}")
+        return index_path
+
+    def _search_results(
+        self, query_vector: np.ndarray, top_k: int
+    ) -> list[dict[str, Any]]:
+        """検索中にグラフを作り直さないよう、ロックを持って検索結果に変換する"""
+        with self._lock:
+            return super()._search_results(query_vector, top_k)
+
+    def search_vector(
+        self, query_vector: np.ndarray, top_k: int = 5
+    ) -> list[tuple[int, float]]:
+        """
+        クエリベクトルとの内積が大きい順に近似的な (ノード番号, スコア) を返す
+
+        Args:
+            query_vector: クエリベクトル
+            top_k: 取得する結果数
+
+        Returns:
+            (ノード番号, スコア) のリスト
+        """
+        if self.graph is None:
+            return []
+        return self.graph.search(query_vector, top_k)
+
+    def get_status(self) -> dict[str, Any]:
+        """
+        ローカルインデックスの状態を取得
+
+        Returns:
+            システム状態の辞書
+        """
+        graph = self.graph
+        return {
+            "status": "AVAILABLE" if graph is not None else "EMPTY",
+            "index_dir": str(self.index_dir),
+            "index_type": "hnsw",
+            "vector_count": len(graph) if graph is not None else 0,
+            "tombstone_count": graph.deleted_count if graph is not None else 0,
+            "dimension": self.dimension,
+            "m": graph.m if graph is not None else self.m,
+            "ef_construction": (
+                graph.ef_construction if graph is not None else self.ef_construction
+            ),
+            "ef_search": self.ef_search,
+            "model": self.model_info,
+        }
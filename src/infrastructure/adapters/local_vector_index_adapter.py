@@ -0,0 +1,373 @@
+"""
+メモリマップしたローカルのベクトルインデックスによるRAGPort実装
+
+L2正規化した float32 のベクトルを vectors.npy に、IDとメタデータを
+metadata.json に保存し、検索時は vectors.npy をメモリマップして
+内積の上位k件を返す。
+
+量子化して保存した場合は符号（codes.npy）だけをメモリに載せてADCで
+候補を選び、必要なら候補だけを float32 のベクトルで再スコアする。
+再スコアしない場合は vectors.npy を保存しない。
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from application.ports.rag_port import RAGPort
+from schema.vector import VectorData
+from shared.quantization import ProductQuantizer, ScalarQuantizer, load_codec
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.json"
+CODES_FILE = "codes.npy"
+CODEC_FILE = "codec.npz"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """各行をL2正規化する（ノルムが0の行はそのまま）"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """スコアの上位k件の行番号（順不同）"""
+    if k >= len(scores):
+        return np.arange(len(scores))
+    # 上位k件だけを選んでから並べ替える（O(n + k log k)）
+    return np.argpartition(scores, len(scores) - k)[len(scores) - k :]
+
+
+def _replace_atomically(path: Path, write) -> None:
+    """一時ファイルに書き込んでから置き換える"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class LocalVectorIndexBuilder:
+    """ETLが生成したベクトルからローカルインデックスを作成するビルダー
+
+    PineConeClient と同じ upsert_batch / delete を持つため、ETLの
+    pinecone_client としてそのまま渡せる。
+    """
+
+    def __init__(self, model_info: dict[str, Any] | None = None):
+        """
+        初期化
+
+        Args:
+            model_info: インデックスに記録するEmbeddingモデルの情報
+        """
+        self.model_info = model_info or {}
+        self._vectors: dict[str, VectorData] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        """登録されているベクトル数"""
+        return len(self._vectors)
+
+    def upsert_batch(self, vectors: Iterable[VectorData], **_: Any) -> dict[str, int]:
+        """ベクトルを追加する（同じIDは上書きする）"""
+        upserted = 0
+        with self._lock:
+            for vector in vectors:
+                self._vectors[vector.id] = vector
+                upserted += 1
+        return {"upserted_count": upserted, "request_count": 1}
+
+    def upsert(self, vectors: list[VectorData]) -> dict[str, int]:
+        """ベクトルを追加する"""
+        return self.upsert_batch(vectors)
+
+    def delete(self, ids: list[str] | None = None, **_: Any) -> None:
+        """ID指定でベクトルを削除する"""
+        with self._lock:
+            for id in ids or []:
+                self._vectors.pop(id, None)
+
+    def save(
+        self,
+        index_dir: str | Path,
+        codec: ScalarQuantizer | ProductQuantizer | None = None,
+        keep_full_precision: bool = False,
+    ) -> Path:
+        """
+        インデックスをディレクトリに保存
+
+        Args:
+            index_dir: 保存先のディレクトリ
+            codec: 量子化に使うコーデック（保存するベクトルで学習する）
+            keep_full_precision: 量子化する場合も float32 のベクトルを保存するか
+                （検索時に再スコアする場合は True にする）
+
+        Returns:
+            保存先のディレクトリ
+        """
+        with self._lock:
+            vectors = list(self._vectors.values())
+
+        index_path = Path(index_dir)
+        index_path.mkdir(parents=True, exist_ok=True)
+        dimension = len(vectors[0].values) if vectors else 0
+
+        matrix = np.empty((len(vectors), dimension), dtype=np.float32)
+        for row, vector in zip(matrix, vectors, strict=True):
+            row[:] = vector.values
+        matrix = _normalize_rows(matrix)
+
+        sidecar = {
+            "dimension": dimension,
+            "model": self.model_info,
+            "ids": [vector.id for vector in vectors],
+            "metadata": [
+                vector.metadata.model_dump(exclude_none=True) for vector in vectors
+            ],
+        }
+        quantize = codec is not None and len(matrix) > 0
+        if not quantize or keep_full_precision:
+            _replace_atomically(
+                index_path / VECTORS_FILE,
+                lambda f: np.save(f, matrix, allow_pickle=False),
+            )
+        else:
+            # 符号だけで検索する場合は以前の float32 のベクトルを残さない
+            (index_path / VECTORS_FILE).unlink(missing_ok=True)
+        if quantize:
+            codes = codec.fit(matrix).encode(matrix)
+            _replace_atomically(index_path / CODEC_FILE, codec.save)
+            _replace_atomically(
+                index_path / CODES_FILE,
+                lambda f: np.save(f, codes, allow_pickle=False),
+            )
+        else:
+            # 量子化しない場合は以前の符号を残さない
+            for name in (CODES_FILE, CODEC_FILE):
+                (index_path / name).unlink(missing_ok=True)
+        _replace_atomically(
+            index_path / METADATA_FILE,
+            lambda f: f.write(json.dumps(sidecar, ensure_ascii=False).encode("utf-8")),
+        )
+        logger.info(f"Saved local vector index: {len(vectors)} vectors to {index_path}")
+        return index_path
+
+
+class LocalVectorIndexAdapter(RAGPort):
+    """メモリマップしたローカルのベクトルインデックスによるRAGPort実装"""
+
+    def __init__(
+        self,
+        index_dir: str | Path,
+        embeddings_client: Any = None,
+        rerank_candidates: int = 0,
+    ):
+        """
+        初期化
+
+        Args:
+            index_dir: LocalVectorIndexBuilder.save で保存したディレクトリ
+            embeddings_client: クエリのベクトル化に使うクライアント
+                （インデックス作成時と同じモデルを使う）
+            rerank_candidates: 量子化したインデックスで、float32 のベクトルで
+                再スコアする候補数（0の場合は再スコアしない。再スコアするには
+                keep_full_precision=True で保存したインデックスが必要）
+        """
+        if embeddings_client is None:
+            from core.clients.embeddings import create_embeddings_client
+
+            embeddings_client = create_embeddings_client()
+
+        self.index_dir = Path(index_dir)
+        self.embeddings = embeddings_client
+        self.rerank_candidates = rerank_candidates
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """index_dir からベクトルとメタデータを読み込む"""
+        with open(self.index_dir / METADATA_FILE, encoding="utf-8") as f:
+            sidecar = json.load(f)
+        self.dimension: int = sidecar["dimension"]
+        self.model_info: dict[str, Any] = sidecar.get("model", {})
+        self.ids: list[str] = sidecar["ids"]
+        self.metadata: list[dict[str, Any]] = sidecar["metadata"]
+
+        # 量子化した符号はメモリに載せ、float32 のベクトルは再スコアでだけ読む
+        self.codec: ScalarQuantizer | ProductQuantizer | None = None
+        self.codes: np.ndarray | None = None
+        if (self.index_dir / CODEC_FILE).exists():
+            self.codec = load_codec(self.index_dir / CODEC_FILE)
+            self.codes = np.load(self.index_dir / CODES_FILE, allow_pickle=False)
+            self._check_count("符号", len(self.codes))
+
+        # ページキャッシュに載った部分だけを読むため、ベクトルはコピーしない
+        # （符号だけで検索するインデックスには float32 のベクトルがない）
+        self.vectors: np.ndarray | None = None
+        vectors_path = self.index_dir / VECTORS_FILE
+        if self.codec is None or vectors_path.exists():
+            self.vectors = np.load(vectors_path, mmap_mode="r", allow_pickle=False)
+            self._check_count("ベクトル", len(self.vectors))
+        if self.rerank_candidates and self.vectors is None:
+            raise ValueError(
+                "再スコアには float32 のベクトルが必要です"
+                "（keep_full_precision=True で保存してください）"
+            )
+
+        logger.info(
+            f"LocalVectorIndexAdapter initialized with {len(self.ids)} vectors "
+            f"from {self.index_dir}"
+        )
+
+    def _check_count(self, name: str, count: int) -> None:
+        """行数がメタデータの件数と一致することを確認する"""
+        if count != len(self.ids):
+            raise ValueError(
+                f"{name}数とメタデータ数が一致しません ({count}, {len(self.ids)})"
+            )
+
+    def search(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        """
+        ローカルインデックスでベクトル検索を実行
+
+        Args:
+            query: 検索クエリ
+            top_k: 取得する結果数
+
+        Returns:
+            検索結果のリスト（BedrockKBAdapter と同じ形式）
+        """
+        query_vector = np.asarray(self.embeddings.embed_text(query), dtype=np.float32)
+        if self.ids and query_vector.shape != (self.dimension,):
+            raise ValueError(
+                f"クエリベクトルの次元数がインデックスと一致しません "
+                f"({query_vector.shape[0]} != {self.dimension})"
+            )
+
+        results = self._search_results(query_vector, top_k)
+        logger.info(f"Retrieved {len(results)} results for query: {query[:50]}...")
+        return results
+
+    def _search_results(
+        self, query_vector: np.ndarray, top_k: int
+    ) -> list[dict[str, Any]]:
+        """search_vector の結果を検索結果の形式に変換する"""
+        results = []
+        for i, score in self.search_vector(query_vector, top_k):
+            metadata = self.metadata[i]
+            results.append(
+                {
+                    "id": self.ids[i],
+                    "score": score,
+                    "content": metadata.get("content_preview", ""),
+                    "metadata": metadata,
+                    "location": {"type": "LOCAL", "s3Key": metadata.get("s3_key")},
+                }
+            )
+        return results
+
+    def search_vector(
+        self, query_vector: np.ndarray, top_k: int = 5
+    ) -> list[tuple[int, float]]:
+        """
+        クエリベクトルとの内積が大きい順に (行番号, スコア) を返す
+
+        Args:
+            query_vector: クエリベクトル
+            top_k: 取得する結果数
+
+        Returns:
+            (行番号, スコア) のリスト
+        """
+        count = len(self.ids)
+        if count == 0 or top_k <= 0:
+            return []
+
+        norm = np.linalg.norm(query_vector)
+        if norm:
+            query_vector = query_vector / norm
+        if self.codec is None:
+            scores = self.vectors @ query_vector
+            candidates = _top_k(scores, top_k)
+        else:
+            scores = self.codec.scores(self.codes, query_vector)
+            candidates = _top_k(scores, max(top_k, self.rerank_candidates))
+            if self.rerank_candidates:
+                # 候補の行だけをメモリマップから読み、float32 で再スコアする
+                candidates = np.sort(candidates)
+                exact = self.vectors[candidates] @ query_vector
+                order = np.argsort(-exact, kind="stable")[:top_k]
+                return [(int(candidates[i]), float(exact[i])) for i in order]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")][:top_k]
+        return [(int(i), float(scores[i])) for i in order]
+
+    def search_and_generate(self, query: str, top_k: int = 5) -> dict[str, Any]:
+        """
+        検索結果を引用として返す（ローカルインデックスは回答を生成しない）
+
+        Args:
+            query: 検索クエリ
+            top_k: 検索する結果数
+
+        Returns:
+            空の回答と検索結果の引用を含む辞書
+        """
+        results = self.search(query, top_k)
+        return {
+            "query": query,
+            "answer": "",
+            "citations": [
+                {
+                    "content": result["content"],
+                    "location": result["location"],
+                    "metadata": result["metadata"],
+                }
+                for result in results
+            ],
+            "session_id": None,
+            "metadata": {
+                "index_dir": str(self.index_dir),
+                "model": self.model_info,
+                "top_k": top_k,
+            },
+        }
+
+    def get_status(self) -> dict[str, Any]:
+        """
+        ローカルインデックスの状態を取得
+
+        Returns:
+            システム状態の辞書
+        """
+        return {
+            "status": "AVAILABLE",
+            "index_dir": str(self.index_dir),
+            "vector_count": len(self.ids),
+            "dimension": self.dimension,
+            "quantization": self.codec.kind if self.codec else None,
+            "bytes_per_vector": (
+                self.codec.code_bytes if self.codec else 4 * self.dimension
+            ),
+            "rerank_candidates": self.rerank_candidates,
+            "full_precision": self.vectors is not None,
+            "disk_bytes": sum(
+                path.stat().st_size
+                for path in self.index_dir.iterdir()
+                if path.name in (VECTORS_FILE, METADATA_FILE, CODES_FILE, CODEC_FILE)
+            ),
+            "model": self.model_info,
+        }
@@ -0,0 +1,118 @@
+"""
+MMR（Maximal Marginal Relevance）で検索結果を多様化するRAGPortのデコレータ
+
+同じテンプレートの日報など、内容がほぼ同じページが上位を占めないよう、
+候補を多めに取得してクエリと候補の本文をベクトル化し、MMRで選び直す。
+同じページは多くのクエリの候補に繰り返し現れるため、本文のベクトルは
+キャッシュして再利用する。
+"""
+
+import logging
+from typing import Any
+
+from application.ports.rag_port import RAGPort
+from domain.policies.search_policy import SearchPolicy
+from infrastructure.config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class MMRRerankingRAGAdapter(RAGPort):
+    """検索結果をMMRで並べ替えるRAGPort実装"""
+
+    # Bedrock KBの numberOfResults の上限
+    MAX_FETCH = 100
+
+    def __init__(
+        self,
+        inner: RAGPort,
+        embeddings_client: Any = None,
+        lambda_mult: float | None = None,
+        over_fetch: int | None = None,
+    ):
+        """
+        初期化
+
+        Args:
+            inner: 候補を検索するRAGPort
+            embeddings_client: クエリと候補の本文のベクトル化に使うクライアント
+                （省略時はキャッシュ付きの create_embeddings_client()）
+            lambda_mult: 関連度の重み（1で関連度のみ、0で多様性のみ。
+                省略時は CONFIG.mmr_lambda）
+            over_fetch: 取得する候補数の top_k に対する倍率
+                （省略時は CONFIG.mmr_over_fetch。MAX_FETCH 件を上限とする）
+        """
+        if embeddings_client is None:
+            from core.clients.embeddings import create_embeddings_client
+            from core.clients.embeddings_cache import CachedEmbeddingsClient
+
+            embeddings_client = CachedEmbeddingsClient.from_config(
+                create_embeddings_client()
+            )
+
+        self.inner = inner
+        self.embeddings = embeddings_client
+        self.lambda_mult = CONFIG.mmr_lambda if lambda_mult is None else lambda_mult
+        self.over_fetch = over_fetch or CONFIG.mmr_over_fetch
+
+    def search(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        """
+        候補を多めに検索し、MMRで選んだ上位k件を返す
+
+        Args:
+            query: 検索クエリ
+            top_k: 取得する結果数
+
+        Returns:
+            MMRの選択順の検索結果のリスト（mmr_rank を追加する）
+        """
+        fetch = min(max(top_k * self.over_fetch, top_k), self.MAX_FETCH)
+        candidates = self.inner.search(query, fetch)
+        if not candidates:
+            return []
+
+        # クエリと候補の本文を1回のバッチでベクトル化する
+        matrix = self.embeddings.embed_batch(
+            [query] + [candidate.get("content", "") for candidate in candidates]
+        )
+        results = SearchPolicy.diversify(
+            candidates,
+            matrix[1:],
+            top_k,
+            self.lambda_mult,
+            query_embedding=matrix[0],
+        )
+        logger.info(
+            f"MMR selected {len(results)} of {len(candidates)} candidates "
+            f"(lambda: {self.lambda_mult})"
+        )
+        return results
+
+    def search_and_generate(self, query: str, top_k: int = 5) -> dict[str, Any]:
+        """
+        検索拡張生成（RAG）を内部のRAGPortで実行
+
+        Args:
+            query: 検索クエリ
+            top_k: 検索する結果数
+
+        Returns:
+            検索結果と生成された回答を含む辞書
+        """
+        return self.inner.search_and_generate(query, top_k)
+
+    def get_status(self) -> dict[str, Any]:
+        """
+        内部のRAGPortの状態とMMRの設定を取得
+
+        Returns:
+            システム状態の辞書
+        """
+        return {
+            **self.inner.get_status(),
+            "mmr": {
+                "lambda": self.lambda_mult,
+                "over_fetch": self.over_fetch,
+                "max_fetch": self.MAX_FETCH,
+            },
+        }
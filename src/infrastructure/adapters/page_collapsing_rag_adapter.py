@@ -0,0 +1,120 @@
+"""
+チャンク単位の検索結果をページ単位にまとめるRAGPortのデコレータ
+
+Bedrock KBはチャンク単位で結果を返すため、同じページのチャンクが
+上位を占めやすい。top_k より多くのチャンクを取得してページごとに
+まとめ、異なるページが足りない場合だけ取得件数を増やして検索し直す。
+"""
+
+import logging
+import threading
+from typing import Any
+
+from application.ports.rag_port import RAGPort
+from domain.policies.search_policy import SearchPolicy
+from infrastructure.config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class PageCollapsingRAGAdapter(RAGPort):
+    """検索結果を異なるページの上位k件にするRAGPort実装"""
+
+    # Bedrock KBの numberOfResults の上限
+    MAX_FETCH = 100
+
+    def __init__(
+        self,
+        inner: RAGPort,
+        aggregation: str | None = None,
+        top_n: int = 3,
+        over_fetch: int | None = None,
+        max_fetch: int | None = None,
+    ):
+        """
+        初期化
+
+        Args:
+            inner: チャンク単位で検索するRAGPort
+            aggregation: ページのスコアのまとめ方（"max" または "sum_top_n"。
+                省略時は CONFIG.page_collapse_aggregation）
+            top_n: sum_top_n で合計するチャンク数
+            over_fetch: 最初の検索で取得するチャンク数の top_k に対する倍率
+                （省略時は CONFIG.page_collapse_over_fetch）
+            max_fetch: 検索し直す場合の取得件数の上限
+        """
+        self.inner = inner
+        self.aggregation = aggregation or CONFIG.page_collapse_aggregation
+        self.top_n = top_n
+        self.over_fetch = over_fetch or CONFIG.page_collapse_over_fetch
+        self.max_fetch = min(max_fetch or self.MAX_FETCH, self.MAX_FETCH)
+        self._lock = threading.Lock()
+        self._stats = {"searches": 0, "requeries": 0}
+
+    def search(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        """
+        チャンクを多めに取得し、異なるページの上位k件を返す
+
+        異なるページが top_k に満たず、取得件数いっぱいのチャンクが返った
+        （まだ続きがある）場合だけ、取得件数を倍にして検索し直す。
+
+        Args:
+            query: 検索クエリ
+            top_k: 取得するページ数
+
+        Returns:
+            ページ単位の検索結果のリスト
+        """
+        fetch = min(max(top_k * self.over_fetch, top_k), self.max_fetch)
+        requeries = 0
+        while True:
+            chunks = self.inner.search(query, fetch)
+            pages = SearchPolicy.collapse_to_pages(
+                chunks, top_k, self.aggregation, self.top_n
+            )
+            if len(pages) >= top_k or len(chunks) < fetch or fetch >= self.max_fetch:
+                break
+            fetch = min(fetch * 2, self.max_fetch)
+            requeries += 1
+            logger.info(
+                f"Only {len(pages)} distinct pages in {len(chunks)} chunks, "
+                f"re-querying with {fetch} results"
+            )
+
+        with self._lock:
+            self._stats["searches"] += 1
+            self._stats["requeries"] += requeries
+        return pages
+
+    def search_and_generate(self, query: str, top_k: int = 5) -> dict[str, Any]:
+        """
+        検索拡張生成（RAG）を内部のRAGPortで実行
+
+        Args:
+            query: 検索クエリ
+            top_k: 検索する結果数
+
+        Returns:
+            検索結果と生成された回答を含む辞書
+        """
+        return self.inner.search_and_generate(query, top_k)
+
+    def get_status(self) -> dict[str, Any]:
+        """
+        内部のRAGPortの状態と、ページへのまとめの設定・統計を取得
+
+        Returns:
+            システム状態の辞書
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            **self.inner.get_status(),
+            "page_collapse": {
+                "aggregation": self.aggregation,
+                "top_n": self.top_n,
+                "over_fetch": self.over_fetch,
+                "max_fetch": self.max_fetch,
+                **stats,
+            },
+        }
@@ -1,63 +1,185 @@
-from collections.abc import Sequence
+import json
+from collections.abc import Iterable, Iterator, Sequence
 from typing import Any
 
-import pinecone  # type: ignore
+import numpy as np
 
+try:
+    import pinecone  # type: ignore
+except ImportError:
+    pinecone = None
+
+from infrastructure.config.config import CONFIG
 from schema.vector import SearchFilter, SearchResult, VectorData, VectorMetadata
+from shared.concurrency import bounded_map
 
 
 class PineConeClient:
+    # upsertの1リクエストあたりの上限（Pineconeの制限は1000件・2MB）
+    MAX_BATCH_SIZE = 1000
+    MAX_REQUEST_BYTES = 2 * 1024 * 1024
+    # レコード以外の部分（namespace・括弧など）とSDKの差異のために残す余裕
+    REQUEST_HEADROOM_BYTES = MAX_REQUEST_BYTES // 10
+
     def __init__(
         self,
         api_key: str | None = None,
         environment: str | None = None,
         index_name: str | None = None,
         namespace: str | None = None,
+        index: Any = None,
+        batch_size: int | None = None,
+        max_workers: int | None = None,
     ) -> None:
-        """Pinecone接続とIndexバインドを初期化する。"""
-        api_key = api_key
-        environment = environment
-        index_name = index_name
-        self.namespace = namespace
+        """Pinecone接続とIndexバインドを初期化する。
+
+        index を渡した場合はそれを使う（テスト用のインメモリ実装など）。
+        """
+        self.namespace = namespace or CONFIG.pinecone_namespace
+        self.batch_size = min(
+            batch_size or CONFIG.pinecone_batch_size, self.MAX_BATCH_SIZE
+        )
+        self.max_workers = max_workers or CONFIG.pinecone_max_workers
+
+        if index is not None:
+            self.index = index
+            return
+
+        if pinecone is None:
+            raise ImportError(
+                "pinecone-clientが必要です。"
+                "pip install pinecone-clientを実行してください。"
+            )
 
         # SDK初期化 & Indexバインド
-        pinecone.init(api_key=api_key, environment=environment)
-        self.index = pinecone.Index(index_name)
+        pinecone.init(
+            api_key=api_key or CONFIG.pinecone_api_key,
+            environment=environment or CONFIG.pinecone_environment,
+        )
+        self.index = pinecone.Index(index_name or CONFIG.pinecone_index_name)
 
     def upsert(self, vectors: list[VectorData]) -> dict[str, int]:
-        """ベクトルをupsertする"""
-        # VectorDataからPinecone形式に変換
-        pinecone_vectors = []
-        for vector in vectors:
-            pinecone_vectors.append(
-                {
-                    "id": vector.id,
-                    "values": vector.values,
-                    "metadata": vector.metadata.model_dump(),
-                }
+        """ベクトルをupsertする（件数・サイズの上限を超える場合は分割する）"""
+        return self.upsert_batch(vectors)
+
+    def upsert_batch(
+        self,
+        vectors: Iterable[VectorData],
+        batch_size: int | None = None,
+        max_workers: int | None = None,
+    ) -> dict[str, int]:
+        """ベクトルをリクエストサイズの上限で分割し、並行にupsertする。
+
+        vectors はイテレータでもよく、全件をメモリに載せずに送信する。
+        """
+        records = (
+            self._to_record(vector.id, vector.values, vector.metadata)
+            for vector in vectors
+        )
+        return self._upsert_records(records, batch_size, max_workers)
+
+    def upsert_arrays(
+        self,
+        ids: Sequence[str],
+        values: np.ndarray,
+        metadata: Sequence[VectorMetadata | dict[str, Any]],
+        batch_size: int | None = None,
+        max_workers: int | None = None,
+    ) -> dict[str, int]:
+        """(件数, 次元数) の行列とメタデータを、VectorDataを作らずにupsertする。"""
+        matrix = np.asarray(values, dtype=np.float32)
+        if matrix.ndim != 2 or not len(ids) == len(matrix) == len(metadata):
+            raise ValueError(
+                "ids・values・metadata の件数が一致しません "
+                f"({len(ids)}, {matrix.shape}, {len(metadata)})"
             )
 
-        result = self.index.upsert(vectors=pinecone_vectors, namespace=self.namespace)
-        return {"upserted_count": result.get("upserted_count", 0)}
+        records = (
+            self._to_record(ids[i], matrix[i], metadata[i]) for i in range(len(ids))
+        )
+        return self._upsert_records(records, batch_size, max_workers)
 
     def upsert_one(
         self,
         id: str,
-        values: Sequence[float],
+        values: np.ndarray | Sequence[float],
         metadata: VectorMetadata,
     ) -> dict[str, int]:
         """1件だけupsertするユーティリティ。"""
         vector_data = VectorData(
             id=id,
-            values=list(values),
+            values=values,
             metadata=metadata,
         )
         return self.upsert([vector_data])
 
+    def _upsert_records(
+        self,
+        records: Iterable[tuple[dict[str, Any], int]],
+        batch_size: int | None,
+        max_workers: int | None,
+    ) -> dict[str, int]:
+        batches = self._split_batches(
+            records, min(batch_size or self.batch_size, self.MAX_BATCH_SIZE)
+        )
+        upserted = 0
+        requests = 0
+        for count in bounded_map(
+            self._send_batch, batches, max_workers or self.max_workers
+        ):
+            upserted += count
+            requests += 1
+        return {"upserted_count": upserted, "request_count": requests}
+
+    def _split_batches(
+        self, records: Iterable[tuple[dict[str, Any], int]], batch_size: int
+    ) -> Iterator[list[dict[str, Any]]]:
+        """件数とリクエストサイズの上限を超えないようにまとめる。"""
+        batch: list[dict[str, Any]] = []
+        batch_bytes = 0
+        for record, size in records:
+            if batch and (
+                len(batch) >= batch_size
+                or batch_bytes + size
+                > self.MAX_REQUEST_BYTES - self.REQUEST_HEADROOM_BYTES
+            ):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(record)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    def _send_batch(self, batch: list[dict[str, Any]]) -> int:
+        result = self.index.upsert(vectors=batch, namespace=self.namespace)
+        if isinstance(result, dict):
+            return result.get("upserted_count", 0)
+        return getattr(result, "upserted_count", 0)
+
+    def _to_record(
+        self,
+        id: str,
+        values: Sequence[float] | np.ndarray,
+        metadata: VectorMetadata | dict[str, Any],
+    ) -> tuple[dict[str, Any], int]:
+        """Pinecone形式のレコードと、送信時のJSONでのサイズを返す。
+
+        float32の配列はここで初めてfloatのリストに変換する。値の桁数や
+        非ASCII文字のエスケープで大きさが変わるため、見積もらずに実際に
+        JSONにした長さを測る。
+        """
+        if isinstance(metadata, VectorMetadata):
+            # Pineconeはnullのメタデータを受け付けないため除く
+            metadata = metadata.model_dump(exclude_none=True)
+        values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+        record = {"id": id, "values": values, "metadata": metadata}
+        # 区切りの ", " の分を加える
+        return record, len(json.dumps(record)) + 2
+
     # --- R(ead): 類似検索 ---
     def query(
         self,
-        vector: Sequence[float],
+        vector: np.ndarray | Sequence[float],
         top_k: int = 5,
         filter: SearchFilter | None = None,
     ) -> list[SearchResult]:
@@ -65,7 +187,8 @@ class PineConeClient:
         pinecone_filter = filter.to_pinecone_filter() if filter else None
 
         results = self.index.query(
-            vector=list(vector),
+            # 送信する時点でのみfloatのリストに変換する
+            vector=np.asarray(vector, dtype=np.float32).tolist(),
             top_k=top_k,
             namespace=self.namespace,
             filter=pinecone_filter,
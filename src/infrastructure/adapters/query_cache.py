@@ -0,0 +1,301 @@
+"""
+検索結果キャッシュのQueryCachePort実装
+
+- InMemoryQueryCache: プロセス内のTTL付きLRU（ウォームなLambdaコンテナで再利用される）
+- S3QueryCache: コンテナ間で共有するS3のキャッシュ（プロセス内のLRUを前段に置ける）
+
+キーにはコーパスのバージョンを含めるため、取り込みでバージョンが
+更新されると以前のエントリは参照されなくなり、LRUやTTLで消える。
+Bedrock KBの取り込みはバージョンの発行より後に非同期で終わるため、その間に
+キャッシュした結果はTTLが切れるまで取り込み前の内容のままになる。
+"""
+
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+
+from application.ports.query_cache_port import QueryCachePort
+from domain.entities.corpus_version import CorpusVersion
+from infrastructure.config.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryQueryCache(QueryCachePort):
+    """件数の上限とTTLを持つプロセス内のLRUキャッシュ"""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 300):
+        """
+        初期化
+
+        Args:
+            max_entries: 保持する件数の上限（超えたら最も古く参照したものを捨てる）
+            ttl_seconds: エントリの有効期間（秒）
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # キー -> (期限, 値)
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"evictions": 0, "expirations": 0}
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """キャッシュされた値を取得（呼び出し側が変更しても影響しないようコピーを返す）"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        """値を格納し、上限を超えた分を古い順に捨てる"""
+        if self.max_entries <= 0:
+            return
+        value = copy.deepcopy(value)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_stats(self) -> dict[str, Any]:
+        """件数と、容量超過・期限切れで捨てた件数を取得"""
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                **self._stats,
+            }
+
+
+class S3QueryCache(QueryCachePort):
+    """コンテナ間で共有するS3の検索結果キャッシュ
+
+    エントリは {prefix}/{キー}.json に期限とともに保存する。S3側の
+    容量は、プレフィックスにライフサイクルルール（有効期限）を設定して
+    古いバージョンのエントリごと削除する前提とする。
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str,
+        prefix: str = "query-cache",
+        ttl_seconds: float = 300,
+        memory: InMemoryQueryCache | None = None,
+    ):
+        """
+        初期化
+
+        Args:
+            s3_client: エントリを読み書きするS3Client
+            bucket: エントリを保存するバケット
+            prefix: エントリを保存するキーのプレフィックス
+            ttl_seconds: エントリの有効期間（秒）
+            memory: 前段に置くプロセス内のキャッシュ（Noneで使わない）
+        """
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+        self.ttl_seconds = ttl_seconds
+        self.memory = memory
+        self._lock = threading.Lock()
+        self._stats = {"s3_hits": 0, "s3_misses": 0, "s3_errors": 0}
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """前段のキャッシュ、S3の順に探す"""
+        if self.memory is not None:
+            value = self.memory.get(key)
+            if value is not None:
+                return value
+
+        try:
+            entry = self.s3.download_json_file(
+                bucket=self.bucket, key=self._object_key(key)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to read query cache entry {key}: {e}")
+            self._count("s3_errors")
+            return None
+
+        # 期限はコンテナ間で比較するため壁時計の時刻で持つ
+        if not entry or entry.get("expires_at", 0) <= time.time():
+            self._count("s3_misses")
+            return None
+        self._count("s3_hits")
+        value = entry["value"]
+        if self.memory is not None:
+            self.memory.put(key, value)
+        return value
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        """前段のキャッシュとS3に格納する（S3の失敗は無視する）"""
+        if self.memory is not None:
+            self.memory.put(key, value)
+        try:
+            self.s3.upload_json_file(
+                bucket=self.bucket,
+                key=self._object_key(key),
+                data={"expires_at": time.time() + self.ttl_seconds, "value": value},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write query cache entry {key}: {e}")
+            self._count("s3_errors")
+
+    def get_stats(self) -> dict[str, Any]:
+        """S3の参照結果と前段のキャッシュの統計を取得"""
+        with self._lock:
+            stats = {
+                "backend": "s3",
+                "prefix": self.prefix,
+                "ttl_seconds": self.ttl_seconds,
+                **self._stats,
+            }
+        if self.memory is not None:
+            stats["memory"] = self.memory.get_stats()
+        return stats
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}.json"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+class CorpusVersionWatcher:
+    """ETLが発行したコーパスのバージョンを一定間隔でS3から読み直す
+
+    複数のプロジェクト（ファンアウトするKnowledge Baseごとのコーパス）を
+    監視する場合は、各プロジェクトのバージョンを合成したものを返すため、
+    どれか1つのプロジェクトを取り込み直すとバージョンが変わる。
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str | None = None,
+        projects: Sequence[str] | None = None,
+        check_interval_seconds: float | None = None,
+    ):
+        """
+        初期化
+
+        Args:
+            s3_client: バージョンを読み込むS3Client
+            bucket: バケット（省略時は CONFIG.s3_bucket）
+            projects: 監視するScrapboxプロジェクト（省略時は
+                CONFIG.knowledge_base_ids のプロジェクト、未設定なら
+                CONFIG.scrapbox_project）
+            check_interval_seconds: S3を読み直す間隔
+                （省略時は CONFIG.corpus_version_check_seconds）
+        """
+        self.s3 = s3_client
+        self.bucket = bucket or CONFIG.s3_bucket
+        self.projects = sorted(
+            projects or list(CONFIG.knowledge_base_ids) or [CONFIG.scrapbox_project]
+        )
+        self.check_interval_seconds = (
+            CONFIG.corpus_version_check_seconds
+            if check_interval_seconds is None
+            else check_interval_seconds
+        )
+        # プロジェクト -> 最後に読んだバージョン
+        self._versions: dict[str, str | None] = dict.fromkeys(self.projects)
+        self._version: str | None = None
+        self._checked_at: float | None = None
+        self._lock = threading.Lock()
+
+    def current(self) -> str | None:
+        """
+        現在のコーパスのバージョンを取得
+
+        Returns:
+            全プロジェクトのバージョンを合成したバージョン
+            （どのプロジェクトも未発行の場合はNone）
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._checked_at is not None
+                and now - self._checked_at < self.check_interval_seconds
+            ):
+                return self._version
+            self._checked_at = now
+
+            for project in self.projects:
+                try:
+                    data = self.s3.download_json_file(
+                        bucket=self.bucket, key=CorpusVersion.s3_key(project)
+                    )
+                except Exception as e:
+                    # 読めない間は最後に読んだバージョンを使い続ける
+                    logger.warning(f"Failed to read corpus version of {project}: {e}")
+                    continue
+                corpus_version = CorpusVersion.from_dict(data, project=project)
+                self._versions[project] = (
+                    corpus_version.version if corpus_version else None
+                )
+
+            version = self._composite_version()
+            if version != self._version:
+                logger.info(f"Corpus version changed: {self._version} -> {version}")
+                self._version = version
+            return self._version
+
+    def _composite_version(self) -> str | None:
+        """各プロジェクトのバージョンを1つのバージョンに合成する"""
+        published = [
+            f"{project}:{version}"
+            for project, version in self._versions.items()
+            if version is not None
+        ]
+        if not published:
+            return None
+        # キャッシュキーに含めるため、プロジェクト数によらず同じ長さにする
+        return hashlib.sha256(",".join(published).encode("utf-8")).hexdigest()[:32]
+
+
+def create_query_cache(s3_client: Any = None) -> QueryCachePort | None:
+    """
+    CONFIGの設定で検索結果キャッシュを作成
+
+    Args:
+        s3_client: 共有キャッシュに使うS3Client
+            （CONFIG.query_cache_s3_prefix が空の場合は使わない）
+
+    Returns:
+        キャッシュ（CONFIG.query_cache_size が0でS3も使わない場合はNone）
+    """
+    ttl_seconds = CONFIG.query_cache_ttl_seconds
+    memory = (
+        InMemoryQueryCache(CONFIG.query_cache_size, ttl_seconds)
+        if CONFIG.query_cache_size > 0
+        else None
+    )
+    s3_prefix = CONFIG.query_cache_s3_prefix
+    if s3_client is not None and s3_prefix:
+        return S3QueryCache(
+            s3_client,
+            bucket=CONFIG.s3_bucket,
+            prefix=f"{s3_prefix.rstrip('/')}/{CONFIG.scrapbox_project}",
+            ttl_seconds=ttl_seconds,
+            memory=memory,
+        )
+    return memory
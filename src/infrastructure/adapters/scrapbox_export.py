@@ -0,0 +1,76 @@
+"""
+Scrapboxプロジェクトのエクスポートファイルを読み込むアダプター
+
+エクスポートファイル（{"name": ..., "pages": [...]}）をストリーミングで読み込み、
+ページ詳細APIと同じ形のページデータに変換する。
+"""
+
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, BinaryIO
+
+from infrastructure.adapters.s3 import S3Client
+from shared.json_stream import iter_json_array
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def open_export(source: str, s3_client: S3Client | None = None) -> Iterator[BinaryIO]:
+    """エクスポートファイルをバイトストリームとして開く
+
+    Args:
+        source: ローカルファイルパス、または s3://bucket/key 形式のURI
+        s3_client: S3から読み込む場合に使用するクライアント
+
+    Yields:
+        エクスポートファイルのバイトストリーム
+    """
+    if source.startswith("s3://"):
+        bucket, _, key = source[len("s3://") :].partition("/")
+        if not bucket or not key:
+            raise ValueError(f"S3 URIの形式が正しくありません: {source}")
+
+        stream = (s3_client or S3Client()).open_stream(bucket=bucket, key=key)
+        try:
+            yield stream
+        finally:
+            stream.close()
+    else:
+        with open(source, "rb") as stream:
+            yield stream
+
+
+def iter_export_pages(stream: BinaryIO) -> Iterator[dict[str, Any]]:
+    """エクスポートファイルからページデータを1件ずつ返す
+
+    Args:
+        stream: エクスポートファイルのバイトストリーム
+
+    Yields:
+        ページ詳細APIと同じキーを持つページデータ
+    """
+    for page in iter_json_array(stream, key="pages"):
+        yield normalize_export_page(page)
+
+
+def normalize_export_page(page: dict[str, Any]) -> dict[str, Any]:
+    """エクスポート形式のページをページ詳細APIの形式に揃える
+
+    エクスポートの lines は文字列またはメタデータ付きの辞書のため
+    {"text": ...} に統一し、エクスポートに含まれない統計情報を補う。
+    """
+    lines = [
+        line if isinstance(line, dict) else {"text": line}
+        for line in page.get("lines", [])
+    ]
+    texts = [line.get("text", "") for line in lines]
+
+    page_data = dict(page)
+    page_data["lines"] = lines
+    # 1行目はタイトルのため、2行目以降の空でない行を概要とする
+    page_data.setdefault("descriptions", [text for text in texts[1:] if text][:5])
+    page_data.setdefault("linesCount", len(lines))
+    page_data.setdefault("charsCount", sum(len(text) for text in texts))
+    return page_data
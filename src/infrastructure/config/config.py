@@ -36,10 +36,32 @@ class Config:
     def pinecone_namespace(self) -> str:
         return os.environ.get("PINECONE_NAMESPACE")
 
+    @property
+    def pinecone_batch_size(self) -> int:
+        return int(os.environ.get("PINECONE_BATCH_SIZE", "100"))
+
+    @property
+    def pinecone_max_workers(self) -> int:
+        return int(os.environ.get("PINECONE_MAX_WORKERS", "4"))
+
     @property
     def knowledge_base_id(self) -> str:
         return os.environ.get("KNOWLEDGE_BASE_ID")
 
+    @property
+    def knowledge_base_ids(self) -> dict[str, str]:
+        # "project-a=KBID1,project-b=KBID2" の形式（未設定時は KNOWLEDGE_BASE_ID のみ）
+        value = os.environ.get("KNOWLEDGE_BASE_IDS", "")
+        if not value:
+            kb_id = self.knowledge_base_id
+            return {self.scrapbox_project or "default": kb_id} if kb_id else {}
+        pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+        return {name.strip(): kb_id.strip() for name, kb_id in pairs}
+
+    @property
+    def fan_out_timeout_seconds(self) -> float:
+        return float(os.environ.get("FAN_OUT_TIMEOUT_SECONDS", "5"))
+
     @property
     def data_source_id(self) -> str:
         return os.environ.get("DATA_SOURCE_ID")
@@ -50,10 +72,49 @@ class Config:
             "BEDROCK_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0"
         )
 
+    @property
+    def bedrock_max_concurrency(self) -> int:
+        # 非同期の検索はこの数のスレッドと接続で実行されるため、
+        # リクエストごとに1スレッドで直列に検索するより少なくしない
+        return int(os.environ.get("BEDROCK_MAX_CONCURRENCY", "32"))
+
     @property
     def webhook_secret(self) -> str:
         return os.environ.get("WEBHOOK_SECRET")
 
+    # ETL関連の設定
+    @property
+    def etl_max_workers(self) -> int:
+        return int(os.environ.get("ETL_MAX_WORKERS", "1"))
+
+    @property
+    def etl_incremental(self) -> bool:
+        return os.environ.get("ETL_INCREMENTAL", "false").lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+
+    @property
+    def etl_checkpoint_interval(self) -> int:
+        return int(os.environ.get("ETL_CHECKPOINT_INTERVAL", "50"))
+
+    @property
+    def etl_timeout_margin_seconds(self) -> int:
+        return int(os.environ.get("ETL_TIMEOUT_MARGIN_SECONDS", "60"))
+
+    @property
+    def etl_vector_flush_size(self) -> int:
+        return int(os.environ.get("ETL_VECTOR_FLUSH_SIZE", "500"))
+
+    @property
+    def etl_chunk_tokens(self) -> int:
+        return int(os.environ.get("ETL_CHUNK_TOKENS", "512"))
+
+    @property
+    def etl_chunk_overlap_tokens(self) -> int:
+        return int(os.environ.get("ETL_CHUNK_OVERLAP_TOKENS", "64"))
+
     # Embedding関連の設定
     @property
     def embedding_model_id(self) -> str:
@@ -67,10 +128,32 @@ class Config:
     def embedding_max_retries(self) -> int:
         return int(os.environ.get("EMBEDDING_MAX_RETRIES", "3"))
 
+    @property
+    def embedding_max_concurrency(self) -> int:
+        return int(os.environ.get("EMBEDDING_MAX_CONCURRENCY", "4"))
+
     @property
     def embedding_timeout_seconds(self) -> int:
         return int(os.environ.get("EMBEDDING_TIMEOUT_SECONDS", "30"))
 
+    @property
+    def embedding_cache_size(self) -> int:
+        return int(os.environ.get("EMBEDDING_CACHE_SIZE", "10000"))
+
+    @property
+    def embedding_cache_dir(self) -> str:
+        return os.environ.get("EMBEDDING_CACHE_DIR", "/tmp/embedding-cache")
+
+    @property
+    def embedding_cache_s3_prefix(self) -> str:
+        # 空の場合はS3のシャードを使わない（KBの取り込み対象 scrapbox/ の外を指定する）
+        return os.environ.get("EMBEDDING_CACHE_S3_PREFIX", "")
+
+    @property
+    def embedding_cache_shard_memory_mb(self) -> int:
+        # S3から読み込んだシャードをメモリに保持するサイズの上限
+        return int(os.environ.get("EMBEDDING_CACHE_SHARD_MEMORY_MB", "64"))
+
     @property
     def use_bedrock_embeddings(self) -> bool:
         return os.environ.get("USE_BEDROCK_EMBEDDINGS", "true").lower() in (
@@ -79,5 +162,58 @@ class Config:
             "yes",
         )
 
+    @property
+    def hnsw_m(self) -> int:
+        return int(os.environ.get("HNSW_M", "16"))
+
+    @property
+    def hnsw_ef_construction(self) -> int:
+        return int(os.environ.get("HNSW_EF_CONSTRUCTION", "200"))
+
+    @property
+    def hnsw_ef_search(self) -> int:
+        return int(os.environ.get("HNSW_EF_SEARCH", "64"))
+
+    @property
+    def hnsw_compact_ratio(self) -> float:
+        # トゥームストーンがノード数のこの割合を超えたらグラフを作り直す
+        return float(os.environ.get("HNSW_COMPACT_RATIO", "0.25"))
+
+    @property
+    def page_collapse_aggregation(self) -> str:
+        # "max" または "sum_top_n"
+        return os.environ.get("PAGE_COLLAPSE_AGGREGATION", "max")
+
+    @property
+    def page_collapse_over_fetch(self) -> int:
+        return int(os.environ.get("PAGE_COLLAPSE_OVER_FETCH", "3"))
+
+    @property
+    def mmr_lambda(self) -> float:
+        # 1で関連度のみ、0で多様性のみ
+        return float(os.environ.get("MMR_LAMBDA", "0.5"))
+
+    @property
+    def mmr_over_fetch(self) -> int:
+        return int(os.environ.get("MMR_OVER_FETCH", "4"))
+
+    @property
+    def query_cache_size(self) -> int:
+        # 0の場合は検索結果をキャッシュしない
+        return int(os.environ.get("QUERY_CACHE_SIZE", "1000"))
+
+    @property
+    def query_cache_ttl_seconds(self) -> int:
+        return int(os.environ.get("QUERY_CACHE_TTL_SECONDS", "300"))
+
+    @property
+    def query_cache_s3_prefix(self) -> str:
+        # 空の場合はコンテナ間で共有するS3のキャッシュを使わない
+        return os.environ.get("QUERY_CACHE_S3_PREFIX", "")
+
+    @property
+    def corpus_version_check_seconds(self) -> int:
+        return int(os.environ.get("CORPUS_VERSION_CHECK_SECONDS", "30"))
+
 
 CONFIG = Config()
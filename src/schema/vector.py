@@ -1,6 +1,24 @@
-from typing import Any
+from typing import Annotated, Any
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, Field, PlainSerializer, PlainValidator, WithJsonSchema
+
+
+def _to_float32_vector(value: Any) -> np.ndarray:
+    """1次元の float32 配列に変換する（既に float32 の配列ならコピーしない）"""
+    array = np.asarray(value, dtype=np.float32)
+    if array.ndim != 1:
+        raise ValueError(f"ベクトルは1次元である必要があります（shape: {array.shape}）")
+    return array
+
+
+# numpyのバッファのまま保持し、JSONに変換するときだけfloatのリストにするベクトル型
+Float32Vector = Annotated[
+    np.ndarray,
+    PlainValidator(_to_float32_vector),
+    PlainSerializer(lambda array: array.tolist(), return_type=list, when_used="json"),
+    WithJsonSchema({"type": "array", "items": {"type": "number"}}),
+]
 
 
 class VectorMetadata(BaseModel):
@@ -30,7 +48,7 @@ class VectorData(BaseModel):
     """Pineconeに登録するベクトルデータ"""
 
     id: str = Field(..., description="ベクトルのユニークID")
-    values: list[float] = Field(..., description="Embeddingベクトル")
+    values: Float32Vector = Field(..., description="Embeddingベクトル（float32）")
     metadata: VectorMetadata = Field(..., description="メタデータ")
 
 
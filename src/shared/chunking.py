@@ -0,0 +1,217 @@
+"""
+Scrapboxページをベクトル化用のチャンクに分割するチャンカー
+
+ページを「トップレベルの行とそれにぶら下がるインデント行」（コードブロック・
+テーブルを含む）のブロックに分け、ブロック単位で目標トークン数まで詰める。
+各行のトークン数は1度だけ見積もるため、分割のコストはページサイズに線形。
+"""
+
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from shared.scrapbox_markdown import ScrapboxMarkdownConverter
+
+_INDENT = re.compile(r"^[ \t　]*")
+_HEADING = re.compile(r"^\[\*+\s")
+_BLOCK_START = re.compile(r"^(?:code|table):")
+
+
+def estimate_tokens(text: str) -> int:
+    """テキストのトークン数を見積もる
+
+    日本語などの非ASCII文字は1文字≒1トークン、ASCII文字は4文字≒1トークン
+    として数える（トークナイザを使わずにO(n)で計算できる近似）。
+
+    Args:
+        text: 見積もるテキスト
+
+    Returns:
+        トークン数の見積もり
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return len(text) - ascii_chars + (ascii_chars + 3) // 4
+
+
+@dataclass
+class Chunk:
+    """ページから切り出したチャンク"""
+
+    index: int
+    # ページタイトル（と節の見出し）を先頭に付けたMarkdown
+    text: str
+    token_estimate: int
+
+
+@dataclass
+class _Block:
+    """分割の単位となる行のまとまり"""
+
+    lines: list[str]
+    tokens: int
+    heading: bool = False
+
+
+class ScrapboxChunker:
+    """Scrapboxページを目標サイズのチャンクに分割する"""
+
+    def __init__(
+        self, project: str, target_tokens: int = 512, overlap_tokens: int = 64
+    ):
+        """
+        初期化
+
+        Args:
+            project: Scrapboxプロジェクト名（Markdown変換のリンクに使用）
+            target_tokens: 1チャンクの目標トークン数
+            overlap_tokens: 前のチャンクの末尾から引き継ぐトークン数の上限
+        """
+        if target_tokens <= 0:
+            raise ValueError("target_tokens は1以上である必要があります")
+        if not 0 <= overlap_tokens < target_tokens:
+            raise ValueError("overlap_tokens は0以上 target_tokens 未満にしてください")
+
+        self.target_tokens = target_tokens
+        self.overlap_tokens = overlap_tokens
+        self.converter = ScrapboxMarkdownConverter(project)
+
+    def chunk_page(self, title: str, lines: list[str]) -> list[Chunk]:
+        """ページをチャンクに分割する
+
+        Args:
+            title: ページタイトル
+            lines: ページの各行のテキスト（先頭行はタイトル）
+
+        Returns:
+            チャンクのリスト（本文が空のページでもタイトルのみのチャンクを1つ返す）
+        """
+        body = lines[1:] if lines and lines[0] == title else lines
+
+        chunks: list[Chunk] = []
+        current: list[_Block] = []
+        current_tokens = 0
+        # 直前の出力以降に追加されたブロック数（重複分だけのチャンクを出さない）
+        fresh = 0
+        section: str | None = None
+
+        def flush() -> None:
+            chunk_lines = [line for block in current for line in block.lines]
+            # 節の途中から始まるチャンクには節の見出しを付けて文脈を補う
+            if section is not None and not current[0].heading:
+                chunk_lines.insert(0, section)
+            text = self.converter.convert_page(title, chunk_lines)
+            chunks.append(Chunk(len(chunks), text, estimate_tokens(text)))
+
+        for block in self._iter_blocks(body):
+            if block.heading:
+                # 見出しで節を区切る（前の節の末尾は引き継がない）
+                if fresh:
+                    flush()
+                current, current_tokens, fresh = [], 0, 0
+                section = block.lines[0]
+            elif fresh and current_tokens + block.tokens > self.target_tokens:
+                flush()
+                current = self._overlap_tail(current)
+                current_tokens = sum(b.tokens for b in current)
+                fresh = 0
+
+            current.append(block)
+            current_tokens += block.tokens
+            fresh += 1
+
+        if fresh:
+            flush()
+        elif not chunks:
+            text = self.converter.convert_page(title, [])
+            chunks.append(Chunk(0, text, estimate_tokens(text)))
+        return chunks
+
+    def _overlap_tail(self, blocks: list[_Block]) -> list[_Block]:
+        """次のチャンクに引き継ぐ末尾のブロック"""
+        tail: list[_Block] = []
+        tokens = 0
+        for block in reversed(blocks):
+            if block.heading or tokens + block.tokens > self.overlap_tokens:
+                break
+            tail.append(block)
+            tokens += block.tokens
+        tail.reverse()
+        return tail
+
+    def _iter_blocks(self, lines: list[str]) -> Iterator[_Block]:
+        """行をブロックに分け、目標サイズを超えるブロックは行単位で分割する"""
+        block_lines: list[str] = []
+        block_tokens = 0
+
+        for line in lines:
+            indent = _INDENT.match(line).end()
+            # インデントされた行と空行は直前のトップレベルの行にぶら下げる
+            if block_lines and (indent or not line):
+                block_lines.append(line)
+                block_tokens += estimate_tokens(line) + 1
+                continue
+
+            if block_lines:
+                yield from self._split_block(block_lines, block_tokens)
+            block_lines = [line]
+            block_tokens = estimate_tokens(line) + 1
+
+        if block_lines:
+            yield from self._split_block(block_lines, block_tokens)
+
+    def _split_block(self, lines: list[str], tokens: int) -> Iterator[_Block]:
+        """目標サイズを超えるブロックを分割する"""
+        heading = bool(_HEADING.match(lines[0]))
+        if tokens <= self.target_tokens:
+            yield _Block(lines, tokens, heading)
+            return
+
+        # コードブロック・テーブルは分割後の各片にも開始行を付けて記法を保つ
+        header = lines[0] if _BLOCK_START.match(lines[0]) else None
+        piece: list[str] = []
+        piece_tokens = 0
+        for line in lines:
+            line_tokens = estimate_tokens(line) + 1
+            if piece and piece_tokens + line_tokens > self.target_tokens:
+                yield _Block(piece, piece_tokens)
+                piece = [header] if header is not None else []
+                piece_tokens = estimate_tokens(header) + 1 if header else 0
+
+            if line_tokens > self.target_tokens:
+                # 1行だけで目標サイズを超える場合は文字数で切る
+                step = max(1, len(line) * self.target_tokens // line_tokens)
+                for start in range(0, len(line), step):
+                    part = line[start : start + step]
+                    yield _Block(piece + [part], piece_tokens + estimate_tokens(part))
+                piece = [header] if header is not None else []
+                piece_tokens = estimate_tokens(header) + 1 if header else 0
+                continue
+
+            piece.append(line)
+            piece_tokens += line_tokens
+
+        if piece and (header is None or len(piece) > 1):
+            yield _Block(piece, piece_tokens)
+
+
+def chunk_page(
+    project: str,
+    title: str,
+    lines: list[str],
+    target_tokens: int = 512,
+    overlap_tokens: int = 64,
+) -> list[Chunk]:
+    """Scrapboxページをチャンクに分割する
+
+    Args:
+        project: Scrapboxプロジェクト名
+        title: ページタイトル
+        lines: ページの各行のテキスト
+        target_tokens: 1チャンクの目標トークン数
+        overlap_tokens: 前のチャンクから引き継ぐトークン数の上限
+
+    Returns:
+        チャンクのリスト
+    """
+    chunker = ScrapboxChunker(project, target_tokens, overlap_tokens)
+    return chunker.chunk_page(title, lines)
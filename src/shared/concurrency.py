@@ -0,0 +1,40 @@
+"""
+並行処理のユーティリティ関数
+"""
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+
+def bounded_map(
+    func: Callable[[Any], Any], items: Iterable[Any], max_workers: int = 1
+) -> Iterator[Any]:
+    """スレッドプールで並行実行し、入力順に結果を返す
+
+    実行中のタスク数を max_workers の2倍までに抑えるため、
+    items がジェネレータでも全件を先読みしない。
+
+    Args:
+        func: 各要素に適用する関数
+        items: 入力要素のイテラブル
+        max_workers: ワーカースレッド数（1以下の場合は逐次実行）
+
+    Yields:
+        func の戻り値（入力順）
+    """
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    in_flight: deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for item in items:
+            in_flight.append(executor.submit(func, item))
+            if len(in_flight) >= max_workers * 2:
+                yield in_flight.popleft().result()
+
+        while in_flight:
+            yield in_flight.popleft().result()
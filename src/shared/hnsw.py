@@ -0,0 +1,349 @@
+"""
+HNSW（Hierarchical Navigable Small World）グラフによる近似最近傍探索
+
+L2正規化した float32 のベクトルを内積（コサイン類似度）で探索する。
+ノードの追加はインクリメンタルに行い、削除はトゥームストーンで表す
+（削除したノードは探索の経路としては使い、結果には含めない）。
+"""
+
+import heapq
+import math
+import threading
+from pathlib import Path
+
+import numpy as np
+
+
+class HNSWIndex:
+    """内積で探索するHNSWインデックス
+
+    ノードは追加順の連番で識別する。IDとの対応は呼び出し側で持つ。
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        seed: int = 0,
+    ):
+        """
+        初期化
+
+        Args:
+            dimension: ベクトルの次元数
+            m: 上位層で各ノードが持つ近傍数（第0層はその2倍）
+            ef_construction: 追加時に探索する候補数
+            ef_search: 検索時に探索する候補数の既定値
+            seed: 層を決める乱数のシード
+        """
+        if m < 2:
+            raise ValueError("mは2以上で指定してください")
+
+        self.dimension = dimension
+        self.m = m
+        self.max_m0 = 2 * m
+        self.ef_construction = max(ef_construction, m)
+        self.ef_search = ef_search
+        self._level_mult = 1 / math.log(m)
+        self._rng = np.random.default_rng(seed)
+
+        self._vectors = np.empty((0, dimension), dtype=np.float32)
+        self._count = 0
+        self._levels: list[int] = []
+        # _links[node][level] が近傍ノードのリスト
+        self._links: list[list[list[int]]] = []
+        self._deleted: list[bool] = []
+        self._deleted_count = 0
+        self._entry_point = -1
+        self._max_level = -1
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """削除していないノード数"""
+        return self._count - self._deleted_count
+
+    @property
+    def node_count(self) -> int:
+        """トゥームストーンを含むノード数"""
+        return self._count
+
+    @property
+    def deleted_count(self) -> int:
+        """トゥームストーンのノード数"""
+        return self._deleted_count
+
+    def add(self, vector: np.ndarray) -> int:
+        """
+        ベクトルを追加
+
+        Args:
+            vector: 追加するベクトル（正規化して保持する）
+
+        Returns:
+            追加したノードの番号
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.shape != (self.dimension,):
+            raise ValueError(
+                f"ベクトルの次元数が一致しません "
+                f"({vector.shape} != ({self.dimension},))"
+            )
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+
+        with self._lock:
+            node = self._append(vector, level)
+            if self._entry_point < 0:
+                self._entry_point, self._max_level = node, level
+                return node
+
+            entry = self._entry_point
+            for layer in range(self._max_level, level, -1):
+                entry = self._search_layer(vector, [entry], 1, layer)[0][1]
+
+            entries = [entry]
+            for layer in range(min(level, self._max_level), -1, -1):
+                candidates = self._search_layer(
+                    vector, entries, self.ef_construction, layer
+                )
+                max_links = self.max_m0 if layer == 0 else self.m
+                neighbors = self._select_neighbors(candidates, self.m)
+                self._links[node][layer] = neighbors
+                for neighbor in neighbors:
+                    self._connect(neighbor, node, layer, max_links)
+                entries = [n for _, n in candidates]
+
+            if level > self._max_level:
+                self._entry_point, self._max_level = node, level
+        return node
+
+    def delete(self, node: int) -> None:
+        """ノードにトゥームストーンを付ける"""
+        with self._lock:
+            if not self._deleted[node]:
+                self._deleted[node] = True
+                self._deleted_count += 1
+
+    def compact(self) -> tuple["HNSWIndex", list[int]]:
+        """
+        削除していないノードだけでインデックスを作り直す
+
+        トゥームストーンは探索の経路として残り続けるため、削除が増えると
+        探索する候補とメモリが無駄に増える。作り直すとノード番号が変わる。
+
+        Returns:
+            作り直したインデックスと、新しいノード番号の順に並べた元のノード番号
+        """
+        with self._lock:
+            kept = [node for node in range(self._count) if not self._deleted[node]]
+            vectors = self._vectors[kept]
+        index = HNSWIndex(self.dimension, self.m, self.ef_construction, self.ef_search)
+        for vector in vectors:
+            index.add(vector)
+        return index, kept
+
+    def is_deleted(self, node: int) -> bool:
+        """ノードが削除済みかどうか"""
+        return self._deleted[node]
+
+    def search(
+        self, query: np.ndarray, top_k: int = 5, ef: int | None = None
+    ) -> list[tuple[int, float]]:
+        """
+        クエリベクトルとの内積が大きい順に近似的な上位k件を返す
+
+        Args:
+            query: クエリベクトル
+            top_k: 取得する結果数
+            ef: 探索する候補数（省略時は ef_search）
+
+        Returns:
+            (ノード番号, スコア) のリスト
+        """
+        query = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            if len(self) == 0 or top_k <= 0:
+                return []
+
+            entry = self._entry_point
+            for layer in range(self._max_level, 0, -1):
+                entry = self._search_layer(query, [entry], 1, layer)[0][1]
+
+            # トゥームストーンの分だけ候補を広げる
+            ef = max(ef or self.ef_search, top_k)
+            if self._deleted_count:
+                ef = int(ef * self._count / len(self))
+            candidates = self._search_layer(query, [entry], ef, 0)
+
+        return [
+            (node, float(score))
+            for score, node in candidates
+            if not self._deleted[node]
+        ][:top_k]
+
+    def save(self, path: str | Path) -> None:
+        """
+        インデックスを .npz ファイルに保存
+
+        Args:
+            path: 保存先のファイル（ファイルオブジェクトも可）
+        """
+        with self._lock:
+            counts = []
+            links = []
+            for node_links in self._links:
+                for layer_links in node_links:
+                    counts.append(len(layer_links))
+                    links.extend(layer_links)
+            np.savez(
+                path,
+                vectors=self._vectors[: self._count],
+                levels=np.array(self._levels, dtype=np.int32),
+                deleted=np.array(self._deleted, dtype=bool),
+                link_counts=np.array(counts, dtype=np.int32),
+                links=np.array(links, dtype=np.int32),
+                params=np.array(
+                    [self.m, self.ef_construction, self.ef_search], dtype=np.int64
+                ),
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "HNSWIndex":
+        """
+        save で保存したインデックスを読み込む
+
+        Args:
+            path: 保存したファイル
+
+        Returns:
+            読み込んだインデックス
+        """
+        with np.load(path, allow_pickle=False) as data:
+            vectors = data["vectors"]
+            m, ef_construction, ef_search = (int(v) for v in data["params"])
+            index = cls(vectors.shape[1], m, ef_construction, ef_search)
+            levels = data["levels"].tolist()
+            counts = data["link_counts"].tolist()
+            links = data["links"].tolist()
+            deleted = data["deleted"].tolist()
+
+        index._vectors = np.array(vectors, dtype=np.float32)
+        index._count = len(vectors)
+        index._levels = levels
+        index._deleted = deleted
+        index._deleted_count = sum(deleted)
+        offset = 0
+        position = 0
+        for level in levels:
+            node_links = []
+            for _ in range(level + 1):
+                count = counts[position]
+                node_links.append(links[offset : offset + count])
+                offset += count
+                position += 1
+            index._links.append(node_links)
+        if levels:
+            index._max_level = max(levels)
+            index._entry_point = levels.index(index._max_level)
+        return index
+
+    def _append(self, vector: np.ndarray, level: int) -> int:
+        """ベクトルを格納し、ノード番号を返す（容量は倍々に広げる）"""
+        if self._count == len(self._vectors):
+            grown = np.empty(
+                (max(2 * len(self._vectors), 1024), self.dimension), dtype=np.float32
+            )
+            grown[: self._count] = self._vectors[: self._count]
+            self._vectors = grown
+        node = self._count
+        self._vectors[node] = vector
+        self._count += 1
+        self._levels.append(level)
+        self._links.append([[] for _ in range(level + 1)])
+        self._deleted.append(False)
+        return node
+
+    def _search_layer(
+        self, query: np.ndarray, entries: list[int], ef: int, layer: int
+    ) -> list[tuple[float, int]]:
+        """1つの層を貪欲に探索し、スコアの降順に (スコア, ノード) を返す"""
+        visited = set(entries)
+        entry_scores = self._vectors[entries] @ query
+        # candidates はスコアの大きい順、results は小さい順に取り出すヒープ
+        candidates = [
+            (-s, n) for s, n in zip(entry_scores.tolist(), entries, strict=True)
+        ]
+        results = [(s, n) for s, n in zip(entry_scores.tolist(), entries, strict=True)]
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            negative_score, node = heapq.heappop(candidates)
+            if -negative_score < results[0][0] and len(results) >= ef:
+                break
+            neighbors = [n for n in self._links[node][layer] if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            scores = self._vectors[neighbors] @ query
+            for score, neighbor in zip(scores.tolist(), neighbors, strict=True):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, neighbor))
+                    heapq.heappush(results, (score, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _select_neighbors(
+        self, candidates: list[tuple[float, int]], max_links: int
+    ) -> list[int]:
+        """近傍選択のヒューリスティック
+
+        既に選んだ近傍よりも対象に近い候補だけを選び、グラフが
+        クラスタ間をつなぐようにする。足りない分はスコア順に補う。
+        """
+        if len(candidates) <= max_links:
+            return [node for _, node in candidates]
+
+        nodes = [node for _, node in candidates]
+        scores = np.array([score for score, _ in candidates], dtype=np.float32)
+        vectors = self._vectors[nodes]
+        # 各候補と、選んだ近傍のうち最も近いものとのスコア
+        closest = np.full(len(nodes), -np.inf, dtype=np.float32)
+        selected: list[int] = []
+        position = 0
+        while position < len(nodes) and len(selected) < max_links:
+            acceptable = closest[position:] <= scores[position:]
+            offset = int(np.argmax(acceptable))
+            if not acceptable[offset]:
+                break
+            position += offset
+            selected.append(position)
+            np.maximum(closest, vectors @ vectors[position], out=closest)
+            position += 1
+
+        chosen = set(selected)
+        pruned = [i for i in range(len(nodes)) if i not in chosen]
+        selected.extend(pruned[: max_links - len(selected)])
+        return [nodes[i] for i in selected]
+
+    def _connect(self, node: int, new_node: int, layer: int, max_links: int) -> None:
+        """node から new_node への辺を追加し、上限を超えたら近傍を選び直す"""
+        links = self._links[node][layer]
+        links.append(new_node)
+        if len(links) <= max_links:
+            return
+        scores = self._vectors[links] @ self._vectors[node]
+        candidates = sorted(zip(scores.tolist(), links, strict=True), reverse=True)
+        self._links[node][layer] = self._select_neighbors(candidates, max_links)
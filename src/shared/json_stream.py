@@ -0,0 +1,126 @@
+"""
+JSONのストリーミング処理
+
+- iter_json_array: 巨大なJSONファイルの配列を1要素ずつデコードするパーサ
+  （ファイルサイズによらずメモリ使用量はおおよそ1要素分に抑えられる）
+- iter_ndjson: イベントを1行ずつのJSON（NDJSON）にエンコードする
+  （Lambdaのレスポンスストリーミングなどで逐次送信する）
+"""
+
+import codecs
+import json
+from collections.abc import Iterable, Iterator
+from typing import Any, BinaryIO
+
+_WHITESPACE = " \t\r\n"
+
+
+class _StreamReader:
+    """バイトストリームをUTF-8で逐次デコードしながら読み進めるリーダー"""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """次のチャンクを読み込む（読み込めなかった場合はFalse）"""
+        if self.eof:
+            return False
+
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        # 読み終えた部分は捨てて、バッファを未読部分だけに保つ
+        self.buffer = self.buffer[self.pos :] + self.text_decoder.decode(
+            chunk, final=self.eof
+        )
+        self.pos = 0
+        return bool(chunk)
+
+    def peek(self, skip: str = "") -> str:
+        """空白（と skip に含まれる文字）を読み飛ばし、次の文字を返す"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in (
+                _WHITESPACE + skip
+            ):
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                break
+        return self.buffer[self.pos] if self.pos < len(self.buffer) else ""
+
+    def expect(self, char: str) -> None:
+        """次の文字が char であることを確認して読み進める"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r}")
+        self.pos += 1
+
+    def decode_value(self) -> Any:
+        """次のJSON値を1つデコードする"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # 値の途中でバッファが尽きた場合は追加で読み込んで再試行
+                if self.fill():
+                    continue
+                raise
+            # 数値などはバッファ末尾で途切れている可能性があるため読み足す
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(
+    stream: BinaryIO, key: str, chunk_size: int = 64 * 1024
+) -> Iterator[Any]:
+    """トップレベルオブジェクトの配列フィールドを1要素ずつ返す
+
+    Args:
+        stream: JSONファイルのバイトストリーム（read(size) を持つもの）
+        key: 読み出す配列のキー
+        chunk_size: 1回に読み込むバイト数
+
+    Yields:
+        配列の各要素
+    """
+    reader = _StreamReader(stream, chunk_size)
+    reader.expect("{")
+
+    while reader.peek(skip=",") not in ("}", ""):
+        field = reader.decode_value()
+        reader.expect(":")
+
+        if field != key:
+            # 対象外のフィールドは読み捨てる
+            reader.decode_value()
+            continue
+
+        reader.expect("[")
+        while reader.peek(skip=",") not in ("]", ""):
+            yield reader.decode_value()
+        reader.expect("]")
+
+    reader.expect("}")
+
+
+def iter_ndjson(events: Iterable[Any]) -> Iterator[bytes]:
+    """イベントを1件ずつNDJSONの行にエンコードする
+
+    Args:
+        events: JSONにできるイベント（JSONにできない値は文字列にする）
+
+    Yields:
+        改行で終わるUTF-8の行
+    """
+    for event in events:
+        yield (json.dumps(event, ensure_ascii=False, default=str) + "\n").encode(
+            "utf-8"
+        )
@@ -0,0 +1,271 @@
+"""
+ステージごとに並行度を設定できるプロデューサ/コンシューマ型パイプライン
+
+各ステージは専用のワーカースレッドで動き、ステージ間は上限付きキューで
+接続される。遅いステージの手前のキューが埋まると上流の投入が止まるため
+（バックプレッシャー）、処理中の要素数は max_in_flight を超えない。
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# ステージの終了を下流に伝える番兵
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """パイプラインの1ステージ"""
+
+    name: str
+    # 要素を受け取り、次のステージに渡す要素を返す関数
+    func: Callable[[Any], Any]
+    workers: int = 1
+    # このステージの入力キューの上限
+    queue_size: int = 16
+
+
+@dataclass
+class PipelineResult:
+    """パイプラインを通過した1要素の結果"""
+
+    # 入力順のインデックス
+    index: int
+    # 最後のステージの戻り値（失敗時は失敗したステージへの入力）
+    value: Any
+    error: Exception | None = None
+    failed_stage: str | None = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class _StageStats:
+    """ステージごとの処理件数・処理時間・キュー深さ"""
+
+    def __init__(self, stage: Stage, input_queue: queue.Queue):
+        self.stage = stage
+        self.input_queue = input_queue
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self._lock = threading.Lock()
+
+    def observe_queue(self) -> None:
+        depth = self.input_queue.qsize()
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def record(self, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            self.processed += 1
+            self.failed += int(failed)
+            self.busy_seconds += elapsed
+
+    def snapshot(self, wall_seconds: float) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.stage.workers,
+                "processed": self.processed,
+                "failed": self.failed,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "throughput_per_sec": (
+                    round(self.processed / wall_seconds, 2) if wall_seconds else 0.0
+                ),
+                # ワーカーが処理中だった時間の割合（1に近いステージがボトルネック）
+                "utilization": (
+                    round(self.busy_seconds / (wall_seconds * self.stage.workers), 3)
+                    if wall_seconds
+                    else 0.0
+                ),
+                "queue_depth": self.input_queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+            }
+
+
+class Pipeline:
+    """上限付きキューでステージを接続したパイプライン"""
+
+    def __init__(self, stages: list[Stage], max_in_flight: int | None = None):
+        """
+        初期化
+
+        Args:
+            stages: 実行順のステージ
+            max_in_flight: 同時にパイプライン内に存在できる要素数の上限
+                （省略時はキュー容量とワーカー数の合計）
+        """
+        if not stages:
+            raise ValueError("ステージが1つ以上必要です")
+
+        self.stages = stages
+        self.max_in_flight = max_in_flight or sum(
+            stage.queue_size + stage.workers for stage in stages
+        )
+        self._stats: dict[str, _StageStats] = {}
+        self._started_at: float | None = None
+        self._finished_at: float | None = None
+
+    def run(self, items: Iterable[Any], ordered: bool = False) -> Iterator[Any]:
+        """要素をパイプラインに流し、完了したものから結果を返す
+
+        items は専用のスレッドから読み出される。items の読み出しで例外が
+        発生した場合は、投入済みの要素を処理し終えてから例外を送出する。
+
+        Args:
+            items: 入力要素
+            ordered: Trueの場合は入力順に結果を返す
+
+        Yields:
+            PipelineResult
+        """
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        output: queue.Queue = queue.Queue()
+        in_flight = threading.Semaphore(self.max_in_flight)
+        cancelled = threading.Event()
+        feeder_errors: list[Exception] = []
+        remaining_workers = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+
+        self._stats = {
+            stage.name: _StageStats(stage, queues[i])
+            for i, stage in enumerate(self.stages)
+        }
+        self._started_at = time.monotonic()
+        self._finished_at = None
+
+        def enqueue(i: int, entry: Any) -> None:
+            queues[i].put(entry)
+            self._stats[self.stages[i].name].observe_queue()
+
+        def feed() -> None:
+            iterator = iter(items)
+            index = 0
+            try:
+                while True:
+                    # 処理中の要素数が上限に達している間は次の要素を読み出さない
+                    while not in_flight.acquire(timeout=0.1):
+                        if cancelled.is_set():
+                            return
+                    if cancelled.is_set():
+                        return
+                    try:
+                        value = next(iterator)
+                    except StopIteration:
+                        return
+                    enqueue(0, (index, value))
+                    index += 1
+            except Exception as e:
+                feeder_errors.append(e)
+            finally:
+                for _ in range(self.stages[0].workers):
+                    queues[0].put(_DONE)
+
+        def work(i: int) -> None:
+            stage = self.stages[i]
+            stats = self._stats[stage.name]
+            is_last = i + 1 == len(self.stages)
+
+            while True:
+                entry = queues[i].get()
+                if entry is _DONE:
+                    break
+
+                index, value = entry
+                if cancelled.is_set():
+                    # 中断時は処理せずに流し切る
+                    output.put(PipelineResult(index, value))
+                    continue
+
+                started = time.perf_counter()
+                try:
+                    next_value = stage.func(value)
+                except Exception as e:
+                    stats.record(time.perf_counter() - started, failed=True)
+                    output.put(PipelineResult(index, value, e, stage.name))
+                    continue
+                stats.record(time.perf_counter() - started, failed=False)
+
+                if is_last:
+                    output.put(PipelineResult(index, next_value))
+                else:
+                    enqueue(i + 1, (index, next_value))
+
+            # ステージの最後のワーカーが下流に終了を伝える
+            with remaining_lock:
+                remaining_workers[i] -= 1
+                stage_finished = remaining_workers[i] == 0
+            if stage_finished:
+                if is_last:
+                    output.put(_DONE)
+                else:
+                    for _ in range(self.stages[i + 1].workers):
+                        queues[i + 1].put(_DONE)
+
+        threads = [threading.Thread(target=feed, name="pipeline-feed", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(
+                    target=work, args=(i,), name=f"pipeline-{stage.name}", daemon=True
+                )
+                for _ in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+
+        try:
+            reorder_buffer: dict[int, PipelineResult] = {}
+            next_index = 0
+            while True:
+                result = output.get()
+                if result is _DONE:
+                    break
+
+                if not ordered:
+                    in_flight.release()
+                    yield result
+                    continue
+
+                reorder_buffer[result.index] = result
+                while next_index in reorder_buffer:
+                    in_flight.release()
+                    yield reorder_buffer.pop(next_index)
+                    next_index += 1
+
+            if feeder_errors:
+                raise feeder_errors[0]
+        finally:
+            cancelled.set()
+            # 途中で打ち切られた場合も、残りの要素を流し切ってからスレッドを終える
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    output.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+                # 投入待ちのフィーダーを解放する
+                in_flight.release()
+            self._finished_at = time.monotonic()
+            logger.info(f"Pipeline stats: {self.get_stats()}")
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """ステージごとのスループットとキュー深さを取得
+
+        実行中に呼び出すと、その時点の値を返す。
+        """
+        if self._started_at is None:
+            return {}
+
+        end = self._finished_at or time.monotonic()
+        wall_seconds = end - self._started_at
+        return {
+            name: stats.snapshot(wall_seconds) for name, stats in self._stats.items()
+        }
@@ -0,0 +1,322 @@
+"""
+ベクトルの量子化コーデック
+
+ScalarQuantizer は次元ごとに float32 を int8 に、ProductQuantizer は
+ベクトルを部分空間に分けて各部分をk-meansのセントロイド番号（uint8）に
+符号化する。検索はクエリを量子化しない非対称距離計算（ADC）で、
+符号から内積の近似値を求める。
+"""
+
+from typing import IO, Any
+
+import numpy as np
+
+# スコア計算で一度に展開する行数（一時的な配列をCPUキャッシュに収める）
+SCORE_BLOCK_ROWS = 512
+
+
+class ScalarQuantizer:
+    """次元ごとの最小値・最大値で float32 を int8 に量子化するコーデック"""
+
+    kind = "int8"
+
+    def __init__(self):
+        """初期化（fit で値の範囲を学習する）"""
+        self.offset: np.ndarray | None = None
+        self.scale: np.ndarray | None = None
+
+    @property
+    def dimension(self) -> int:
+        """ベクトルの次元数"""
+        return len(self.offset)
+
+    @property
+    def code_bytes(self) -> int:
+        """1ベクトルあたりの符号のバイト数"""
+        return self.dimension
+
+    def fit(self, vectors: np.ndarray) -> "ScalarQuantizer":
+        """
+        次元ごとの値の範囲を学習
+
+        Args:
+            vectors: (件数, 次元数) の行列
+
+        Returns:
+            自身
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        low = vectors.min(axis=0)
+        high = vectors.max(axis=0)
+        scale = (high - low) / 255
+        scale[scale == 0] = 1.0
+        # 符号 -128..127 を low..high に対応させる
+        self.scale = scale.astype(np.float32)
+        self.offset = (low + 128 * scale).astype(np.float32)
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        ベクトルを int8 の符号に変換
+
+        Args:
+            vectors: (件数, 次元数) の行列
+
+        Returns:
+            (件数, 次元数) の int8 の行列
+        """
+        codes = np.rint(
+            (np.asarray(vectors, dtype=np.float32) - self.offset) / self.scale
+        )
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """
+        符号を float32 のベクトルに戻す
+
+        Args:
+            codes: encode の戻り値
+
+        Returns:
+            (件数, 次元数) の float32 の行列
+        """
+        return codes.astype(np.float32) * self.scale + self.offset
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        符号と float32 のクエリの内積を近似する（ADC）
+
+        x ≈ code * scale + offset なので x・q ≈ code・(q * scale) + offset・q
+
+        Args:
+            codes: encode の戻り値
+            query: クエリベクトル
+
+        Returns:
+            (件数,) の float32 のスコア
+        """
+        query = np.asarray(query, dtype=np.float32)
+        weights = query * self.scale
+        bias = np.float32(self.offset @ query)
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = codes[start : start + SCORE_BLOCK_ROWS]
+            scores[start : start + len(block)] = block.astype(np.float32) @ weights
+        return scores + bias
+
+    def save(self, file: str | IO[bytes]) -> None:
+        """パラメータを .npz に保存する"""
+        np.savez(file, kind=self.kind, offset=self.offset, scale=self.scale)
+
+    @classmethod
+    def from_arrays(cls, arrays: Any) -> "ScalarQuantizer":
+        """save で保存した配列から復元する"""
+        codec = cls()
+        codec.offset = np.asarray(arrays["offset"], dtype=np.float32)
+        codec.scale = np.asarray(arrays["scale"], dtype=np.float32)
+        return codec
+
+
+class ProductQuantizer:
+    """部分空間ごとのk-meansで符号化する直積量子化のコーデック"""
+
+    kind = "pq"
+
+    def __init__(
+        self,
+        subspaces: int = 96,
+        centroids: int = 256,
+        iterations: int = 10,
+        training_size: int = 65536,
+        seed: int = 0,
+    ):
+        """
+        初期化
+
+        Args:
+            subspaces: 部分空間の数（次元数を割り切れる値）
+            centroids: 部分空間ごとのセントロイド数（最大256）
+            iterations: k-meansの反復回数
+            training_size: 学習に使う最大件数
+            seed: 乱数のシード
+        """
+        if not 1 <= centroids <= 256:
+            raise ValueError("centroidsは1-256の範囲で指定してください")
+
+        self.subspaces = subspaces
+        self.centroids = centroids
+        self.iterations = iterations
+        self.training_size = training_size
+        self.seed = seed
+        # (部分空間数, セントロイド数, 部分空間の次元数)
+        self.codebooks: np.ndarray | None = None
+
+    @property
+    def dimension(self) -> int:
+        """ベクトルの次元数"""
+        return self.codebooks.shape[0] * self.codebooks.shape[2]
+
+    @property
+    def code_bytes(self) -> int:
+        """1ベクトルあたりの符号のバイト数"""
+        return self.subspaces
+
+    def fit(self, vectors: np.ndarray) -> "ProductQuantizer":
+        """
+        部分空間ごとのセントロイドを学習
+
+        Args:
+            vectors: (件数, 次元数) の行列
+
+        Returns:
+            自身
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        dimension = vectors.shape[1]
+        if dimension % self.subspaces:
+            raise ValueError(
+                f"次元数 {dimension} は部分空間の数 {self.subspaces} で割り切れません"
+            )
+
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > self.training_size:
+            vectors = vectors[
+                rng.choice(len(vectors), self.training_size, replace=False)
+            ]
+        centroids = min(self.centroids, len(vectors))
+        sub_dimension = dimension // self.subspaces
+
+        self.codebooks = np.empty(
+            (self.subspaces, centroids, sub_dimension), dtype=np.float32
+        )
+        for j, sub_vectors in enumerate(self._split(vectors)):
+            self.codebooks[j] = self._kmeans(
+                np.ascontiguousarray(sub_vectors), centroids, rng
+            )
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        ベクトルを部分空間ごとのセントロイド番号に変換
+
+        Args:
+            vectors: (件数, 次元数) の行列
+
+        Returns:
+            (件数, 部分空間数) の uint8 の行列
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        codes = np.empty((len(vectors), self.subspaces), dtype=np.uint8)
+        for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+            block = vectors[start : start + SCORE_BLOCK_ROWS]
+            for j, sub_vectors in enumerate(self._split(block)):
+                codes[start : start + len(block), j] = self._assign(
+                    sub_vectors, self.codebooks[j]
+                )
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """
+        符号をセントロイドを連結したベクトルに戻す
+
+        Args:
+            codes: encode の戻り値
+
+        Returns:
+            (件数, 次元数) の float32 の行列
+        """
+        parts = [self.codebooks[j][codes[:, j]] for j in range(self.subspaces)]
+        return np.concatenate(parts, axis=1)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        符号と float32 のクエリの内積を近似する（ADC）
+
+        部分空間ごとにセントロイドとクエリの内積の表を作り、
+        符号で引いた値の和をスコアとする。
+
+        Args:
+            codes: encode の戻り値
+            query: クエリベクトル
+
+        Returns:
+            (件数,) の float32 のスコア
+        """
+        query = np.asarray(query, dtype=np.float32)
+        # (部分空間数, セントロイド数) の内積の表
+        tables = np.einsum(
+            "jcd,jd->jc", self.codebooks, query.reshape(self.subspaces, -1)
+        )
+        # 部分空間 j の符号 c を平坦化した表の j * セントロイド数 + c で引く
+        flat_tables = tables.ravel()
+        offsets = np.arange(self.subspaces, dtype=np.intp) * tables.shape[1]
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = codes[start : start + SCORE_BLOCK_ROWS]
+            scores[start : start + len(block)] = flat_tables[block + offsets].sum(
+                axis=1
+            )
+        return scores
+
+    def save(self, file: str | IO[bytes]) -> None:
+        """パラメータを .npz に保存する"""
+        np.savez(file, kind=self.kind, codebooks=self.codebooks)
+
+    @classmethod
+    def from_arrays(cls, arrays: Any) -> "ProductQuantizer":
+        """save で保存した配列から復元する"""
+        codebooks = np.asarray(arrays["codebooks"], dtype=np.float32)
+        codec = cls(subspaces=codebooks.shape[0], centroids=codebooks.shape[1])
+        codec.codebooks = codebooks
+        return codec
+
+    def _split(self, vectors: np.ndarray) -> list[np.ndarray]:
+        """(件数, 次元数) を部分空間ごとの (件数, 部分空間の次元数) に分ける"""
+        return np.split(vectors, self.subspaces, axis=1)
+
+    def _kmeans(
+        self, vectors: np.ndarray, centroids: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        """k-meansでセントロイドを求める（空のクラスタは点を選び直す）"""
+        centers = vectors[rng.choice(len(vectors), centroids, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = self._assign(vectors, centers)
+            counts = np.bincount(labels, minlength=centroids)
+            sums = np.stack(
+                [
+                    np.bincount(labels, weights=column, minlength=centroids)
+                    for column in vectors.T
+                ],
+                axis=1,
+            ).astype(np.float32)
+            empty = counts == 0
+            centers[~empty] = sums[~empty] / counts[~empty, None]
+            if empty.any():
+                centers[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        return centers
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        """最も近いセントロイドの番号（||x-c||² の最小 = x・c - ||c||²/2 の最大）"""
+        half_norms = 0.5 * np.einsum("cd,cd->c", centers, centers)
+        return np.argmax(vectors @ centers.T - half_norms, axis=1)
+
+
+CODECS = {codec.kind: codec for codec in (ScalarQuantizer, ProductQuantizer)}
+
+
+def load_codec(file: str | IO[bytes]) -> ScalarQuantizer | ProductQuantizer:
+    """
+    save で保存したコーデックを読み込む
+
+    Args:
+        file: 保存したファイル
+
+    Returns:
+        コーデック
+    """
+    with np.load(file, allow_pickle=False) as arrays:
+        kind = str(arrays["kind"])
+        if kind not in CODECS:
+            raise ValueError(f"未対応の量子化方式です: {kind}")
+        return CODECS[kind].from_arrays(arrays)
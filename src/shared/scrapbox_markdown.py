@@ -0,0 +1,200 @@
+"""
+Scrapbox記法をMarkdownに変換するコンバーター
+
+行単位の1パスのトークナイザで、ブロック（code:/table:）の状態だけを持ち、
+行内の記法はコンパイル済みの1つの正規表現で置換する。
+"""
+
+import re
+
+# 行頭のインデント（スペース・タブ・全角スペース）
+_INDENT = re.compile(r"^[ \t　]*")
+# code:ファイル名 / table:テーブル名
+_BLOCK_START = re.compile(r"^(code|table):(.*)$")
+# 行内記法: `コード` / [[強調]] / [記法]
+_INLINE = re.compile(r"(`[^`]*`)|\[\[([^\[\]]+)\]\]|\[([^\[\]]*)\]")
+# [*** 見出し] のように行全体が強調記法のもの
+_HEADING = re.compile(r"^\[(\*+)\s+([^\[\]]*(?:\[[^\[\]]*\][^\[\]]*)*)\]$")
+_DECORATION = re.compile(r"^([*/\-_!#%{}<>~]+)\s+(.*)$")
+_URL = re.compile(r"^https?://\S+$")
+_IMAGE_EXT = re.compile(r"\.(?:png|jpe?g|gif|svg|webp)(?:\?.*)?$", re.IGNORECASE)
+
+_CODE_LANGUAGES = {
+    "py": "python",
+    "js": "javascript",
+    "ts": "typescript",
+    "sh": "bash",
+    "rb": "ruby",
+    "yml": "yaml",
+    "md": "markdown",
+}
+
+
+class ScrapboxMarkdownConverter:
+    """Scrapboxページの行をMarkdownに変換する"""
+
+    def __init__(self, project: str):
+        """
+        初期化
+
+        Args:
+            project: 内部リンクのURLに使うScrapboxプロジェクト名
+        """
+        self.project = project
+        self.page_base_url = f"https://scrapbox.io/{_page_path(project)}/"
+
+    def convert_page(self, title: str, lines: list[str]) -> str:
+        """ページをMarkdownに変換する
+
+        Args:
+            title: ページタイトル
+            lines: ページの各行のテキスト（先頭行はタイトル）
+
+        Returns:
+            Markdown文字列
+        """
+        body = lines[1:] if lines and lines[0] == title else lines
+        converted = self.convert_lines(body)
+        return f"# {title}\n\n{converted}" if converted else f"# {title}\n"
+
+    def convert_lines(self, lines: list[str]) -> str:
+        """行のリストをMarkdownに変換する"""
+        out: list[str] = []
+        # 現在のブロック: None / ("code", インデント幅) / ("table", インデント幅)
+        block: tuple[str, int] | None = None
+        table_rows = 0
+
+        for line in lines:
+            indent = _INDENT.match(line).end()
+            text = line[indent:]
+
+            if block is not None:
+                kind, block_indent = block
+                if indent > block_indent and (text or kind == "code"):
+                    if kind == "code":
+                        out.append(line[block_indent + 1 :])
+                    else:
+                        cells = [self._inline(cell) for cell in text.split("\t")]
+                        out.append("| " + " | ".join(cells) + " |")
+                        if table_rows == 0:
+                            out.append("|" + " --- |" * len(cells))
+                        table_rows += 1
+                    continue
+
+                # ブロックの終了（空行で終わる場合は空行を重ねない）
+                if kind == "code":
+                    out.append("```")
+                if text:
+                    out.append("")
+                block = None
+
+            block_match = _BLOCK_START.match(text)
+            if block_match:
+                kind, name = block_match.groups()
+                block = (kind, indent)
+                if kind == "code":
+                    extension = name.rsplit(".", 1)[-1].strip().lower()
+                    out.append("```" + _CODE_LANGUAGES.get(extension, extension))
+                else:
+                    out.append(f"**{name.strip()}**")
+                    out.append("")
+                    table_rows = 0
+                continue
+
+            if not text:
+                out.append("")
+                continue
+
+            heading = _HEADING.match(text) if indent == 0 else None
+            if heading:
+                level = max(1, 5 - len(heading.group(1)))
+                out.append("#" * level + " " + self._inline(heading.group(2)))
+                continue
+
+            converted = self._inline(text)
+            if indent:
+                out.append("  " * (indent - 1) + "- " + converted)
+            else:
+                out.append(converted)
+
+        if block is not None and block[0] == "code":
+            out.append("```")
+
+        return "\n".join(out).strip("\n") + "\n" if out else ""
+
+    def _inline(self, text: str) -> str:
+        """行内の記法を変換する"""
+        if "[" not in text:
+            return text
+        return _INLINE.sub(self._replace_inline, text)
+
+    def _replace_inline(self, match: re.Match) -> str:
+        code, strong, bracket = match.groups()
+        if code is not None:
+            return code
+        if strong is not None:
+            return f"**{strong}**"
+        return self._bracket(bracket)
+
+    def _bracket(self, content: str) -> str:
+        """[...] 記法を変換する"""
+        if not content:
+            return "[]"
+
+        # [$ 数式]
+        if content.startswith("$ "):
+            return f"${content[2:]}$"
+
+        # [* 強調] [/ 斜体] [- 打ち消し] などの文字装飾
+        decoration = _DECORATION.match(content)
+        if decoration:
+            marks, inner = decoration.groups()
+            if "-" in marks:
+                return f"~~{inner}~~"
+            if "/" in marks:
+                return f"*{inner}*"
+            return f"**{inner}**"
+
+        # [URL] [URL タイトル] [タイトル URL]
+        first, _, rest = content.partition(" ")
+        if _URL.match(first):
+            if not rest:
+                if _IMAGE_EXT.search(first):
+                    return f"![]({first})"
+                return f"<{first}>"
+            return f"[{rest}]({first})"
+        head, _, last = content.rpartition(" ")
+        if head and _URL.match(last):
+            return f"[{head}]({last})"
+
+        # [ユーザー.icon]
+        if content.endswith(".icon"):
+            return content[: -len(".icon")]
+
+        # [ページ名] / [/project/ページ名]
+        if content.startswith("/"):
+            return f"[{content}](https://scrapbox.io{_page_path(content)})"
+        return f"[{content}]({self.page_base_url}{_page_path(content)})"
+
+
+def _page_path(name: str) -> str:
+    """ページ名をURLのパスに変換する
+
+    埋め込み対象のテキストを読みやすく保つため日本語はエンコードせず、
+    Markdownのリンクを壊す文字だけを置き換える。
+    """
+    return name.replace(" ", "_").replace("(", "%28").replace(")", "%29")
+
+
+def to_markdown(project: str, title: str, lines: list[str]) -> str:
+    """Scrapboxページの行をMarkdownに変換する
+
+    Args:
+        project: Scrapboxプロジェクト名
+        title: ページタイトル
+        lines: ページの各行のテキスト
+
+    Returns:
+        Markdown文字列
+    """
+    return ScrapboxMarkdownConverter(project).convert_page(title, lines)
@@ -0,0 +1,129 @@
+"""
+非同期のRAGPortによる検索のファンアウトのベンチマーク
+
+1リクエストで8件の検索を行うリクエストを20件同時に処理し、
+検索1回に50msの遅延を入れたフェイクで、全体の時間と最大スレッド数を比べる。
+
+- 同期・直列: リクエストごとに1スレッドで8件を順に検索
+- 同期・スレッド: 検索ごとに1スレッド
+- 非同期（ネイティブ）: asyncio.sleep で待つフェイクを asearch_many で検索
+- 非同期（Bedrock）: BedrockKBAdapter.asearch（接続数と同じ大きさの共有スレッドプール）
+
+    python tests/benchmarks/bench_async_rag.py
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from application.ports.rag_port import RAGPort  # noqa: E402
+from application.usecases.search_knowledge import SearchKnowledgeUseCase  # noqa: E402
+from infrastructure.adapters.bedrock_kb_adapter import BedrockKBAdapter  # noqa: E402
+
+LATENCY = 0.05
+REQUESTS = 20
+FAN_OUT = 8
+
+
+class FakeRAG(RAGPort):
+    def search(self, query, top_k=5):
+        time.sleep(LATENCY)
+        return [{"id": query}]
+
+    async def asearch(self, query, top_k=5):
+        await asyncio.sleep(LATENCY)
+        return [{"id": query}]
+
+    def search_and_generate(self, query, top_k=5):
+        return {}
+
+    def get_status(self):
+        return {}
+
+
+class FakeRuntime:
+    def retrieve(self, **kwargs):
+        time.sleep(LATENCY)
+        return {"retrievalResults": [{"content": {"text": "text"}}]}
+
+
+class PeakThreads:
+    """計測中の最大スレッド数を記録する"""
+
+    def __enter__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch)
+        self._thread.start()
+        return self
+
+    def _watch(self):
+        while not self._stop.wait(0.002):
+            self.peak = max(self.peak, threading.active_count() - 1)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def queries(request: int) -> list[str]:
+    return [f"request-{request} query-{i}" for i in range(FAN_OUT)]
+
+
+def sync_serial(use_case: SearchKnowledgeUseCase) -> None:
+    def handle(request):
+        for query in queries(request):
+            use_case.search_documents(query)
+
+    with ThreadPoolExecutor(max_workers=REQUESTS) as executor:
+        list(executor.map(handle, range(REQUESTS)))
+
+
+def sync_threads(use_case: SearchKnowledgeUseCase) -> None:
+    all_queries = [q for request in range(REQUESTS) for q in queries(request)]
+    with ThreadPoolExecutor(max_workers=len(all_queries)) as executor:
+        list(executor.map(use_case.search_documents, all_queries))
+
+
+async def async_fan_out(use_case: SearchKnowledgeUseCase) -> None:
+    await asyncio.gather(
+        *(use_case.asearch_many(queries(request)) for request in range(REQUESTS))
+    )
+
+
+def run(label: str, func) -> None:
+    with PeakThreads() as threads:
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+    print(f"{label:<34} {elapsed * 1000:8.1f} ms  peak threads {threads.peak:4d}")
+
+
+def main() -> None:
+    print(
+        f"{REQUESTS} requests x {FAN_OUT} retrievals, "
+        f"{LATENCY * 1000:.0f} ms per retrieval"
+    )
+    use_case = SearchKnowledgeUseCase(FakeRAG())
+    run("sync, serial per request", lambda: sync_serial(use_case))
+    run("sync, thread per retrieval", lambda: sync_threads(use_case))
+    run("async, native fake", lambda: asyncio.run(async_fan_out(use_case)))
+
+    # None は CONFIG.bedrock_max_concurrency の既定値
+    for max_concurrency in (None, 64):
+        adapter = BedrockKBAdapter("kb", max_concurrency=max_concurrency)
+        adapter.bedrock_agent_runtime = FakeRuntime()
+        bedrock = SearchKnowledgeUseCase(adapter)
+        run(
+            f"async, Bedrock (max_concurrency={adapter.max_concurrency})",
+            lambda use_case=bedrock: asyncio.run(async_fan_out(use_case)),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+BedrockEmbeddingsClientのスループットのベンチマーク
+
+invoke_model を一定のレイテンシで応答するスタブに置き換え、
+バッチサイズと並行数の組み合わせごとに1秒あたりのベクトル数を測る
+（Titanは1テキスト/呼び出しのため、並行数のみを変える）。
+
+    python tests/benchmarks/bench_bedrock_embeddings.py [テキスト数] [レイテンシ(ms)]
+"""
+
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from core.clients.embeddings import BedrockEmbeddingsClient  # noqa: E402
+
+DIMENSION = 1024
+
+
+class LatencyStub:
+    """固定のレイテンシ（＋テキスト数に比例する処理時間）で応答するスタブ"""
+
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    def invoke_model(self, modelId, body, contentType, accept):
+        request = json.loads(body)
+        texts = request.get("texts") or [request["inputText"]]
+        time.sleep(self.latency_seconds + 0.001 * len(texts))
+        vectors = [[0.1] * DIMENSION for _ in texts]
+        if "texts" in request:
+            payload = {"embeddings": vectors}
+        else:
+            payload = {"embedding": vectors[0]}
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+    texts = [f"ベンチマーク用のテキスト {i}" for i in range(count)]
+
+    models = {
+        "amazon.titan-embed-text-v2:0": (1,),
+        "cohere.embed-multilingual-v3": (1, 10, 50),
+    }
+    for model_id, batch_sizes in models.items():
+        print(model_id)
+        for batch_size in batch_sizes:
+            for concurrency in (1, 4, 16):
+                client = BedrockEmbeddingsClient(
+                    model_id=model_id,
+                    dimension=DIMENSION,
+                    client=LatencyStub(latency),
+                    batch_size=batch_size,
+                    max_concurrency=concurrency,
+                    timeout_seconds=30,
+                )
+                started = time.perf_counter()
+                client.embed_batch(texts)
+                elapsed = time.perf_counter() - started
+                stats = client.get_invocation_stats()
+                print(
+                    f"  batch={batch_size:>3} concurrency={concurrency:>3}: "
+                    f"{count / elapsed:>8,.0f} texts/sec "
+                    f"({stats['invocations']} invocations)"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
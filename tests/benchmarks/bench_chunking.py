@@ -0,0 +1,52 @@
+"""
+チャンク分割のベンチマーク
+
+ページサイズを倍々に増やして分割時間を測り、1行あたりの時間が
+ページサイズによらずほぼ一定（線形）であることを確認する。
+
+    python tests/benchmarks/bench_chunking.py [最大行数]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from shared.chunking import ScrapboxChunker  # noqa: E402
+
+
+def make_lines(line_count: int) -> list[str]:
+    """見出し・インデント・コードブロックを含む合成ページの行を作る"""
+    lines = ["タイトル"]
+    while len(lines) < line_count:
+        i = len(lines)
+        lines.append(f"[** 節{i}]")
+        lines.append(f"本文{i}では[関連ページ]と https://example.com/{i} を参照する")
+        lines.extend(
+            f" 箇条書き{i}-{j} 日本語とEnglishの混在テキスト" for j in range(5)
+        )
+        lines.extend([f"code:example{i}.py", " def f():", "     return 1", ""])
+    return lines[:line_count]
+
+
+def main() -> int:
+    max_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    chunker = ScrapboxChunker("benchmark", target_tokens=512, overlap_tokens=64)
+
+    line_count = 1_000
+    while line_count <= max_lines:
+        lines = make_lines(line_count)
+        started = time.perf_counter()
+        chunks = chunker.chunk_page("タイトル", lines)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{line_count:>7} lines -> {len(chunks):>5} chunks in {elapsed:.4f}s "
+            f"({elapsed / line_count * 1e6:.2f} us/line)"
+        )
+        line_count *= 10
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+ダミーEmbeddingsClientのスループットのベンチマーク
+
+embed_text を1件ずつ呼ぶ場合と embed_batch で行列をまとめて生成する場合の
+1秒あたりのベクトル数を比較する。
+
+    python tests/benchmarks/bench_embeddings.py [テキスト数] [次元数]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from core.clients.embeddings import EmbeddingsClient  # noqa: E402
+
+
+def measure(label: str, func, count: int) -> None:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {elapsed:.3f}s  {count / elapsed:>10,.0f} vectors/sec")
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    dimension = int(sys.argv[2]) if len(sys.argv) > 2 else 1536
+    client = EmbeddingsClient(dimension=dimension)
+    texts = [f"ベンチマーク用のテキスト {i}" for i in range(count)]
+
+    measure("embed_text (loop)", lambda: [client.embed_text(t) for t in texts], count)
+    measure("embed_batch (matrix)", lambda: client.embed_batch(texts), count)
+    measure("embed_batch_as_lists", lambda: client.embed_batch_as_lists(texts), count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
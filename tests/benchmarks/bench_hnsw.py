@@ -0,0 +1,97 @@
+"""
+HNSWインデックスの recall@k とレイテンシのベンチマーク
+
+クラスタを持つランダムなベクトルでインデックスを作成し、同じデータに
+対する全件探索（LocalVectorIndexAdapter と同じ内積 + argpartition）を
+正解として、ef_search ごとの recall@k と1クエリあたりのレイテンシを測る。
+
+    python tests/benchmarks/bench_hnsw.py [ベクトル数] [次元数] [M] [efConstruction]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from shared.hnsw import HNSWIndex  # noqa: E402
+
+QUERIES = 200
+TOP_K = 10
+
+
+def clustered_vectors(
+    rng: np.random.Generator, count: int, dimension: int
+) -> np.ndarray:
+    """実際の埋め込みに近い、クラスタを持つ正規化済みのベクトル"""
+    centers = rng.standard_normal((max(count // 100, 1), dimension), dtype=np.float32)
+    labels = rng.integers(len(centers), size=count)
+    vectors = centers[labels] + 0.5 * rng.standard_normal(
+        (count, dimension), dtype=np.float32
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = vectors @ query
+    candidates = np.argpartition(scores, len(scores) - k)[len(scores) - k :]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    dimension = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    m = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    ef_construction = int(sys.argv[4]) if len(sys.argv) > 4 else 100
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(rng, count, dimension)
+    queries = clustered_vectors(rng, QUERIES, dimension)
+
+    index = HNSWIndex(dimension, m=m, ef_construction=ef_construction)
+    started = time.perf_counter()
+    for vector in vectors:
+        index.add(vector)
+    elapsed = time.perf_counter() - started
+    print(
+        f"build {count:,} x {dimension} (M={m}, efConstruction={ef_construction}): "
+        f"{elapsed:.1f} s ({count / elapsed:,.0f} inserts/sec)"
+    )
+
+    truth = []
+    started = time.perf_counter()
+    for query in queries:
+        truth.append(set(exact_top_k(vectors, query, TOP_K).tolist()))
+    exact_ms = (time.perf_counter() - started) / QUERIES * 1000
+    print(f"exact search:           recall@{TOP_K} 1.000  {exact_ms:7.3f} ms/query")
+
+    for ef in (16, 32, 64, 128, 256):
+        hits = 0
+        started = time.perf_counter()
+        for query, expected in zip(queries, truth, strict=True):
+            found = index.search(query, TOP_K, ef=ef)
+            hits += len(expected & {node for node, _ in found})
+        latency_ms = (time.perf_counter() - started) / QUERIES * 1000
+        print(
+            f"hnsw ef_search={ef:>4}:    recall@{TOP_K} {hits / (QUERIES * TOP_K):.3f}"
+            f"  {latency_ms:7.3f} ms/query"
+        )
+
+    for node in range(0, count, 10):
+        index.delete(node)
+    hits = 0
+    for query in queries:
+        live = [i for i in exact_top_k(vectors, query, TOP_K * 2) if i % 10][:TOP_K]
+        found = index.search(query, TOP_K)
+        hits += len(set(live) & {node for node, _ in found})
+    print(
+        f"after 10% tombstones:   recall@{TOP_K} {hits / (QUERIES * TOP_K):.3f} "
+        f"(ef_search={index.ef_search})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+LocalVectorIndexAdapterの検索レイテンシのベンチマーク
+
+ランダムなベクトルでインデックスを作成し、argpartition による上位k件の
+選択と全件ソートの1クエリあたりのレイテンシ（p50/p99）を比較する。
+リモート検索の基準値としては、Knowledge Baseの retrieve の往復
+（数十〜数百ms）と比べる。
+
+    python tests/benchmarks/bench_local_vector_index.py [ベクトル数] [次元数]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from core.clients.embeddings import EmbeddingsClient  # noqa: E402
+from infrastructure.adapters.local_vector_index_adapter import (  # noqa: E402
+    LocalVectorIndexAdapter,
+    LocalVectorIndexBuilder,
+)
+from schema.vector import VectorData, VectorMetadata  # noqa: E402
+
+QUERIES = 200
+TOP_K = 10
+
+
+def percentiles(samples: list[float]) -> str:
+    p50, p99 = np.percentile(np.array(samples) * 1000, [50, 99])
+    return f"p50 {p50:7.3f} ms  p99 {p99:7.3f} ms"
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    dimension = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    rng = np.random.default_rng(0)
+    metadata = VectorMetadata(
+        source="scrapbox",
+        project_name="bench",
+        page_title="title",
+        page_id="id",
+        content_preview="preview",
+    )
+
+    builder = LocalVectorIndexBuilder()
+    matrix = rng.standard_normal((count, dimension), dtype=np.float32)
+    builder.upsert_batch(
+        VectorData(id=f"bench#{i}#0", values=matrix[i], metadata=metadata)
+        for i in range(count)
+    )
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        started = time.perf_counter()
+        builder.save(index_dir)
+        print(f"save {count:,} x {dimension}: {time.perf_counter() - started:.2f} s")
+
+        adapter = LocalVectorIndexAdapter(
+            index_dir, embeddings_client=EmbeddingsClient(dimension=dimension)
+        )
+        queries = rng.standard_normal((QUERIES, dimension), dtype=np.float32)
+        adapter.search_vector(queries[0], TOP_K)  # ページキャッシュに載せる
+
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            adapter.search_vector(query, TOP_K)
+            samples.append(time.perf_counter() - started)
+        print(f"argpartition top-{TOP_K}:  {percentiles(samples)}")
+
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            scores = adapter.vectors @ (query / np.linalg.norm(query))
+            np.argsort(-scores)[:TOP_K]
+            samples.append(time.perf_counter() - started)
+        print(f"full argsort top-{TOP_K}:  {percentiles(samples)}")
+
+        samples = []
+        for i in range(QUERIES):
+            started = time.perf_counter()
+            adapter.search(f"クエリ {i}", TOP_K)
+            samples.append(time.perf_counter() - started)
+        print(f"search (embed + top-k): {percentiles(samples)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
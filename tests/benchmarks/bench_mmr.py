@@ -0,0 +1,185 @@
+"""
+MMR（SearchPolicy.mmr_select）と MMRRerankingRAGAdapter のベンチマーク
+
+候補数 50 / 200 / 1,000 件（1024次元、top_k=10）で、1組ずつ
+EmbeddingsClient.compute_similarity を呼ぶMMR、n×n の類似度行列を
+先に作るMMR、選んだ候補の類似度だけを行列ベクトル積で求める
+SearchPolicy.mmr_select の1回あたりの時間を比べる。
+
+続けて、候補の本文のベクトル化を含む MMRRerankingRAGAdapter.search の
+1回あたりの時間を、キャッシュなしと CachedEmbeddingsClient ありで比べる。
+Embedding APIの応答時間は1呼び出し EMBED_CALL_MS + 1テキスト EMBED_TEXT_MS
+と仮定し、検索はよく参照されるページほど候補に現れやすいコーパスを模す。
+
+    python tests/benchmarks/bench_mmr.py
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from application.ports.rag_port import RAGPort  # noqa: E402
+from core.clients.embeddings import EmbeddingsClient  # noqa: E402
+from core.clients.embeddings_cache import CachedEmbeddingsClient  # noqa: E402
+from domain.policies.search_policy import SearchPolicy  # noqa: E402
+from infrastructure.adapters.mmr_rag_adapter import (  # noqa: E402
+    MMRRerankingRAGAdapter,
+)
+
+DIMENSION = 1024
+TOP_K = 10
+LAMBDA = 0.5
+OVER_FETCH = 4
+CORPUS_PAGES = 2000
+QUERIES = 50
+EMBED_CALL_MS = 30.0
+EMBED_TEXT_MS = 0.5
+
+
+class SlowEmbeddings(EmbeddingsClient):
+    """Embedding APIの応答時間を模したクライアント"""
+
+    def __init__(self):
+        super().__init__(model_id="bench-embeddings-v1", dimension=DIMENSION)
+        self.texts = 0
+
+    def embed_batch(self, texts, batch_size=None):
+        self.texts += len(texts)
+        time.sleep((EMBED_CALL_MS + EMBED_TEXT_MS * len(texts)) / 1000)
+        return super().embed_batch(texts, batch_size)
+
+
+class CorpusRAG(RAGPort):
+    """人気の偏ったコーパスから候補を返すRAGPort"""
+
+    def __init__(self, rng: np.random.Generator):
+        self.rng = rng
+        weights = 1.0 / np.arange(1, CORPUS_PAGES + 1)
+        self.weights = weights / weights.sum()
+
+    def search(self, query, top_k=5):
+        pages = self.rng.choice(CORPUS_PAGES, size=top_k, replace=False, p=self.weights)
+        return [
+            {
+                "id": f"page-{page}",
+                "content": f"ページ{page}の本文",
+                "score": 1 / (i + 1),
+            }
+            for i, page in enumerate(pages)
+        ]
+
+    def search_and_generate(self, query, top_k=5):
+        return {}
+
+    def get_status(self):
+        return {"status": "AVAILABLE"}
+
+
+def pairwise_mmr(vectors, relevance, top_k, lambda_mult, client):
+    selected = []
+    remaining = list(range(len(vectors)))
+    while remaining and len(selected) < top_k:
+
+        def marginal(i):
+            redundancy = max(
+                (client.compute_similarity(vectors[i], vectors[j]) for j in selected),
+                default=0.0,
+            )
+            return lambda_mult * relevance[i] - (1 - lambda_mult) * redundancy
+
+        best = max(remaining, key=marginal)
+        selected.append(best)
+        remaining.remove(best)
+    return selected
+
+
+def full_matrix_mmr(vectors, relevance, top_k, lambda_mult):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarity = normalized @ normalized.T
+    weighted = lambda_mult * relevance
+    selected = [int(np.argmax(weighted))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(len(vectors), dtype=bool)
+    available[selected[0]] = False
+    for _ in range(top_k - 1):
+        marginal = weighted - (1 - lambda_mult) * max_similarity
+        marginal[~available] = -np.inf
+        chosen = int(np.argmax(marginal))
+        selected.append(chosen)
+        available[chosen] = False
+        np.maximum(max_similarity, similarity[chosen], out=max_similarity)
+    return selected
+
+
+def measure(func, args: tuple, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def end_to_end(embeddings: EmbeddingsClient) -> tuple[float, float]:
+    """QUERIES 件の検索の1回あたりの時間（平均, 中央値）をミリ秒で返す"""
+    adapter = MMRRerankingRAGAdapter(
+        CorpusRAG(np.random.default_rng(1)),
+        embeddings,
+        lambda_mult=LAMBDA,
+        over_fetch=OVER_FETCH,
+    )
+    timings = []
+    for i in range(QUERIES):
+        started = time.perf_counter()
+        adapter.search(f"クエリ{i}", TOP_K)
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.mean(timings)), float(np.median(timings))
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    client = EmbeddingsClient(dimension=DIMENSION)
+    rng = np.random.default_rng(0)
+    for count in (50, 200, 1000):
+        vectors = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+        relevance = rng.random(count).astype(np.float32)
+
+        expected = pairwise_mmr(vectors, relevance, TOP_K, LAMBDA, client)
+        assert full_matrix_mmr(vectors, relevance, TOP_K, LAMBDA) == expected
+        assert SearchPolicy.mmr_select(vectors, relevance, TOP_K, LAMBDA) == expected
+
+        args = (vectors, relevance, TOP_K, LAMBDA)
+        pairwise = measure(pairwise_mmr, (*args, client), 3)
+        full = measure(full_matrix_mmr, args, 20)
+        rows = measure(SearchPolicy.mmr_select, args, 20)
+        print(
+            f"{count:>5,} candidates: pairwise {pairwise:9.2f} ms  "
+            f"n×n matrix {full:7.2f} ms  mmr_select {rows:6.2f} ms"
+        )
+
+    candidates = TOP_K * OVER_FETCH
+    print(
+        f"\nMMRRerankingRAGAdapter.search, {QUERIES} queries x {candidates} candidates "
+        f"(embedding {EMBED_CALL_MS:.0f} ms/call + {EMBED_TEXT_MS} ms/text):"
+    )
+    uncached = SlowEmbeddings()
+    mean, median = end_to_end(uncached)
+    print(
+        f"  uncached  mean {mean:7.2f} ms  median {median:7.2f} ms  "
+        f"embedded {uncached.texts:,} texts"
+    )
+    inner = SlowEmbeddings()
+    mean, median = end_to_end(CachedEmbeddingsClient(inner, max_entries=10000))
+    print(
+        f"  cached    mean {mean:7.2f} ms  median {median:7.2f} ms  "
+        f"embedded {inner.texts:,} texts"
+    )
+
+
+if __name__ == "__main__":
+    main()
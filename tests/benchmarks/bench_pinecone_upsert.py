@@ -0,0 +1,77 @@
+"""
+PineConeClientの一括upsertのベンチマーク
+
+リクエストごとに一定のレイテンシで応答するインメモリのIndexに対して、
+1件ずつの upsert_one と upsert_arrays の1秒あたりのベクトル数を比較する。
+
+    python tests/benchmarks/bench_pinecone_upsert.py [ベクトル数] [レイテンシ(ms)]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from core.clients.pinecone import PineConeClient  # noqa: E402
+from schema.vector import VectorMetadata  # noqa: E402
+
+DIMENSION = 1536
+
+
+class LatencyIndex:
+    """リクエストごとに固定のレイテンシで応答するIndex"""
+
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    def upsert(self, vectors, namespace=None):
+        time.sleep(self.latency_seconds)
+        return {"upserted_count": len(vectors)}
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 50.0) / 1000
+
+    values = np.random.default_rng(0).standard_normal(
+        (count, DIMENSION), dtype=np.float32
+    )
+    ids = [f"bench#page-{i}#0" for i in range(count)]
+    metadata = [
+        VectorMetadata(
+            source="scrapbox",
+            project_name="bench",
+            page_title=f"page-{i}",
+            page_id=str(i),
+            content_preview="ベンチマーク用のプレビュー" * 10,
+        )
+        for i in range(count)
+    ]
+
+    sample = min(count, 200)
+    client = PineConeClient(index=LatencyIndex(latency))
+    started = time.perf_counter()
+    for i in range(sample):
+        client.upsert_one(ids[i], values[i], metadata[i])
+    elapsed = time.perf_counter() - started
+    print(f"upsert_one (first {sample}):  {sample / elapsed:>8,.0f} vectors/sec")
+
+    for workers in (1, 4, 8, 16):
+        client = PineConeClient(
+            index=LatencyIndex(latency), batch_size=100, max_workers=workers
+        )
+        started = time.perf_counter()
+        result = client.upsert_arrays(ids, values, metadata)
+        elapsed = time.perf_counter() - started
+        print(
+            f"upsert_arrays workers={workers:>2}: {count / elapsed:>8,.0f} vectors/sec "
+            f"({result['request_count']} requests)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
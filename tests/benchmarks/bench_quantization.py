@@ -0,0 +1,126 @@
+"""
+ベクトル量子化のメモリ使用量と recall@k のベンチマーク
+
+クラスタを持つランダムなベクトルを float32 / int8 / PQ で保持し、
+float32 の全件探索を正解として、ADCのみと float32 での再スコアありの
+recall@k、1クエリあたりのレイテンシ、1ベクトルあたりのバイト数を比べる。
+ディスク上のサイズは、符号のみ（ADCのみ）と float32 のベクトルも
+保存する場合（再スコアあり）を LocalVectorIndexBuilder と同じ形式で測る。
+
+    python tests/benchmarks/bench_quantization.py [ベクトル数] [次元数]
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from shared.quantization import ProductQuantizer, ScalarQuantizer  # noqa: E402
+
+QUERIES = 100
+TOP_K = 10
+RERANK_CANDIDATES = 100
+LATENT_DIMENSION = 128
+
+
+def embedding_like_vectors(
+    rng: np.random.Generator, projection: np.ndarray, count: int
+) -> np.ndarray:
+    """実際の埋め込みに近い、低次元の構造を持つ正規化済みのベクトル
+
+    潜在空間のクラスタを高次元に射影し、小さな等方的なノイズを加える。
+    """
+    latent_dimension, dimension = projection.shape
+    centers = rng.standard_normal((64, latent_dimension), dtype=np.float32)
+    latent = centers[rng.integers(len(centers), size=count)] + 0.7 * (
+        rng.standard_normal((count, latent_dimension), dtype=np.float32)
+    )
+    vectors = latent @ projection + 0.02 * rng.standard_normal(
+        (count, dimension), dtype=np.float32
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def saved_bytes(path: Path, array: np.ndarray) -> int:
+    """配列を .npy に保存し、ディスク上のサイズを返す"""
+    np.save(path, array, allow_pickle=False)
+    return path.stat().st_size
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    candidates = np.argpartition(scores, len(scores) - k)[len(scores) - k :]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    dimension = int(sys.argv[2]) if len(sys.argv) > 2 else 1536
+    rng = np.random.default_rng(0)
+    projection = rng.standard_normal((LATENT_DIMENSION, dimension), dtype=np.float32)
+    projection /= np.sqrt(LATENT_DIMENSION)
+    vectors = embedding_like_vectors(rng, projection, count)
+    queries = embedding_like_vectors(rng, projection, QUERIES)
+    truth = [set(top_k(vectors @ q, TOP_K).tolist()) for q in queries]
+
+    float32_bytes = vectors.nbytes
+    directory = Path(tempfile.mkdtemp(prefix="bench-quantization-"))
+    vectors_disk = saved_bytes(directory / "vectors.npy", vectors)
+    print(
+        f"{count:,} x {dimension}: float32 {float32_bytes / 2**20:,.1f} MiB "
+        f"(disk {vectors_disk / 2**20:,.1f} MiB)"
+    )
+
+    codecs = [
+        ("int8", ScalarQuantizer()),
+        ("pq m=192", ProductQuantizer(subspaces=192)),
+        ("pq m=96", ProductQuantizer(subspaces=96)),
+    ]
+    for name, codec in codecs:
+        started = time.perf_counter()
+        codes = codec.fit(vectors).encode(vectors)
+        build = time.perf_counter() - started
+        codec.save(str(directory / "codec.npz"))
+        codes_disk = saved_bytes(directory / "codes.npy", codes)
+        codes_disk += (directory / "codec.npz").stat().st_size
+        print(
+            f"{name:<9} {codes.nbytes / 2**20:8,.1f} MiB "
+            f"({codec.code_bytes} B/vector, "
+            f"{float32_bytes / codes.nbytes:.0f}x smaller, encode {build:.1f} s)"
+        )
+        print(
+            f"  disk      ADC only {codes_disk / 2**20:,.1f} MiB, "
+            f"with rerank {(codes_disk + vectors_disk) / 2**20:,.1f} MiB"
+        )
+        for rerank in (0, RERANK_CANDIDATES):
+            hits = 0
+            started = time.perf_counter()
+            for query, expected in zip(queries, truth, strict=True):
+                candidates = top_k(codec.scores(codes, query), max(TOP_K, rerank))
+                if rerank:
+                    exact = vectors[candidates] @ query
+                    candidates = candidates[np.argsort(-exact)[:TOP_K]]
+                hits += len(expected & set(candidates[:TOP_K].tolist()))
+            latency_ms = (time.perf_counter() - started) / QUERIES * 1000
+            label = f"rerank {rerank}" if rerank else "ADC only"
+            print(
+                f"  {label:<11} recall@{TOP_K} {hits / (QUERIES * TOP_K):.3f}"
+                f"  {latency_ms:7.2f} ms/query"
+            )
+
+    started = time.perf_counter()
+    for query in queries:
+        top_k(vectors @ query, TOP_K)
+    latency_ms = (time.perf_counter() - started) / QUERIES * 1000
+    print(f"float32   exact recall@{TOP_K} 1.000  {latency_ms:7.2f} ms/query")
+
+    shutil.rmtree(directory)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
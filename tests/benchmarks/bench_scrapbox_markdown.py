@@ -0,0 +1,61 @@
+"""
+Scrapbox→Markdown変換のベンチマーク
+
+合成した10,000ページを変換し、1秒あたりの変換ページ数を表示する。
+
+    python tests/benchmarks/bench_scrapbox_markdown.py [ページ数] [最低pages/sec]
+
+最低pages/secを指定した場合、下回ると終了コード1で終了する。
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from shared.scrapbox_markdown import ScrapboxMarkdownConverter  # noqa: E402
+
+
+def make_page(i: int) -> tuple[str, list[str]]:
+    """典型的な記法を含む合成ページを作る"""
+    title = f"ページ{i}"
+    lines = [title, "[** 概要]"]
+    for j in range(10):
+        lines.append(
+            f"本文{j}は[関連{j}]と[https://example.com/{j} 外部リンク]を参照する"
+        )
+        lines.append(f" 箇条書き{j} [[強調]] [/ 斜体] `code{j}`")
+        lines.append(f"  入れ子{j} [user.icon]")
+    lines.extend(["code:example.py", " def f():", "     return 1", ""])
+    lines.extend(["table:表", " 名前\t値", " a\t1", " b\t2", "", "以上"])
+    return title, lines
+
+
+def main() -> int:
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    pages = [make_page(i) for i in range(page_count)]
+    line_count = sum(len(lines) for _, lines in pages)
+    converter = ScrapboxMarkdownConverter("benchmark")
+
+    started = time.perf_counter()
+    for title, lines in pages:
+        converter.convert_page(title, lines)
+    elapsed = time.perf_counter() - started
+
+    pages_per_sec = page_count / elapsed
+    print(
+        f"{page_count} pages ({line_count} lines) in {elapsed:.3f}s: "
+        f"{pages_per_sec:,.0f} pages/sec, {line_count / elapsed:,.0f} lines/sec"
+    )
+
+    if budget is not None and pages_per_sec < budget:
+        print(f"FAILED: below budget of {budget:,.0f} pages/sec")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
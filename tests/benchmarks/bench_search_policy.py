@@ -0,0 +1,73 @@
+"""
+SearchPolicy.apply_search_policies のベンチマーク
+
+候補数 10 / 1,000 / 100,000 件で、全件を返す場合と top_k=10 の場合の
+1回あたりの時間を比べる。
+
+    python tests/benchmarks/bench_search_policy.py
+"""
+
+import copy
+import gc
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from domain.policies.search_policy import SearchPolicy  # noqa: E402
+
+
+def candidates(count: int) -> list[dict]:
+    rng = random.Random(0)
+    now = datetime.utcnow().timestamp()
+    results = []
+    for i in range(count):
+        updated_at = now - rng.uniform(0, 365 * 86400)
+        results.append(
+            {
+                "id": f"s3://bucket/scrapbox/proj/page-{rng.randrange(count)}.md",
+                "score": rng.random(),
+                "content": f"ページ{i}の本文",
+                "metadata": {
+                    "updated_at": (
+                        updated_at
+                        if i % 2
+                        else datetime.fromtimestamp(updated_at).isoformat()
+                    )
+                },
+                "location": {},
+            }
+        )
+    return results
+
+
+def measure(func, results: list[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        data = copy.copy(results)
+        gc.collect()
+        started = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> int:
+    for count in (10, 1_000, 100_000):
+        results = candidates(count)
+        repeat = 200 if count <= 1_000 else 5
+        full = measure(SearchPolicy.apply_search_policies, results, repeat)
+        top_k = measure(
+            lambda data: SearchPolicy.apply_search_policies(data, top_k=10),
+            results,
+            repeat,
+        )
+        print(f"{count:>7,} candidates: all {full:9.3f} ms  top_k=10 {top_k:9.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+VectorDataの1ベクトルあたりのメモリ使用量のベンチマーク
+
+floatのリストで値を持つ従来の表現と、float32の配列をそのまま持つ
+現在の表現で、VectorDataを生成したときの確保量を tracemalloc で測る。
+
+    python tests/benchmarks/bench_vector_memory.py [ベクトル数] [次元数]
+"""
+
+import sys
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from pydantic import BaseModel
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src"))
+
+from schema.vector import VectorData, VectorMetadata  # noqa: E402
+
+
+class ListVectorData(BaseModel):
+    """従来の表現（値をfloatのリストで持つ）"""
+
+    id: str
+    values: list[float]
+    metadata: VectorMetadata
+
+
+def measure(label: str, build, count: int) -> None:
+    tracemalloc.start()
+    vectors = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<28} {current / count / 1024:>8.1f} KiB/vector "
+        f"(peak {peak / count / 1024:.1f} KiB/vector)"
+    )
+    del vectors
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    dimension = int(sys.argv[2]) if len(sys.argv) > 2 else 1536
+    matrix = np.random.default_rng(0).standard_normal(
+        (count, dimension), dtype=np.float32
+    )
+    metadata = VectorMetadata(
+        source="scrapbox",
+        project_name="bench",
+        page_title="title",
+        page_id="id",
+        content_preview="preview",
+    )
+
+    measure(
+        "list[float] (tolist)",
+        lambda: [
+            ListVectorData(id=str(i), values=matrix[i].tolist(), metadata=metadata)
+            for i in range(count)
+        ],
+        count,
+    )
+    measure(
+        "float32 (row copy)",
+        lambda: [
+            VectorData(id=str(i), values=matrix[i].copy(), metadata=metadata)
+            for i in range(count)
+        ],
+        count,
+    )
+    measure(
+        "float32 (row view)",
+        lambda: [
+            VectorData(id=str(i), values=matrix[i], metadata=metadata)
+            for i in range(count)
+        ],
+        count,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
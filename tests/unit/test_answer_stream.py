@@ -0,0 +1,101 @@
+"""
+回答のストリーミングのテスト
+"""
+
+import json
+import time
+
+from application.ports.rag_port import RAGPort
+from application.usecases.search_knowledge import SearchKnowledgeUseCase
+from infrastructure.adapters.bedrock_kb_adapter import BedrockKBAdapter
+from shared.json_stream import iter_ndjson
+
+
+class _FakeStreamingRuntime:
+    """retrieve_and_generate_stream の出力イベントを遅延つきで返すフェイク"""
+
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.requests = []
+
+    def retrieve_and_generate_stream(self, **kwargs):
+        self.requests.append(kwargs)
+        return {"sessionId": "session-1", "stream": self._events()}
+
+    def _events(self):
+        for chunk in self.chunks:
+            time.sleep(self.delay)
+            yield {"output": {"text": chunk}}
+        yield {
+            "citation": {
+                "generatedResponsePart": {
+                    "textResponsePart": {"text": "".join(self.chunks)}
+                },
+                "retrievedReferences": [
+                    {
+                        "content": {"text": "Lambdaのページ"},
+                        "location": {"type": "S3"},
+                        "metadata": {"x-amz-bedrock-kb-source-uri": "s3://b/k.md"},
+                    }
+                ],
+            }
+        }
+
+
+def test_bedrock_stream_yields_chunks_citations_and_metrics():
+    """テキストを届いた順に返し、最初のテキストまでの時間を計測する"""
+    adapter = BedrockKBAdapter("kb")
+    runtime = _FakeStreamingRuntime(["Lambda", "は", "サーバーレス"], delay=0.02)
+    adapter.bedrock_agent_runtime = runtime
+    use_case = SearchKnowledgeUseCase(adapter)
+
+    events = list(use_case.search_and_answer_stream("Lambdaとは", top_k=3))
+
+    assert [e["type"] for e in events] == ["text"] * 3 + ["citation", "done"]
+    assert "".join(e["text"] for e in events if e["type"] == "text") == (
+        "Lambdaはサーバーレス"
+    )
+    assert events[3]["citation"]["content"] == "Lambdaのページ"
+    done = events[-1]
+    assert done["session_id"] == "session-1"
+    assert done["metadata"]["top_k"] == 3
+    configuration = runtime.requests[0]["retrieveAndGenerateConfiguration"]
+    assert configuration["knowledgeBaseConfiguration"]["knowledgeBaseId"] == "kb"
+    metrics = done["metrics"]
+    assert 15 <= metrics["time_to_first_token_ms"] < metrics["total_ms"]
+
+    lines = list(iter_ndjson(events))
+    assert all(line.endswith(b"\n") for line in lines)
+    assert json.loads(lines[0]) == {"type": "text", "text": "Lambda"}
+
+
+def test_non_streaming_port_and_errors():
+    """ストリーミングしない実装は回答全体を1つのテキストで返し、失敗は error で返す"""
+
+    class FakeRAG(RAGPort):
+        def search(self, query, top_k=5):
+            return []
+
+        def search_and_generate(self, query, top_k=5):
+            if query == "fail":
+                raise RuntimeError("throttled")
+            return {
+                "answer": "回答",
+                "citations": [{"content": "c"}],
+                "session_id": "s",
+            }
+
+        def get_status(self):
+            return {}
+
+    use_case = SearchKnowledgeUseCase(FakeRAG())
+
+    events = list(use_case.search_and_answer_stream("質問"))
+    assert [e["type"] for e in events] == ["text", "citation", "done"]
+    assert events[-1]["session_id"] == "s"
+
+    assert list(use_case.search_and_answer_stream("fail")) == [
+        {"type": "error", "query": "fail", "error": "throttled"}
+    ]
+    assert list(use_case.search_and_answer_stream(" "))[0]["type"] == "error"
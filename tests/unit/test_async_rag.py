@@ -0,0 +1,98 @@
+"""
+非同期のRAGPortと検索のファンアウトのテスト
+"""
+
+import asyncio
+import threading
+import time
+
+from application.ports.rag_port import RAGPort
+from application.usecases.search_knowledge import SearchKnowledgeUseCase
+from infrastructure.adapters.bedrock_kb_adapter import BedrockKBAdapter
+from infrastructure.adapters.query_cache import InMemoryQueryCache
+
+
+class _SyncRAG(RAGPort):
+    def search(self, query, top_k=5):
+        return [{"id": query}]
+
+    def search_and_generate(self, query, top_k=5):
+        return {"answer": query}
+
+    def get_status(self):
+        return {"status": "AVAILABLE"}
+
+
+class _AsyncRAG(_SyncRAG):
+    """遅延を入れてイベントループ上で検索するRAGPort"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    async def asearch(self, query, top_k=5):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return [{"id": f"{query}-{i}"} for i in range(top_k)]
+
+
+def test_sync_port_gets_async_methods_by_default():
+    """同期の実装もスレッド経由で非同期メソッドを使える"""
+    rag = _SyncRAG()
+
+    assert asyncio.run(rag.asearch("q")) == [{"id": "q"}]
+    assert asyncio.run(rag.asearch_and_generate("q")) == {"answer": "q"}
+    assert asyncio.run(rag.aget_status()) == {"status": "AVAILABLE"}
+
+
+def test_asearch_many_fans_out_concurrently():
+    """複数クエリを並行に検索し、入力順に結果を返す（失敗は個別に返す）"""
+    rag = _AsyncRAG(latency=0.05)
+    use_case = SearchKnowledgeUseCase(rag, query_cache=InMemoryQueryCache())
+    queries = [f"q{i}" for i in range(8)] + [" ", "q0"]
+
+    started = time.perf_counter()
+    results = asyncio.run(use_case.asearch_many(queries, top_k=2))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.3
+    assert [r["status"] for r in results] == ["success"] * 8 + ["error", "success"]
+    assert results[3]["results"] == [{"id": "q3-0"}, {"id": "q3-1"}]
+
+    # 2回目はキャッシュから返す
+    again = asyncio.run(use_case.asearch_documents("Q0", top_k=2))
+    assert again["results"] == [{"id": "q0-0"}, {"id": "q0-1"}]
+    assert rag.calls == 9
+    assert use_case.get_cache_stats()["hits"] == 1
+
+
+def test_bedrock_async_calls_are_bounded_by_max_concurrency():
+    """非同期の呼び出しは max_concurrency を超えて同時に実行しない"""
+
+    class FakeRuntime:
+        def __init__(self):
+            self.active = 0
+            self.peak = 0
+            self.lock = threading.Lock()
+
+        def retrieve(self, **kwargs):
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.02)
+            with self.lock:
+                self.active -= 1
+            text = kwargs["retrievalQuery"]["text"]
+            return {"retrievalResults": [{"content": {"text": text}, "score": 0.5}]}
+
+    adapter = BedrockKBAdapter("kb", max_concurrency=2)
+    runtime = FakeRuntime()
+    adapter.bedrock_agent_runtime = runtime
+
+    async def run():
+        return await asyncio.gather(*(adapter.asearch(f"q{i}") for i in range(6)))
+
+    results = asyncio.run(run())
+
+    assert [r[0]["content"] for r in results] == [f"q{i}" for i in range(6)]
+    assert runtime.peak == 2
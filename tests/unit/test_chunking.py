@@ -0,0 +1,93 @@
+"""
+Scrapboxページのチャンク分割テスト
+"""
+
+from shared.chunking import chunk_page, estimate_tokens
+
+
+def test_estimate_tokens_counts_japanese_per_character():
+    """日本語は1文字1トークン、ASCIIは4文字1トークンで見積もる"""
+    assert estimate_tokens("日本語") == 3
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("日本 abc") == 2 + 1
+
+
+def test_chunk_page_splits_on_blocks_with_overlap_and_section_heading():
+    """インデントブロックを分割せず、節の見出しと重複部分を引き継ぐ"""
+    lines = ["title", "[** 手順]"]
+    for i in range(6):
+        lines += [f"手順{i}" + "あ" * 20, f" 詳細{i}"]
+    lines += ["code:run.sh", " make build", " make test"]
+
+    chunks = chunk_page("proj", "title", lines, target_tokens=60, overlap_tokens=30)
+
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.text.startswith("# title\n\n### 手順\n")
+        # インデントされた詳細行は親の行と同じチャンクに入る
+        for i in range(6):
+            assert (f"手順{i}" in chunk.text) == (f"- 詳細{i}" in chunk.text)
+    # 前のチャンクの末尾のブロックが次のチャンクの先頭に重複する
+    assert "手順0" in chunks[0].text and "手順0" in chunks[1].text
+    assert chunks[-1].text.endswith("```bash\nmake build\nmake test\n```\n")
+
+
+def test_etl_embeds_one_vector_per_chunk_and_deletes_stale_chunks(monkeypatch):
+    """チャンクごとに安定したIDで登録し、減ったチャンクは削除する"""
+    monkeypatch.setenv("SCRAPBOX_PROJECT", "proj")
+    monkeypatch.setenv("S3_BUCKET", "bucket")
+    monkeypatch.setenv("EMBEDDING_CACHE_DIR", "")
+    monkeypatch.setenv("USE_BEDROCK_EMBEDDINGS", "false")
+    from core.processors.etl import ScrapboxETLProcessor
+    from shared.chunking import ScrapboxChunker
+
+    class FakeS3:
+        def __init__(self):
+            self.objects = {"metadata/proj/long.json": {"total_chunks": 9}}
+
+        def upload_json_file(self, bucket, key, data):
+            return True
+
+        def upload_text_file(self, bucket, key, text):
+            return True
+
+        def delete_file(self, bucket, key):
+            pass
+
+        def upload_metadata_file(self, bucket, key, metadata):
+            self.objects[key] = metadata
+            return True
+
+        def download_json_file(self, bucket, key):
+            return self.objects.get(key)
+
+    class FakePinecone:
+        def __init__(self):
+            self.upserted = []
+            self.deleted = []
+
+        def upsert_batch(self, vectors):
+            self.upserted.extend(vectors)
+
+        def delete(self, ids=None):
+            self.deleted.extend(ids)
+
+    pinecone = FakePinecone()
+    processor = ScrapboxETLProcessor(
+        scrapbox_client=object(),
+        s3_client=FakeS3(),
+        pinecone_client=pinecone,
+        chunker=ScrapboxChunker("proj", target_tokens=40, overlap_tokens=0),
+    )
+    lines = [{"text": "long"}] + [{"text": "あ" * 30} for _ in range(5)]
+
+    result = processor.process_page_data({"title": "long", "lines": lines})
+
+    assert result["success"]
+    assert [vector.id for vector in pinecone.upserted] == [
+        f"proj#long#{i}" for i in range(5)
+    ]
+    assert {vector.metadata.total_chunks for vector in pinecone.upserted} == {5}
+    assert pinecone.upserted[2].metadata.chunk_index == 2
+    assert pinecone.deleted == [f"proj#long#{i}" for i in range(5, 9)]
@@ -0,0 +1,89 @@
+"""
+同一リクエストをまとめるRAGPortのテスト
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from application.ports.rag_port import RAGPort
+from infrastructure.adapters.coalescing_rag_adapter import CoalescingRAGAdapter
+
+
+class _SlowRAG(RAGPort):
+    """release がセットされるまで検索を終えないRAGPort"""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.error = error
+
+    def search(self, query, top_k=5):
+        self.calls.append((query, top_k))
+        self.started.set()
+        self.release.wait(timeout=5)
+        if self.error:
+            raise self.error
+        return [{"id": query, "content": "text"}]
+
+    def search_and_generate(self, query, top_k=5):
+        return {"answer": query}
+
+    def get_status(self):
+        return {"status": "AVAILABLE"}
+
+
+def _run_concurrently(adapter, rag, requests, expected_coalesced):
+    """先頭のリクエストの実行中に残りを投入し、まとめられる全員が待ち始めてから解放する"""
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        futures = [executor.submit(adapter.search, *requests[0])]
+        assert rag.started.wait(timeout=5)
+        futures += [executor.submit(adapter.search, *args) for args in requests[1:]]
+        deadline = time.monotonic() + 5
+        while adapter.get_status()["coalescing"]["coalesced"] < expected_coalesced:
+            assert time.monotonic() < deadline
+            threading.Event().wait(0.001)
+        rag.release.set()
+        return futures
+
+
+def test_identical_concurrent_searches_share_one_call():
+    """同じ (query, top_k) の同時呼び出しは1回だけ検索し、結果を共有する"""
+    rag = _SlowRAG()
+    adapter = CoalescingRAGAdapter(rag)
+    requests = [("q", 5)] * 8 + [("q", 3)]
+
+    futures = _run_concurrently(adapter, rag, requests, expected_coalesced=7)
+    results = [future.result(timeout=5) for future in futures]
+
+    assert sorted(rag.calls) == [("q", 3), ("q", 5)]
+    assert all(result == [{"id": "q", "content": "text"}] for result in results)
+    # 呼び出し側ごとに別のオブジェクトを返す
+    results[0][0]["content"] = ""
+    assert results[1][0]["content"] == "text"
+
+    status = adapter.get_status()
+    assert status["coalescing"] == {"calls": 2, "coalesced": 7, "in_flight": 0}
+
+    # 完了後の呼び出しは新たに実行する
+    adapter.search("q", 5)
+    assert len(rag.calls) == 3
+
+
+def test_error_propagates_to_all_waiters():
+    """実行中の呼び出しの例外は待っていた全員に伝わる"""
+    rag = _SlowRAG(error=RuntimeError("throttled"))
+    adapter = CoalescingRAGAdapter(rag)
+
+    requests = [("q", 5)] * 4
+    futures = _run_concurrently(
+        adapter, rag, requests, expected_coalesced=len(requests) - 1
+    )
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="throttled"):
+            future.result(timeout=5)
+    assert len(rag.calls) == 1
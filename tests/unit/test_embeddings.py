@@ -0,0 +1,165 @@
+"""
+EmbeddingsClientのテスト
+"""
+
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from core.clients.embeddings import EmbeddingsClient
+
+
+def test_embed_batch_is_deterministic_and_thread_safe():
+    """バッチと単体で同じベクトルになり、並行実行しても結果が変わらない"""
+    client = EmbeddingsClient(dimension=64)
+    texts = [f"テキスト{i}" for i in range(50)]
+
+    matrix = client.embed_batch(texts)
+
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (50, 64)
+    assert matrix.flags["C_CONTIGUOUS"]
+    np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), 1.0, rtol=1e-5)
+    np.testing.assert_array_equal(matrix[3], client.embed_text(texts[3]))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        rows = list(executor.map(client.embed_text, texts * 4))
+    np.testing.assert_array_equal(np.array(rows[-50:], dtype=np.float32), matrix)
+
+
+class _StubBedrockRuntime:
+    """invoke_model のスタブ（最初の throttles 回はスロットリングを返す）"""
+
+    def __init__(self, dimension, throttles=0):
+        self.dimension = dimension
+        self.throttles = throttles
+        self.calls = []
+
+    def invoke_model(self, modelId, body, contentType, accept):
+        from botocore.exceptions import ClientError
+
+        request = json.loads(body)
+        self.calls.append(request)
+        if self.throttles:
+            self.throttles -= 1
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "slow down"}},
+                "InvokeModel",
+            )
+        if "texts" in request:
+            payload = {"embeddings": [self._vector(t) for t in request["texts"]]}
+        else:
+            payload = {"embedding": self._vector(request["inputText"])}
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+    def _vector(self, text):
+        return [float(len(text))] * self.dimension
+
+
+def test_bedrock_embed_batch_preserves_order_and_retries_throttling(monkeypatch):
+    """バッチを並行に処理しても入力順を保ち、スロットリングは再試行する"""
+    from core.clients.embeddings import BedrockEmbeddingsClient
+
+    monkeypatch.setattr("core.clients.embeddings.time.sleep", lambda seconds: None)
+    stub = _StubBedrockRuntime(dimension=4, throttles=2)
+    client = BedrockEmbeddingsClient(
+        model_id="cohere.embed-multilingual-v3",
+        dimension=4,
+        client=stub,
+        batch_size=3,
+        max_concurrency=2,
+        max_retries=3,
+        timeout_seconds=5,
+    )
+    texts = ["a" * i for i in range(1, 11)]
+
+    matrix = client.embed_batch(texts)
+
+    assert matrix.dtype == np.float32
+    assert matrix[:, 0].tolist() == [float(i) for i in range(1, 11)]
+    assert sorted(len(call["texts"]) for call in stub.calls[2:]) == [1, 3, 3, 3]
+    assert client.get_invocation_stats() == {"invocations": 6, "retries": 2}
+
+
+def test_bedrock_gives_up_after_max_retries(monkeypatch):
+    """再試行回数を超えたスロットリングはエラーになる"""
+    from botocore.exceptions import ClientError
+
+    from core.clients.embeddings import BedrockEmbeddingsClient
+
+    monkeypatch.setattr("core.clients.embeddings.time.sleep", lambda seconds: None)
+    stub = _StubBedrockRuntime(dimension=4, throttles=5)
+    client = BedrockEmbeddingsClient(
+        model_id="amazon.titan-embed-text-v2:0",
+        dimension=4,
+        client=stub,
+        max_retries=2,
+        timeout_seconds=5,
+    )
+
+    with pytest.raises(ClientError):
+        client.embed_text("text")
+    assert len(stub.calls) == 3
+    assert stub.calls[0] == {"inputText": "text", "dimensions": 4, "normalize": True}
+
+
+def test_bedrock_single_text_model_invokes_concurrently():
+    """1テキスト/呼び出しのモデルは、batch_size に関係なく呼び出しを並行にする"""
+    import threading
+
+    from core.clients.embeddings import BedrockEmbeddingsClient
+
+    class ConcurrentStub(_StubBedrockRuntime):
+        def __init__(self, dimension, parties):
+            super().__init__(dimension)
+            # parties 件の呼び出しが同時に実行されるまで応答しない
+            self.barrier = threading.Barrier(parties, timeout=5)
+
+        def invoke_model(self, modelId, body, contentType, accept):
+            self.barrier.wait()
+            return super().invoke_model(modelId, body, contentType, accept)
+
+    stub = ConcurrentStub(dimension=4, parties=4)
+    client = BedrockEmbeddingsClient(
+        model_id="amazon.titan-embed-text-v2:0",
+        dimension=4,
+        client=stub,
+        batch_size=8,
+        max_concurrency=4,
+        timeout_seconds=5,
+    )
+    texts = ["a" * i for i in range(1, 9)]
+
+    matrix = client.embed_batch(texts)
+
+    assert matrix[:, 0].tolist() == [float(i) for i in range(1, 9)]
+    assert client.get_invocation_stats() == {"invocations": 8, "retries": 0}
+
+
+def test_bedrock_clients_share_worker_threads():
+    """クライアントを増やしてもワーカースレッドが増え続けない"""
+    import threading
+
+    from core.clients.embeddings import BedrockEmbeddingsClient
+
+    clients = []
+
+    def embed_with_new_client():
+        client = BedrockEmbeddingsClient(
+            model_id="amazon.titan-embed-text-v2:0",
+            dimension=4,
+            client=_StubBedrockRuntime(dimension=4),
+            max_concurrency=3,
+        )
+        client.embed_batch(["a", "bb", "ccc", "dddd", "eeeee", "ffffff"])
+        clients.append(client)
+
+    embed_with_new_client()
+    threads = threading.active_count()
+    for _ in range(5):
+        embed_with_new_client()
+
+    assert threading.active_count() == threads
@@ -0,0 +1,98 @@
+"""
+Embeddingキャッシュのテスト
+"""
+
+import numpy as np
+
+from core.clients.embeddings import EmbeddingsClient
+from core.clients.embeddings_cache import CachedEmbeddingsClient
+
+
+class _CountingEmbeddings(EmbeddingsClient):
+    def __init__(self):
+        super().__init__(model_id="counting-v1", dimension=8)
+        self.embedded = []
+
+    def embed_batch(self, texts, batch_size=None):
+        self.embedded.extend(texts)
+        return super().embed_batch(texts, batch_size)
+
+
+class _FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.downloads = []
+
+    def upload_bytes(self, bucket, key, body):
+        self.objects[key] = body
+        return True
+
+    def download_bytes(self, bucket, key):
+        self.downloads.append(key)
+        return self.objects.get(key)
+
+
+def test_cache_tiers_avoid_reembedding_identical_text(tmp_path):
+    """メモリ・ディスク・S3のいずれかにあるテキストは再計算しない"""
+    s3 = _FakeS3()
+    inner = _CountingEmbeddings()
+    cache = CachedEmbeddingsClient(
+        inner, max_entries=1, cache_dir=str(tmp_path), s3_client=s3, s3_bucket="b"
+    )
+
+    first = cache.embed_batch(["a", "b", "a"])
+    cache.embed_text("b")
+    cache.flush()
+
+    assert inner.embedded == ["a", "b"]
+    np.testing.assert_array_equal(first[0], first[2])
+    assert all(key.startswith("embedding-cache/counting-v1/8/") for key in s3.objects)
+
+    # 同じコンテナの別インスタンスはディスクから、別コンテナはS3から読む
+    warm = CachedEmbeddingsClient(inner, cache_dir=str(tmp_path))
+    np.testing.assert_array_equal(warm.embed_batch(["a", "b"]), first[:2])
+    cold = CachedEmbeddingsClient(inner, s3_client=s3, s3_bucket="b")
+    np.testing.assert_array_equal(cold.embed_batch(["a"])[0], first[0])
+
+    assert inner.embedded == ["a", "b"]
+    assert cache.get_model_info()["cache"]["memory_hits"] == 1
+    assert warm.get_model_info()["cache"]["disk_hits"] == 2
+    assert cold.get_model_info()["cache"] == {
+        "memory_hits": 0,
+        "disk_hits": 0,
+        "s3_hits": 1,
+        "misses": 0,
+        "shard_evictions": 0,
+        "memory_entries": 1,
+        "resident_shards": 1,
+    }
+
+
+def test_s3_shards_are_evicted_under_size_cap():
+    """読み込んだシャードはサイズの上限を超えると古い順に捨て、ヒットはLRUに入れる"""
+    s3 = _FakeS3()
+    inner = _CountingEmbeddings()
+    writer = CachedEmbeddingsClient(inner, s3_client=s3, s3_bucket="b")
+    texts = [f"text-{i}" for i in range(40)]
+    expected = writer.embed_batch(texts)
+    writer.flush()
+    shards = {key.rsplit("/", 1)[-1] for key in s3.objects}
+    assert len(shards) > 3
+
+    # ベクトル1件分しか保持できない上限
+    reader = CachedEmbeddingsClient(
+        inner, max_entries=100, s3_client=s3, s3_bucket="b", max_shard_bytes=32
+    )
+    np.testing.assert_array_equal(reader.embed_batch(texts), expected)
+    # シャードは捨てても、見つかったベクトルはLRUから返す
+    s3.downloads = []
+    np.testing.assert_array_equal(reader.embed_batch(texts), expected)
+    assert s3.downloads == []
+
+    stats = reader.get_cache_stats()
+    assert inner.embedded == texts
+    assert stats["s3_hits"] == 40
+    assert stats["memory_hits"] == 40
+    assert stats["resident_shards"] <= 1
+    assert stats["shard_evictions"] > 0
+    assert reader._shard_bytes <= 32
@@ -46,5 +46,345 @@ def test_s3_client_basic():
     client = S3Client()
     # S3クライアントが初期化されていることを確認
     assert hasattr(client, "s3")
-    
+
     # 注意: EmbeddingsClient は削除済み（Bedrock KB自動処理のため）
+
+
+def test_s3_client_skips_unchanged_content():
+    """揮発性フィールド以外が同じ内容は再アップロードしないことを確認"""
+    from botocore.exceptions import ClientError
+
+    from infrastructure.adapters.s3 import S3Client
+
+    class StubS3:
+        def __init__(self):
+            self.objects = {}
+            self.puts = 0
+
+        def put_object(self, Bucket, Key, Body, ContentType, Metadata):
+            self.puts += 1
+            self.objects[(Bucket, Key)] = Metadata
+
+        def head_object(self, Bucket, Key):
+            if (Bucket, Key) not in self.objects:
+                raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+            return {"Metadata": self.objects[(Bucket, Key)]}
+
+    stub = StubS3()
+    client = S3Client()
+    client.s3 = stub
+
+    key = "metadata/test-project/skip-test.json"
+    assert client.upload_metadata_file("bucket", key, {"a": 1, "processed_at": "t1"})
+    assert not client.upload_metadata_file(
+        "bucket", key, {"a": 1, "processed_at": "t2"}
+    )
+    assert client.upload_metadata_file("bucket", key, {"a": 2, "processed_at": "t3"})
+
+    # ローカルキャッシュがなくてもユーザーメタデータのダイジェストで判定できる
+    fresh = S3Client()
+    fresh.s3 = stub
+    stub.objects[("bucket", "other.json")] = {
+        S3Client.DIGEST_METADATA_KEY: client._content_digest({"b": 1})
+    }
+    assert not fresh.upload_json_file("bucket", "other.json", {"b": 1})
+
+    assert stub.puts == 2
+    assert client.get_upload_stats() == {"written": 2, "skipped": 1}
+    assert fresh.get_upload_stats() == {"written": 0, "skipped": 1}
+
+
+def test_s3_client_uploads_when_head_object_is_forbidden():
+    """ListBucket権限がなく存在しないキーが403になってもアップロードする"""
+    from botocore.exceptions import ClientError
+
+    from infrastructure.adapters.s3 import S3Client
+
+    class ForbiddenHeadS3:
+        def __init__(self):
+            self.puts = 0
+
+        def put_object(self, Bucket, Key, Body, ContentType, Metadata):
+            self.puts += 1
+
+        def head_object(self, Bucket, Key):
+            raise ClientError({"Error": {"Code": "403"}}, "HeadObject")
+
+    stub = ForbiddenHeadS3()
+    client = S3Client()
+    client.s3 = stub
+
+    assert client.upload_json_file("bucket", "forbidden/new.json", {"a": 1})
+    assert stub.puts == 1
+
+
+class _FakeScrapbox:
+    def __init__(self, titles, updated=None):
+        self.titles = titles
+        self.updated = updated or {}
+        self.fetched = []
+
+    def iter_pages(self):
+        for title in self.titles:
+            yield {"title": title, "updated": self.updated.get(title, 1)}
+
+    def get_page_content(self, title):
+        self.fetched.append(title)
+        if title.startswith("broken"):
+            raise RuntimeError("fetch failed")
+        return {"id": title, "title": title, "lines": [{"text": title}]}
+
+
+class _FakeS3:
+    def __init__(self):
+        self.keys = []
+        self.objects = {}
+        self.deleted = []
+
+    def upload_json_file(self, bucket, key, data):
+        self.keys.append(key)
+        self.objects[key] = data
+        return True
+
+    def download_json_file(self, bucket, key):
+        return self.objects.get(key)
+
+    def upload_text_file(self, bucket, key, text):
+        self.keys.append(key)
+        self.objects[key] = text
+        return True
+
+    def delete_file(self, bucket, key):
+        self.deleted.append(key)
+        self.objects.pop(key, None)
+
+    def upload_metadata_file(self, bucket, key, metadata):
+        self.keys.append(key)
+        return True
+
+
+def test_process_all_pages_concurrently():
+    """並行処理でも結果の順序と成功/失敗の集計が正しいことを確認"""
+    from infrastructure.adapters.etl import ScrapboxETLProcessor
+
+    titles = [f"page-{i}" for i in range(20)] + ["broken-1", "", "broken-2"]
+    s3 = _FakeS3()
+    processor = ScrapboxETLProcessor(
+        scrapbox_client=_FakeScrapbox(titles), s3_client=s3
+    )
+
+    results = processor.process_all_pages(max_workers=4)
+
+    assert results["total_pages"] == 23
+    assert results["successful"] == 20
+    assert results["failed"] == 2
+    assert [page["page_title"] for page in results["pages"]] == [
+        title for title in titles if title
+    ]
+    # 20ページ × 3ファイル + コーパスのバージョン
+    assert len(s3.keys) == 61
+    assert s3.keys[-1] == "sync/test-project/corpus_version.json"
+    assert s3.objects["scrapbox/test-project/page-0.md"] == "# page-0\n"
+    assert "raw/test-project/page-0.json" in s3.objects
+
+
+class _DedupS3(_FakeS3):
+    """内容が変わらない書き込みを省略する（processed_at は比較しない）"""
+
+    def _write(self, key, value):
+        if self.objects.get(key) == value:
+            return False
+        self.keys.append(key)
+        self.objects[key] = value
+        return True
+
+    def upload_json_file(self, bucket, key, data):
+        return self._write(key, data)
+
+    def upload_text_file(self, bucket, key, text):
+        return self._write(key, text)
+
+    def upload_metadata_file(self, bucket, key, metadata):
+        stable = {k: v for k, v in metadata.items() if k != "processed_at"}
+        return self._write(key, stable)
+
+
+def test_process_all_pages_keeps_corpus_version_when_nothing_changed():
+    """内容が同じ再実行ではコーパスのバージョンを発行し直さないことを確認"""
+    from infrastructure.adapters.etl import ScrapboxETLProcessor
+
+    version_key = "sync/test-project/corpus_version.json"
+    scrapbox = _FakeScrapbox(["a", "b"])
+    s3 = _DedupS3()
+    processor = ScrapboxETLProcessor(scrapbox_client=scrapbox, s3_client=s3)
+
+    first = processor.process_all_pages()
+    assert first["uploads"]["written"] == 6
+    version = s3.objects[version_key]
+
+    second = processor.process_all_pages()
+    assert second["successful"] == 2
+    assert second["uploads"] == {"written": 0, "skipped": 6}
+    assert s3.objects[version_key] == version
+    assert processor.process_page("a")["success"]
+    assert s3.objects[version_key] == version
+
+    # ページが更新されれば新しいバージョンを発行する
+    scrapbox.get_page_content = lambda title: {
+        "id": title,
+        "title": title,
+        "lines": [{"text": title}, {"text": "edited"}],
+    }
+    processor.process_page("a")
+    assert s3.objects[version_key] != version
+
+
+def test_markdown_upload_removes_legacy_json_document():
+    """Markdownを書き込んだページは、KBに二重に索引されないよう旧形式の文書を消す"""
+    from infrastructure.adapters.etl import ScrapboxETLProcessor
+
+    s3 = _DedupS3()
+    s3.objects["scrapbox/test-project/a.json"] = {"title": "a"}
+    processor = ScrapboxETLProcessor(scrapbox_client=_FakeScrapbox(["a"]), s3_client=s3)
+
+    result = processor.process_page("a")
+
+    assert result["steps"]["legacy_document_delete"] == "completed"
+    assert "scrapbox/test-project/a.json" not in s3.objects
+    assert s3.objects["scrapbox/test-project/a.md"] == "# a\n"
+
+    # 内容が変わらず書き込みを省略した場合は削除も呼ばない
+    s3.deleted = []
+    assert "legacy_document_delete" not in processor.process_page("a")["steps"]
+    assert s3.deleted == []
+
+
+def test_process_all_pages_incremental_skips_unchanged_pages():
+    """差分同期では updated/commitId が変わったページのみ処理されることを確認"""
+    from infrastructure.adapters.etl import ScrapboxETLProcessor
+
+    scrapbox = _FakeScrapbox(["a", "b", "c"])
+    s3 = _FakeS3()
+    processor = ScrapboxETLProcessor(scrapbox_client=scrapbox, s3_client=s3)
+
+    first = processor.process_all_pages(incremental=True)
+    assert first["successful"] == 3
+    assert first["skipped"] == 0
+
+    # "b" を更新し、"c" を削除する
+    scrapbox.titles = ["a", "b"]
+    scrapbox.updated = {"b": 2}
+    scrapbox.fetched = []
+    second = processor.process_all_pages(incremental=True)
+
+    assert scrapbox.fetched == ["b"]
+    assert second["successful"] == 1
+    assert second["skipped"] == 1
+    manifest = s3.objects["sync/test-project/manifest.json"]
+    assert manifest["pages"] == {"a": [1, None], "b": [2, None]}
+
+
+def test_process_all_pages_resumable_continues_from_checkpoint():
+    """タイムアウト前に停止し、次回は成功済みページを飛ばし失敗したページを再試行することを確認"""
+    from infrastructure.adapters.etl import ScrapboxETLProcessor
+
+    class FakeContext:
+        def __init__(self, pages_before_timeout):
+            self.calls = 0
+            self.pages_before_timeout = pages_before_timeout
+
+        def get_remaining_time_in_millis(self):
+            self.calls += 1
+            return 600_000 if self.calls <= self.pages_before_timeout else 1_000
+
+    titles = ["a", "b", "broken-c", "d", "e"]
+    scrapbox = _FakeScrapbox(titles)
+    s3 = _FakeS3()
+    processor = ScrapboxETLProcessor(scrapbox_client=scrapbox, s3_client=s3)
+
+    first = processor.process_all_pages_resumable(context=FakeContext(3))
+    assert first["status"] == "in_progress"
+    assert first["cursor"] == 3
+    assert scrapbox.fetched == ["a", "b", "broken-c"]
+
+    scrapbox.fetched = []
+    second = processor.process_all_pages_resumable(context=FakeContext(10))
+    assert second["status"] == "completed"
+    assert second["resumed_completed"] == 2
+    assert second["cursor"] == 5
+    assert scrapbox.fetched == ["broken-c", "d", "e"]
+    assert second["completed_total"] == 4
+    assert second["failed_total"] == 1
+
+
+def test_process_all_pages_resumable_bounds_work_past_the_deadline():
+    """締め切り後に処理されるページは、投入済みのワーカー数分までに抑える"""
+    import threading
+    import time
+
+    from infrastructure.adapters.etl import ScrapboxETLProcessor
+
+    deadline = threading.Event()
+
+    class SlowScrapbox(_FakeScrapbox):
+        def get_page_content(self, title):
+            page = super().get_page_content(title)
+            # 3ページ目の取得中に残り時間がマージンを下回る
+            if len(self.fetched) == 3:
+                deadline.set()
+            time.sleep(0.01)
+            return page
+
+    class FakeContext:
+        def get_remaining_time_in_millis(self):
+            return 1_000 if deadline.is_set() else 600_000
+
+    titles = [f"page-{i}" for i in range(30)]
+    scrapbox = SlowScrapbox(titles)
+    s3 = _FakeS3()
+    processor = ScrapboxETLProcessor(scrapbox_client=scrapbox, s3_client=s3)
+
+    first = processor.process_all_pages_resumable(context=FakeContext(), max_workers=2)
+
+    assert first["status"] == "in_progress"
+    assert 3 <= len(scrapbox.fetched) <= 3 + 2
+    checkpoint = s3.objects["sync/test-project/checkpoint.json"]
+    assert checkpoint["completed"] == sorted(scrapbox.fetched)
+
+    deadline.clear()
+    scrapbox.fetched = []
+    second = processor.process_all_pages_resumable(context=None, max_workers=2)
+    assert second["status"] == "completed"
+    assert second["completed_total"] == 30
+
+
+def test_process_all_pages_resumable_survives_listing_changes():
+    """呼び出しの間に一覧の並びが変わっても、ページを取りこぼさずに再開することを確認"""
+    from infrastructure.adapters.etl import ScrapboxETLProcessor
+
+    class FakeContext:
+        def __init__(self, pages_before_timeout):
+            self.calls = 0
+            self.pages_before_timeout = pages_before_timeout
+
+        def get_remaining_time_in_millis(self):
+            self.calls += 1
+            return 600_000 if self.calls <= self.pages_before_timeout else 1_000
+
+    scrapbox = _FakeScrapbox(["a", "b", "c", "d", "e", "f"])
+    s3 = _FakeS3()
+    processor = ScrapboxETLProcessor(scrapbox_client=scrapbox, s3_client=s3)
+
+    first = processor.process_all_pages_resumable(context=FakeContext(3))
+    assert first["status"] == "in_progress"
+    assert scrapbox.fetched == ["a", "b", "c"]
+
+    # 更新日時順の一覧: 未処理の e と処理済みの a が更新されて先頭に移り、
+    # 新しいページ g が追加され、b が削除された
+    scrapbox.titles = ["e", "a", "g", "c", "d", "f"]
+    scrapbox.fetched = []
+    second = processor.process_all_pages_resumable(context=FakeContext(10))
+    assert second["status"] == "completed"
+    assert scrapbox.fetched == ["e", "g", "d", "f"]
+    assert second["completed_total"] == 7
+    assert second["failed_total"] == 0
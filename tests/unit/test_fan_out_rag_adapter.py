@@ -0,0 +1,185 @@
+"""
+複数のRAGPortに並行に検索するアダプターのテスト
+"""
+
+import threading
+import time
+
+import pytest
+
+from application.ports.rag_port import RAGPort
+from infrastructure.adapters.fan_out_rag_adapter import FanOutRAGAdapter
+
+
+class _FakeRAG(RAGPort):
+    def __init__(self, scores, delay=0.0, error=None):
+        self.scores = scores
+        self.delay = delay
+        self.error = error
+        self.release = threading.Event()
+
+    def search(self, query, top_k=5):
+        if self.delay:
+            self.release.wait(self.delay)
+        if self.error:
+            raise self.error
+        return [
+            {"id": f"doc-{score}", "score": score, "content": f"本文 {score}"}
+            for score in self.scores
+        ][:top_k]
+
+    def search_and_generate(self, query, top_k=5):
+        return {"answer": "回答", "metadata": {"top_k": top_k}}
+
+    def get_status(self):
+        return {"status": "AVAILABLE"}
+
+
+def test_merges_normalized_scores_across_backends():
+    """スコアの尺度が異なるバックエンドの結果を正規化してマージする"""
+    adapter = FanOutRAGAdapter(
+        {
+            "a": _FakeRAG([0.9, 0.8, 0.7]),
+            # 尺度が10倍のバックエンド
+            "b": _FakeRAG([8.0, 5.0, 2.0]),
+        },
+        timeout_seconds=1,
+    )
+
+    response = adapter.search_with_status("q", top_k=4)
+
+    assert [(r["backend"], r["raw_score"]) for r in response["results"]] == [
+        ("a", 0.9),
+        ("b", 8.0),
+        ("a", 0.8),
+        ("a", 0.7),
+    ]
+    assert response["results"][2]["score"] == pytest.approx(0.8 / 0.9)
+    assert response["partial"] is False
+    assert adapter.search_and_generate("q")["metadata"] == {"top_k": 5, "backend": "a"}
+
+
+def test_normalization_keeps_lowest_and_single_hits():
+    """各バックエンドの最下位や1件だけの結果もスコアが0にならない"""
+    from domain.policies.search_policy import SearchPolicy
+
+    adapter = FanOutRAGAdapter(
+        {
+            "many": _FakeRAG([0.8, 0.4]),
+            "single": _FakeRAG([0.6]),
+            "tied": _FakeRAG([0.3, 0.3]),
+        },
+        timeout_seconds=1,
+    )
+
+    results = adapter.search("q", top_k=10)
+
+    scores = {(r["backend"], r["raw_score"]): r["score"] for r in results}
+    assert scores[("many", 0.8)] == pytest.approx(1.0)
+    assert scores[("many", 0.4)] == pytest.approx(0.5)
+    # 件数やスコアの分布によらず同じ規則で最大値が1.0になる
+    assert scores[("single", 0.6)] == pytest.approx(1.0)
+    assert scores[("tied", 0.3)] == pytest.approx(1.0)
+    assert len(SearchPolicy.filter_results(results, min_score=0.1)) == 5
+
+
+def test_tied_and_near_tied_backends_normalize_alike():
+    """同点のバックエンドとほぼ同点のバックエンドで正規化の規則が変わらない"""
+    adapter = FanOutRAGAdapter(
+        {"tied": _FakeRAG([0.5, 0.5]), "near": _FakeRAG([0.5, 0.49])},
+        timeout_seconds=1,
+    )
+
+    results = adapter.search("q", top_k=10)
+
+    scores = sorted((r["backend"], r["score"]) for r in results)
+    assert scores == [
+        ("near", pytest.approx(0.98)),
+        ("near", pytest.approx(1.0)),
+        ("tied", pytest.approx(1.0)),
+        ("tied", pytest.approx(1.0)),
+    ]
+
+
+def test_merges_single_result_backend_with_multi_result_backend():
+    """1件だけのバックエンドも複数件のバックエンドと同じ尺度でマージする"""
+    adapter = FanOutRAGAdapter(
+        {
+            "multi": _FakeRAG([0.9, 0.6, 0.3]),
+            "single": _FakeRAG([0.45]),
+        },
+        timeout_seconds=1,
+    )
+
+    results = adapter.search("q", top_k=4)
+
+    assert [(r["backend"], r["score"]) for r in results] == [
+        ("multi", pytest.approx(1.0)),
+        ("single", pytest.approx(1.0)),
+        ("multi", pytest.approx(0.6 / 0.9)),
+        ("multi", pytest.approx(0.3 / 0.9)),
+    ]
+
+
+def test_slow_and_failing_backends_return_partial_results():
+    """タイムアウト・失敗したバックエンドを除いた結果を返し、状態を記録する"""
+    slow = _FakeRAG([0.5], delay=5)
+    adapter = FanOutRAGAdapter(
+        {
+            "fast": _FakeRAG([0.9, 0.1]),
+            "slow": slow,
+            "broken": _FakeRAG([], error=RuntimeError("AccessDenied")),
+        },
+        timeout_seconds=0.05,
+    )
+
+    started = time.perf_counter()
+    response = adapter.search_with_status("q", top_k=5)
+    elapsed = time.perf_counter() - started
+    slow.release.set()
+
+    assert elapsed < 1
+    assert [r["id"] for r in response["results"]] == ["doc-0.9", "doc-0.1"]
+    assert response["partial"] is True
+    assert response["backends"]["fast"] == {"status": "ok", "count": 2}
+    assert response["backends"]["slow"]["status"] == "timeout"
+    assert response["backends"]["broken"] == {
+        "status": "error",
+        "count": 0,
+        "error": "AccessDenied",
+    }
+    assert adapter.get_status()["timeouts"] == {"fast": 0, "slow": 1, "broken": 0}
+
+
+def test_saturated_backend_is_reported_as_queued():
+    """スレッドが埋まったバックエンドは queued とし、他のバックエンドは待たせない"""
+    slow = _FakeRAG([0.5], delay=5)
+    adapter = FanOutRAGAdapter(
+        {"fast": _FakeRAG([0.9]), "slow": slow},
+        timeout_seconds=0.05,
+        max_workers=1,
+    )
+
+    try:
+        first = adapter.search_with_status("q")
+        # slow の唯一のスレッドは1回目の呼び出しを実行したまま
+        second = adapter.search_with_status("q")
+    finally:
+        slow.release.set()
+
+    assert first["backends"]["slow"]["status"] == "timeout"
+    assert second["backends"]["slow"] == {"status": "queued", "count": 0}
+    assert second["backends"]["fast"] == {"status": "ok", "count": 1}
+    assert second["partial"] is True
+    status = adapter.get_status()
+    assert status["timeouts"] == {"fast": 0, "slow": 1}
+    assert status["queued"] == {"fast": 0, "slow": 1}
+
+
+def test_bedrock_read_timeout_matches_fan_out_timeout():
+    """Bedrockの応答の読み込みを待ち時間で打ち切るクライアントを作る"""
+    from infrastructure.adapters.bedrock_kb_adapter import BedrockKBAdapter
+
+    adapter = BedrockKBAdapter("kb-id", read_timeout=2.5)
+
+    assert adapter.bedrock_agent_runtime.meta.config.read_timeout == 2.5
@@ -0,0 +1,92 @@
+"""
+HNSWインデックスのテスト
+"""
+
+import numpy as np
+
+from core.clients.embeddings import EmbeddingsClient
+from infrastructure.adapters.hnsw_vector_index_adapter import HNSWVectorIndexAdapter
+from schema.vector import VectorData, VectorMetadata
+from shared.hnsw import HNSWIndex
+
+
+def test_search_recall_against_exact_search():
+    """厳密な全件探索と比べて十分な再現率で上位k件を返す"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((1000, 16), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = HNSWIndex(16, m=8, ef_construction=64, ef_search=64)
+    for vector in vectors:
+        index.add(vector)
+
+    queries = rng.standard_normal((50, 16), dtype=np.float32)
+    hits = 0
+    for query in queries:
+        exact = set(np.argsort(-(vectors @ query))[:10].tolist())
+        hits += len(exact & {node for node, _ in index.search(query, 10)})
+
+    assert hits / (50 * 10) >= 0.9
+
+
+def _vector(client, id, text):
+    return VectorData(
+        id=id,
+        values=client.embed_text(text),
+        metadata=VectorMetadata(
+            source="scrapbox",
+            project_name="proj",
+            page_title=id,
+            page_id=id,
+            content_preview=text,
+        ),
+    )
+
+
+def test_adapter_applies_incremental_updates_and_tombstones(tmp_path):
+    """同じIDの追加は古いノードを置き換え、削除したIDは結果に含めない"""
+    client = EmbeddingsClient(dimension=16)
+
+    def vector(id, text):
+        return _vector(client, id, text)
+
+    adapter = HNSWVectorIndexAdapter(tmp_path, embeddings_client=client, m=4)
+    adapter.upsert_batch([vector(f"page-{i}", f"本文{i}") for i in range(30)])
+    adapter.upsert_batch([vector("page-3", "更新後の本文")])
+    adapter.delete(ids=["page-4"])
+    adapter.save()
+
+    reloaded = HNSWVectorIndexAdapter(tmp_path, embeddings_client=client)
+    top = reloaded.search("更新後の本文", top_k=30)
+
+    assert top[0]["id"] == "page-3"
+    assert top[0]["content"] == "更新後の本文"
+    assert sorted(r["id"] for r in top) == sorted(
+        f"page-{i}" for i in range(30) if i != 4
+    )
+    assert reloaded.get_status()["tombstone_count"] == 2
+
+
+def test_adapter_compacts_graph_when_tombstones_exceed_ratio(tmp_path):
+    """トゥームストーンの割合が閾値を超えたら、削除していないノードで作り直す"""
+    client = EmbeddingsClient(dimension=16)
+    adapter = HNSWVectorIndexAdapter(
+        tmp_path, embeddings_client=client, m=4, compact_ratio=0.25
+    )
+    assert adapter.rerank_candidates == 0
+    adapter.upsert_batch([_vector(client, f"page-{i}", f"本文{i}") for i in range(20)])
+
+    adapter.delete(ids=[f"page-{i}" for i in range(5)])
+    assert adapter.get_status()["tombstone_count"] == 5
+
+    adapter.delete(ids=["page-5"])
+    status = adapter.get_status()
+    assert status["tombstone_count"] == 0
+    assert status["vector_count"] == 14
+    assert adapter.ids == [f"page-{i}" for i in range(6, 20)]
+
+    adapter.save()
+    reloaded = HNSWVectorIndexAdapter(tmp_path, embeddings_client=client)
+    top = reloaded.search("本文12", top_k=20)
+    assert top[0]["id"] == "page-12"
+    assert top[0]["content"] == "本文12"
+    assert sorted(r["id"] for r in top) == sorted(f"page-{i}" for i in range(6, 20))
@@ -0,0 +1,135 @@
+"""
+ローカルのベクトルインデックスのテスト
+"""
+
+import numpy as np
+import pytest
+
+from core.clients.embeddings import EmbeddingsClient
+from infrastructure.adapters.local_vector_index_adapter import (
+    LocalVectorIndexAdapter,
+    LocalVectorIndexBuilder,
+)
+from schema.vector import VectorData, VectorMetadata
+from shared.quantization import ProductQuantizer, ScalarQuantizer
+
+
+def _vector(client, i):
+    text = f"ページ{i}の本文"
+    return VectorData(
+        id=f"proj#page-{i}#0",
+        values=client.embed_text(text) * (i + 1),
+        metadata=VectorMetadata(
+            source="scrapbox",
+            project_name="proj",
+            page_title=f"page-{i}",
+            page_id=f"id-{i}",
+            content_preview=text,
+        ),
+    )
+
+
+def test_search_returns_top_k_by_cosine_similarity(tmp_path):
+    """正規化したベクトルの内積で上位k件を返し、削除したベクトルは含めない"""
+    client = EmbeddingsClient(dimension=32)
+    builder = LocalVectorIndexBuilder(model_info=client.get_model_info())
+    builder.upsert_batch([_vector(client, i) for i in range(20)])
+    builder.delete(ids=["proj#page-5#0"])
+
+    adapter = LocalVectorIndexAdapter(builder.save(tmp_path), embeddings_client=client)
+    results = adapter.search("ページ3の本文", top_k=4)
+
+    assert isinstance(adapter.vectors, np.memmap)
+    assert [r["id"] for r in results][0] == "proj#page-3#0"
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-5)
+    assert results[0]["content"] == "ページ3の本文"
+    assert [r["score"] for r in results] == sorted(
+        (r["score"] for r in results), reverse=True
+    )
+    assert not adapter.search("ページ5の本文", top_k=19)[0]["id"].endswith("page-5#0")
+    assert len(adapter.search("x", top_k=100)) == 19
+    assert adapter.get_status()["vector_count"] == 19
+
+
+def test_builder_collects_vectors_from_etl(tmp_path, monkeypatch):
+    """ETLのpinecone_clientとして渡すと、チャンクのベクトルからインデックスを作れる"""
+    monkeypatch.setenv("SCRAPBOX_PROJECT", "proj")
+    monkeypatch.setenv("S3_BUCKET", "bucket")
+    from core.processors.etl import ScrapboxETLProcessor
+
+    class FakeS3:
+        def upload_json_file(self, bucket, key, data):
+            return True
+
+        def upload_text_file(self, bucket, key, text):
+            return True
+
+        def delete_file(self, bucket, key):
+            pass
+
+        def upload_metadata_file(self, bucket, key, metadata):
+            return True
+
+        def download_json_file(self, bucket, key):
+            return None
+
+    client = EmbeddingsClient(dimension=16)
+    builder = LocalVectorIndexBuilder(model_info=client.get_model_info())
+    processor = ScrapboxETLProcessor(
+        scrapbox_client=object(),
+        s3_client=FakeS3(),
+        embeddings_client=client,
+        pinecone_client=builder,
+    )
+    pages = [
+        {"title": f"page-{i}", "lines": [{"text": f"page-{i}"}, {"text": "本文"}]}
+        for i in range(5)
+    ]
+
+    assert all(r["success"] for r in processor.process_pages_data(pages))
+    adapter = LocalVectorIndexAdapter(builder.save(tmp_path), embeddings_client=client)
+
+    assert sorted(adapter.ids) == [f"proj#page-{i}#0" for i in range(5)]
+    assert adapter.metadata[0]["total_chunks"] == 1
+
+
+@pytest.mark.parametrize(
+    "codec", [ScalarQuantizer(), ProductQuantizer(subspaces=8, centroids=16)]
+)
+def test_quantized_index_reranks_with_full_precision(tmp_path, codec):
+    """量子化した符号で候補を選び、float32 のベクトルで再スコアする"""
+    client = EmbeddingsClient(dimension=32)
+    builder = LocalVectorIndexBuilder()
+    builder.upsert_batch([_vector(client, i) for i in range(200)])
+
+    adapter = LocalVectorIndexAdapter(
+        builder.save(tmp_path, codec=codec, keep_full_precision=True),
+        embeddings_client=client,
+        rerank_candidates=50,
+    )
+    results = adapter.search("ページ42の本文", top_k=3)
+
+    assert adapter.codes.shape == (200, codec.code_bytes)
+    assert results[0]["id"] == "proj#page-42#0"
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-5)
+    assert adapter.get_status()["bytes_per_vector"] == codec.code_bytes
+
+
+def test_quantized_index_without_full_precision(tmp_path):
+    """再スコアしない量子化インデックスは float32 のベクトルを保存しない"""
+    client = EmbeddingsClient(dimension=32)
+    builder = LocalVectorIndexBuilder()
+    builder.upsert_batch([_vector(client, i) for i in range(200)])
+    full = LocalVectorIndexAdapter(builder.save(tmp_path / "full"), client)
+
+    index_dir = builder.save(tmp_path / "int8", codec=ScalarQuantizer())
+    adapter = LocalVectorIndexAdapter(index_dir, embeddings_client=client)
+
+    assert not (index_dir / "vectors.npy").exists()
+    assert adapter.vectors is None
+    assert adapter.search("ページ42の本文", top_k=1)[0]["id"] == "proj#page-42#0"
+    status = adapter.get_status()
+    assert status["full_precision"] is False
+    assert status["disk_bytes"] < full.get_status()["disk_bytes"]
+    with pytest.raises(ValueError):
+        LocalVectorIndexAdapter(index_dir, client, rerank_candidates=50)
@@ -0,0 +1,97 @@
+"""
+MMRによる検索結果の多様化のテスト
+"""
+
+import numpy as np
+
+from application.ports.rag_port import RAGPort
+from core.clients.embeddings import EmbeddingsClient
+from domain.policies.search_policy import SearchPolicy
+from infrastructure.adapters.mmr_rag_adapter import MMRRerankingRAGAdapter
+
+
+def _reference_mmr(vectors, relevance, top_k, lambda_mult):
+    """compute_similarity を1組ずつ呼ぶMMR"""
+    client = EmbeddingsClient(dimension=vectors.shape[1])
+    selected = []
+    remaining = list(range(len(vectors)))
+    while remaining and len(selected) < top_k:
+
+        def marginal(i):
+            redundancy = max(
+                (client.compute_similarity(vectors[i], vectors[j]) for j in selected),
+                default=0.0,
+            )
+            return lambda_mult * relevance[i] - (1 - lambda_mult) * redundancy
+
+        best = max(remaining, key=marginal)
+        selected.append(best)
+        remaining.remove(best)
+    return selected
+
+
+def test_mmr_select_matches_pairwise_reference():
+    """行列演算での選択が1組ずつ類似度を計算するMMRと一致する"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((60, 16)).astype(np.float32)
+    relevance = rng.random(60).astype(np.float32)
+
+    for lambda_mult in (0.0, 0.3, 0.7, 1.0):
+        assert SearchPolicy.mmr_select(
+            vectors, relevance, 10, lambda_mult
+        ) == _reference_mmr(vectors, relevance, 10, lambda_mult)
+    assert SearchPolicy.mmr_select(vectors, relevance, 10, 1.0) == list(
+        np.argsort(-relevance, kind="stable")[:10]
+    )
+
+
+def test_adapter_pushes_near_duplicates_down():
+    """同じテンプレートの日報より、内容の異なるページを先に選ぶ"""
+    basis = np.eye(4, dtype=np.float32)
+    texts = {
+        "query": basis[0] + 0.5 * basis[1] + 0.5 * basis[2],
+        "日報 1": basis[0] + basis[1],
+        "日報 2": basis[0] + basis[1] + 0.01 * basis[3],
+        "日報 3": basis[0] + basis[1] + 0.02 * basis[3],
+        "設計メモ": basis[0] + basis[2],
+    }
+
+    class FakeEmbeddings:
+        def embed_batch(self, batch, batch_size=None):
+            return np.stack([texts[text] for text in batch])
+
+    class FakeRAG(RAGPort):
+        def __init__(self):
+            self.requested = None
+
+        def search(self, query, top_k=5):
+            self.requested = top_k
+            return [
+                {"id": text, "content": text, "score": 0.9 - i / 100}
+                for i, text in enumerate(list(texts)[1:])
+            ]
+
+        def search_and_generate(self, query, top_k=5):
+            return {}
+
+        def get_status(self):
+            return {"status": "AVAILABLE"}
+
+    rag = FakeRAG()
+    adapter = MMRRerankingRAGAdapter(
+        rag, FakeEmbeddings(), lambda_mult=0.5, over_fetch=2
+    )
+    results = adapter.search("query", top_k=2)
+
+    assert rag.requested == 4
+    assert [result["id"] for result in results] == ["日報 1", "設計メモ"]
+    assert [result["mmr_rank"] for result in results] == [1, 2]
+    assert adapter.get_status()["mmr"] == {
+        "lambda": 0.5,
+        "over_fetch": 2,
+        "max_fetch": 100,
+    }
+
+    # 候補数は Bedrock KB の上限で打ち切る
+    adapter.search("query", top_k=60)
+    assert rag.requested == 100
@@ -0,0 +1,90 @@
+"""
+チャンク単位の検索結果をページ単位にまとめる処理のテスト
+"""
+
+import pytest
+
+from application.ports.rag_port import RAGPort
+from domain.policies.search_policy import SearchPolicy
+from infrastructure.adapters.page_collapsing_rag_adapter import (
+    PageCollapsingRAGAdapter,
+)
+
+SOURCE_URI = "x-amz-bedrock-kb-source-uri"
+
+
+def _chunk(page, score):
+    return {
+        "id": f"{page}#{score}",
+        "score": score,
+        "metadata": {SOURCE_URI: f"s3://b/{page}.md"},
+    }
+
+
+def test_collapse_aggregates_chunk_scores_per_page():
+    """チャンクをページごとにまとめ、max と sum_top_n でページを並べる"""
+    chunks = [
+        _chunk("a", 0.9),
+        _chunk("a", 0.8),
+        _chunk("b", 0.86),
+        _chunk("a", 0.7),
+        _chunk("b", 0.85),
+        _chunk("c", 0.5),
+        # ソースURIがない場合はページIDでまとめる
+        {"id": "x", "score": 0.6, "metadata": {"page_id": "p1"}},
+        {"id": "y", "score": 0.4, "metadata": {"page_id": "p1"}},
+    ]
+
+    by_max = SearchPolicy.collapse_to_pages(chunks, top_k=3)
+    assert [page["page_key"] for page in by_max] == [
+        "s3://b/a.md",
+        "s3://b/b.md",
+        "p1",
+    ]
+    assert by_max[0]["matched_chunks"] == 3
+    assert by_max[0]["id"] == "a#0.9"
+
+    by_sum = SearchPolicy.collapse_to_pages(
+        chunks, top_k=2, aggregation="sum_top_n", top_n=2
+    )
+    assert [page["page_key"] for page in by_sum] == ["s3://b/b.md", "s3://b/a.md"]
+    assert by_sum[0]["score"] == pytest.approx(0.86 + 0.85)
+    assert by_sum[0]["chunk_score"] == 0.86
+
+
+def test_adapter_requeries_only_when_too_few_pages():
+    """異なるページが足りない場合だけ取得件数を増やして検索し直す"""
+
+    class ChunkRAG(RAGPort):
+        def __init__(self, pages):
+            self.pages = pages
+            self.requests = []
+
+        def search(self, query, top_k=5):
+            self.requests.append(top_k)
+            # ページあたり4チャンク、スコアはページ順に下がる
+            chunks = [
+                _chunk(f"page-{i // 4}", 1 - i / 1000) for i in range(4 * self.pages)
+            ]
+            return chunks[:top_k]
+
+        def search_and_generate(self, query, top_k=5):
+            return {}
+
+        def get_status(self):
+            return {"status": "AVAILABLE"}
+
+    rag = ChunkRAG(pages=20)
+    adapter = PageCollapsingRAGAdapter(rag, over_fetch=3)
+    pages = adapter.search("q", top_k=5)
+
+    assert [page["page_key"] for page in pages] == [
+        f"s3://b/page-{i}.md" for i in range(5)
+    ]
+    assert rag.requests == [15, 30]
+    assert adapter.get_status()["page_collapse"]["requeries"] == 1
+
+    # チャンクがそれ以上ない場合は検索し直さない
+    small = ChunkRAG(pages=2)
+    assert len(PageCollapsingRAGAdapter(small, over_fetch=3).search("q", 5)) == 2
+    assert small.requests == [15]
@@ -0,0 +1,121 @@
+"""
+PineConeClientの一括upsertのテスト
+"""
+
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from core.clients.pinecone import PineConeClient
+from schema.vector import VectorMetadata
+
+
+class InMemoryIndex:
+    """pinecone.Index の upsert/delete だけを持つインメモリ実装"""
+
+    def __init__(self, fail=False):
+        self.records = {}
+        self.request_bytes = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, namespace=None):
+        if self.fail:
+            raise RuntimeError("index unavailable")
+        payload = json.dumps({"vectors": vectors, "namespace": namespace})
+        with self._lock:
+            self.request_bytes.append(len(payload.encode("utf-8")))
+            for vector in vectors:
+                self.records[vector["id"]] = vector
+        return {"upserted_count": len(vectors)}
+
+    def delete(self, ids=None, delete_all=False, filter=None, namespace=None):
+        with self._lock:
+            for id in ids or []:
+                self.records.pop(id, None)
+
+
+def _metadata(i):
+    return VectorMetadata(
+        source="scrapbox",
+        project_name="proj",
+        page_title=f"page-{i}",
+        page_id=f"id-{i}",
+        content_preview="日本語のプレビュー本文" * 40,
+    )
+
+
+def test_upsert_arrays_splits_by_count_and_request_size():
+    """件数と2MBの上限を超えないように分割して並行に送信する"""
+    index = InMemoryIndex()
+    client = PineConeClient(index=index, batch_size=1000, max_workers=4)
+    # 実際の埋め込みと同じくL2正規化した値（JSONでは桁数が多くなる）
+    values = np.random.default_rng(0).standard_normal((300, 1536), dtype=np.float32)
+    values /= np.linalg.norm(values, axis=1, keepdims=True)
+    ids = [f"proj#page-{i}#0" for i in range(300)]
+
+    result = client.upsert_arrays(ids, values, [_metadata(i) for i in range(300)])
+
+    assert result["upserted_count"] == 300
+    assert result["request_count"] == len(index.request_bytes) > 1
+    assert max(index.request_bytes) <= PineConeClient.MAX_REQUEST_BYTES
+    record = index.records["proj#page-7#0"]
+    assert record["values"] == pytest.approx(values[7].tolist())
+    # Pineconeはnullのメタデータを受け付けない
+    assert "url" not in record["metadata"]
+
+
+def test_etl_buffers_vectors_across_pages(monkeypatch):
+    """ETLは複数ページのベクトルをまとめて書き込み、失敗したページを失敗として返す"""
+    monkeypatch.setenv("SCRAPBOX_PROJECT", "proj")
+    monkeypatch.setenv("S3_BUCKET", "bucket")
+    monkeypatch.setenv("ETL_VECTOR_FLUSH_SIZE", "4")
+    from core.clients.embeddings import EmbeddingsClient
+    from core.processors.etl import ScrapboxETLProcessor
+
+    class FakeS3:
+        def upload_json_file(self, bucket, key, data):
+            return True
+
+        def upload_text_file(self, bucket, key, text):
+            return True
+
+        def delete_file(self, bucket, key):
+            pass
+
+        def upload_metadata_file(self, bucket, key, metadata):
+            return True
+
+        def download_json_file(self, bucket, key):
+            return None
+
+    pages = [
+        {"title": f"page-{i}", "lines": [{"text": f"page-{i}"}, {"text": "本文"}]}
+        for i in range(10)
+    ]
+
+    for fail in (False, True):
+        index = InMemoryIndex(fail=fail)
+        processor = ScrapboxETLProcessor(
+            scrapbox_client=object(),
+            s3_client=FakeS3(),
+            embeddings_client=EmbeddingsClient(dimension=8),
+            pinecone_client=PineConeClient(index=index, batch_size=100),
+        )
+
+        results = list(processor.process_pages_data(pages, max_workers=3))
+
+        assert [r["page_title"] for r in results] == [p["title"] for p in pages]
+        if fail:
+            assert not any(r["success"] for r in results)
+            assert results[0]["steps"]["pinecone_upsert"] == "failed"
+        else:
+            assert all(r["success"] for r in results)
+            assert results[0]["steps"]["pinecone_upsert"] == "completed"
+            assert sorted(index.records) == sorted(
+                f"proj#page-{i}#0" for i in range(10)
+            )
+            # 1ページ1ベクトルで4件ずつ書き込む（最後は残りの2件）
+            assert len(index.request_bytes) == 3
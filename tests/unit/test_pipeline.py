@@ -0,0 +1,96 @@
+"""
+ステージ型パイプラインのテスト
+"""
+
+import threading
+import time
+
+import pytest
+
+from shared.pipeline import Pipeline, Stage
+
+
+def test_pipeline_runs_stages_in_order_and_preserves_input_order():
+    """ordered=True では入力順に結果が返る"""
+    pipeline = Pipeline(
+        [
+            Stage("slow_even", lambda x: (time.sleep(0.01 * (x % 2 == 0)), x)[1], 4),
+            Stage("double", lambda x: x * 2, 2),
+        ]
+    )
+
+    results = list(pipeline.run(range(20), ordered=True))
+
+    assert [result.index for result in results] == list(range(20))
+    assert [result.value for result in results] == [x * 2 for x in range(20)]
+    stats = pipeline.get_stats()
+    assert stats["slow_even"]["processed"] == 20
+    assert stats["double"]["processed"] == 20
+
+
+def test_pipeline_reports_failed_stage_and_skips_remaining_stages():
+    """失敗した要素は後続ステージに渡されず、失敗したステージが記録される"""
+    seen = []
+
+    def check(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    pipeline = Pipeline([Stage("check", check), Stage("sink", seen.append)])
+
+    results = {result.index: result for result in pipeline.run(range(5))}
+
+    assert not results[3].success
+    assert results[3].failed_stage == "check"
+    assert isinstance(results[3].error, ValueError)
+    assert sorted(seen) == [0, 1, 2, 4]
+    assert pipeline.get_stats()["check"]["failed"] == 1
+
+
+def test_pipeline_applies_backpressure_to_slow_stage():
+    """遅いステージがあっても処理中の要素数は上限を超えない"""
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def source():
+        nonlocal in_flight, max_in_flight
+        for i in range(50):
+            with lock:
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+            yield i
+
+    def slow(x):
+        time.sleep(0.002)
+        return x
+
+    pipeline = Pipeline(
+        [Stage("fast", lambda x: x, 4, 2), Stage("slow", slow, 1, 2)],
+        max_in_flight=5,
+    )
+    for _ in pipeline.run(source()):
+        with lock:
+            in_flight -= 1
+
+    assert max_in_flight <= 5
+    assert pipeline.get_stats()["slow"]["max_queue_depth"] <= 2
+
+
+def test_pipeline_propagates_source_error_after_draining():
+    """入力側の例外は投入済みの要素を処理し終えてから送出される"""
+
+    def source():
+        yield 1
+        yield 2
+        raise RuntimeError("listing failed")
+
+    pipeline = Pipeline([Stage("identity", lambda x: x)])
+    received = []
+
+    with pytest.raises(RuntimeError, match="listing failed"):
+        for result in pipeline.run(source(), ordered=True):
+            received.append(result.value)
+
+    assert received == [1, 2]
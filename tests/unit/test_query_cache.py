@@ -0,0 +1,147 @@
+"""
+検索結果キャッシュのテスト
+"""
+
+from application.ports.rag_port import RAGPort
+from application.usecases.search_knowledge import SearchKnowledgeUseCase
+from domain.entities.corpus_version import CorpusVersion
+from domain.values.query import SearchQuery
+from infrastructure.adapters import query_cache
+from infrastructure.adapters.query_cache import (
+    CorpusVersionWatcher,
+    InMemoryQueryCache,
+    S3QueryCache,
+)
+
+
+class _CountingRAG(RAGPort):
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query, top_k=5):
+        self.queries.append(query)
+        return [{"id": f"{query}-{i}", "score": 1.0 - i / 10} for i in range(top_k)]
+
+    def search_and_generate(self, query, top_k=5):
+        return {}
+
+    def get_status(self):
+        return {"status": "AVAILABLE"}
+
+
+class _FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def upload_json_file(self, bucket, key, data):
+        self.objects[key] = data
+        return True
+
+    def download_json_file(self, bucket, key):
+        return self.objects.get(key)
+
+
+def test_equivalent_queries_share_cache_key():
+    """NFKC正規化・大文字小文字・空白の違いは同じキーになることを確認"""
+    key = SearchQuery("ＡＷＳ  Lambda", top_k=5).cache_key
+
+    assert SearchQuery(" aws lambda ", top_k=5).cache_key == key
+    assert SearchQuery("aws lambda", top_k=3).cache_key != key
+    assert SearchQuery("aws lambda", top_k=5, filters=["tag"]).cache_key != key
+
+
+def test_memory_cache_evicts_least_recently_used_and_expired(monkeypatch):
+    """件数の上限ではLRUで、TTLを過ぎたら期限切れで捨てることを確認"""
+    now = [100.0]
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+    cache = InMemoryQueryCache(max_entries=2, ttl_seconds=10)
+
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    now[0] += 11
+    assert cache.get("c") is None
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_use_case_serves_repeated_queries_until_corpus_version_changes():
+    """同じクエリは検索せずに返し、コーパスのバージョンが変わると検索し直す"""
+    rag = _CountingRAG()
+    s3 = _FakeS3()
+    watcher = CorpusVersionWatcher(
+        s3, bucket="b", projects=["p"], check_interval_seconds=0
+    )
+    use_case = SearchKnowledgeUseCase(
+        rag,
+        query_cache=S3QueryCache(s3, bucket="b", memory=InMemoryQueryCache()),
+        corpus_version=watcher.current,
+    )
+
+    first = use_case.search_documents("AWS Lambda", top_k=3)
+    again = use_case.search_documents("ａｗｓ lambda", top_k=3)
+    assert rag.queries == ["AWS Lambda"]
+    assert again["results"] == first["results"]
+    assert again["query"] == "ａｗｓ lambda"
+
+    # 別のコンテナ（前段のキャッシュが空）でもS3のエントリを使う
+    other = SearchKnowledgeUseCase(
+        rag,
+        query_cache=S3QueryCache(s3, bucket="b"),
+        corpus_version=watcher.current,
+    )
+    other.search_documents("aws lambda", top_k=3)
+    assert rag.queries == ["AWS Lambda"]
+
+    s3.upload_json_file(
+        "b", CorpusVersion.s3_key("p"), CorpusVersion.new("p").to_dict()
+    )
+    use_case.search_documents("AWS Lambda", top_k=3)
+    assert rag.queries == ["AWS Lambda", "AWS Lambda"]
+
+    status = use_case.get_system_status()["query_cache"]
+    assert status["hits"] == 1
+    assert status["misses"] == 2
+    assert status["hit_ratio"] == 1 / 3
+    assert status["saved_latency_ms"] >= 0
+    assert status["backend"]["backend"] == "s3"
+
+
+def test_watcher_version_changes_when_any_watched_project_is_reingested():
+    """監視するどのプロジェクトを取り込み直してもバージョンが変わる"""
+    s3 = _FakeS3()
+    watcher = CorpusVersionWatcher(
+        s3, bucket="b", projects=["project-a", "project-b"], check_interval_seconds=0
+    )
+    assert watcher.current() is None
+
+    s3.upload_json_file(
+        "b", CorpusVersion.s3_key("project-a"), CorpusVersion.new("project-a").to_dict()
+    )
+    first = watcher.current()
+    assert first is not None
+    assert watcher.current() == first
+
+    s3.upload_json_file(
+        "b", CorpusVersion.s3_key("project-b"), CorpusVersion.new("project-b").to_dict()
+    )
+    second = watcher.current()
+    assert second not in (None, first)
+
+    s3.upload_json_file(
+        "b", CorpusVersion.s3_key("project-a"), CorpusVersion.new("project-a").to_dict()
+    )
+    assert watcher.current() not in (first, second)
+
+
+def test_watcher_defaults_to_fan_out_projects(monkeypatch):
+    """省略時は KNOWLEDGE_BASE_IDS のプロジェクトをすべて監視する"""
+    monkeypatch.setenv("KNOWLEDGE_BASE_IDS", "project-b=KB2,project-a=KB1")
+
+    watcher = CorpusVersionWatcher(_FakeS3(), bucket="b")
+
+    assert watcher.projects == ["project-a", "project-b"]
@@ -13,14 +13,15 @@ class TestScrapboxClient:
 
     def setup_method(self):
         """Set up test fixtures."""
-        with patch("core.clients.CONFIG") as mock_config:
+        with patch("core.clients.scrapbox.CONFIG") as mock_config:
             # コンフィグをモックする
             mock_config.scrapbox_project = "test-project"
             mock_config.scrapbox_api_token = "test-token"
+            mock_config.etl_max_workers = 1
 
             self.client = ScrapboxClient()
 
-    @patch("core.clients.requests.Session.get")
+    @patch("core.clients.scrapbox.requests.Session.get")
     def test_get_pages_success(self, mock_get):
         """Test successful page retrieval."""
         mock_response = Mock()
@@ -38,9 +39,36 @@ class TestScrapboxClient:
         assert len(pages) == 2
         assert pages[0]["id"] == "page1"
         assert pages[0]["title"] == "Test Page 1"
-        mock_get.assert_called_once_with("https://scrapbox.io/api/pages/test-project")
+        mock_get.assert_called_once_with(
+            "https://scrapbox.io/api/pages/test-project",
+            params={"skip": 0, "limit": 1000},
+        )
 
-    @patch("core.clients.requests.Session.get")
+    @patch("core.clients.scrapbox.requests.Session.get")
+    def test_iter_pages_follows_pagination(self, mock_get):
+        """Test that iter_pages walks every skip/limit window."""
+        windows = [
+            {"count": 5, "pages": [{"title": "p0"}, {"title": "p1"}]},
+            {"count": 5, "pages": [{"title": "p2"}, {"title": "p3"}]},
+            {"count": 5, "pages": [{"title": "p4"}]},
+        ]
+        responses = []
+        for window in windows:
+            response = Mock()
+            response.json.return_value = window
+            responses.append(response)
+        mock_get.side_effect = responses
+
+        titles = [page["title"] for page in self.client.iter_pages(limit=2)]
+
+        assert titles == ["p0", "p1", "p2", "p3", "p4"]
+        assert [call.kwargs["params"]["skip"] for call in mock_get.call_args_list] == [
+            0,
+            2,
+            4,
+        ]
+
+    @patch("core.clients.scrapbox.requests.Session.get")
     def test_get_pages_api_error(self, mock_get):
         """Test API error handling for get_pages."""
         mock_get.side_effect = requests.HTTPError("API Error")
@@ -48,7 +76,7 @@ class TestScrapboxClient:
         with pytest.raises(requests.HTTPError):
             self.client.get_pages()
 
-    @patch("core.clients.requests.Session.get")
+    @patch("core.clients.scrapbox.requests.Session.get")
     def test_get_page_content_success(self, mock_get):
         """Test successful page content retrieval."""
         mock_response = Mock()
@@ -73,7 +101,7 @@ class TestScrapboxClient:
             "https://scrapbox.io/api/pages/test-project/Test Page"
         )
 
-    @patch("core.clients.requests.Session.get")
+    @patch("core.clients.scrapbox.requests.Session.get")
     def test_get_page_content_api_error(self, mock_get):
         """Test API error handling for get_page_content."""
         mock_get.side_effect = requests.HTTPError("API Error")
@@ -93,9 +121,10 @@ class TestScrapboxClient:
 
     def test_initialization_without_token(self):
         """Test client initialization without API token."""
-        with patch("core.clients.CONFIG") as mock_config:
+        with patch("core.clients.scrapbox.CONFIG") as mock_config:
             mock_config.scrapbox_project = "test-project"
             mock_config.scrapbox_api_token = None
+            mock_config.etl_max_workers = 1
             client = ScrapboxClient()
 
             assert client.project == "test-project"
@@ -0,0 +1,90 @@
+"""
+Scrapboxエクスポートファイルの取り込みテスト
+"""
+
+import io
+import json
+
+import pytest
+
+EXPORT = {
+    "name": "test-project",
+    "displayName": "テスト",
+    "exported": 1700000000,
+    "users": [{"id": "u1", "name": "user"}],
+    "pages": [
+        {
+            "title": "はじめに",
+            "created": 1,
+            "updated": 2,
+            "id": "p1",
+            "lines": ["はじめに", "", "本文 [リンク]", "12345"],
+        },
+        {
+            "title": "page2",
+            "created": 3,
+            "updated": 4,
+            "id": "p2",
+            "lines": [{"text": "page2", "created": 3, "updated": 4}],
+        },
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def setup_env(monkeypatch):
+    monkeypatch.setenv("SCRAPBOX_PROJECT", "test-project")
+    monkeypatch.setenv("S3_BUCKET", "test-bucket")
+    monkeypatch.setenv("AWS_REGION", "us-east-1")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_iter_json_array_across_chunk_boundaries(chunk_size):
+    """チャンク境界（マルチバイト文字・数値の途中）を跨いでもデコードできる"""
+    from shared.json_stream import iter_json_array
+
+    stream = io.BytesIO(json.dumps(EXPORT, ensure_ascii=False).encode("utf-8"))
+
+    pages = list(iter_json_array(stream, key="pages", chunk_size=chunk_size))
+
+    assert pages == EXPORT["pages"]
+
+
+def test_iter_export_pages_normalizes_lines():
+    """エクスポート形式の行がページ詳細APIの形式に揃えられる"""
+    from infrastructure.adapters.scrapbox_export import iter_export_pages
+
+    stream = io.BytesIO(json.dumps(EXPORT).encode("utf-8"))
+
+    pages = list(iter_export_pages(stream))
+
+    assert pages[0]["lines"][2] == {"text": "本文 [リンク]"}
+    assert pages[0]["descriptions"] == ["本文 [リンク]", "12345"]
+    assert pages[0]["linesCount"] == 4
+    assert pages[1]["lines"][0]["text"] == "page2"
+
+
+def test_ingest_export_from_local_file(tmp_path):
+    """ローカルのエクスポートファイルから全ページを取り込める"""
+    from application.usecases.ingest_scrapbox import IngestScrapboxUseCase
+
+    class FakeETL:
+        s3 = None
+
+        def __init__(self):
+            self.titles = []
+
+        def process_pages_data(self, pages, max_workers=None):
+            for page_data in pages:
+                self.titles.append(page_data["title"])
+                yield {"page_title": page_data["title"], "success": True}
+
+    export_path = tmp_path / "export.json"
+    export_path.write_text(json.dumps(EXPORT), encoding="utf-8")
+    etl = FakeETL()
+
+    result = IngestScrapboxUseCase(etl_processor=etl).ingest_export(str(export_path))
+
+    assert result["status"] == "completed"
+    assert result["successful"] == 2
+    assert etl.titles == ["はじめに", "page2"]
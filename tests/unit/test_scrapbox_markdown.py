@@ -0,0 +1,62 @@
+"""
+Scrapbox記法からMarkdownへの変換テスト
+"""
+
+from shared.scrapbox_markdown import to_markdown
+
+
+def test_to_markdown_converts_headings_links_and_lists():
+    """見出し・リンク・インデントが変換される"""
+    lines = [
+        "設計メモ",
+        "[** 概要]",
+        "[ページ名] と [https://example.com 公式サイト] を参照",
+        " 箇条書き [[重要]]",
+        "  入れ子 [- 廃止]",
+        "[https://example.com/image.png]",
+    ]
+
+    markdown = to_markdown("proj", "設計メモ", lines)
+
+    assert markdown == (
+        "# 設計メモ\n"
+        "\n"
+        "### 概要\n"
+        "[ページ名](https://scrapbox.io/proj/ページ名) と "
+        "[公式サイト](https://example.com) を参照\n"
+        "- 箇条書き **重要**\n"
+        "  - 入れ子 ~~廃止~~\n"
+        "![](https://example.com/image.png)\n"
+    )
+
+
+def test_to_markdown_converts_code_and_table_blocks():
+    """コードブロックの中身は変換されず、テーブルはMarkdownの表になる"""
+    lines = [
+        "code:main.py",
+        " def f():",
+        "     return [not_a_link]",
+        "table:料金",
+        " プラン\t価格",
+        " 無料\t0",
+        "以上",
+    ]
+
+    markdown = to_markdown("proj", "title", lines)
+
+    assert markdown == (
+        "# title\n"
+        "\n"
+        "```python\n"
+        "def f():\n"
+        "    return [not_a_link]\n"
+        "```\n"
+        "\n"
+        "**料金**\n"
+        "\n"
+        "| プラン | 価格 |\n"
+        "| --- | --- |\n"
+        "| 無料 | 0 |\n"
+        "\n"
+        "以上\n"
+    )
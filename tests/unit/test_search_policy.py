@@ -0,0 +1,88 @@
+"""
+SearchPolicyのテスト
+"""
+
+import copy
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from domain.policies import search_policy
+from domain.policies.search_policy import SearchPolicy
+
+NOW = datetime(2025, 6, 1, 12, 0, 0, 250000)
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def utcnow(cls):
+        return NOW
+
+
+@pytest.fixture
+def frozen_time(monkeypatch):
+    monkeypatch.setattr(search_policy, "datetime", _FrozenDatetime)
+
+
+def _results(count, seed=0):
+    rng = random.Random(seed)
+    epoch = (NOW - datetime(1970, 1, 1)).total_seconds()
+    updated_values = [
+        None,
+        0,
+        epoch - 8 * 86400,  # ちょうど境界
+        epoch - 8 * 86400 + 1e-6,
+        epoch - 31 * 86400 - 1e-6,
+        (NOW - timedelta(days=3)).isoformat(),
+        (NOW - timedelta(days=91)).isoformat(),
+        "2025-05-30T00:00:00Z",  # タイムゾーン付きはブーストしない
+        "invalid",
+        float("nan"),
+        True,
+    ]
+    results = []
+    for _ in range(count):
+        result = {
+            "id": f"doc-{rng.randrange(count // 2 + 1)}" if rng.random() < 0.8 else "",
+            "score": rng.choice([0.05, 0.1, 0.5, 0.5, 1, rng.random()]),
+            "content": rng.choice(["", "  ", "本文", f"本文{rng.randrange(5)}"]),
+            "metadata": {},
+        }
+        if rng.random() < 0.9:
+            result["metadata"]["updated_at"] = rng.choice(
+                [epoch - rng.uniform(-86400, 200 * 86400), *updated_values]
+            )
+        if rng.random() < 0.05:
+            del result["score"]
+        results.append(result)
+    return results
+
+
+@pytest.mark.parametrize("boost_recent", [True, False])
+@pytest.mark.parametrize("remove_dups", [True, False])
+@pytest.mark.parametrize("seed", range(5))
+def test_top_k_matches_full_ranking(frozen_time, boost_recent, remove_dups, seed):
+    """top_k の結果は各ポリシーを順に適用して全件を並べた先頭k件と同じになる"""
+    results = _results(500, seed)
+    expected = SearchPolicy.filter_results(copy.deepcopy(results), 0.1)
+    if remove_dups:
+        expected = SearchPolicy.remove_duplicates(expected)
+    if boost_recent:
+        expected = SearchPolicy.boost_recent_documents(expected)
+    expected = SearchPolicy.rank_results(expected)
+
+    assert (
+        SearchPolicy.apply_search_policies(
+            copy.deepcopy(results), boost_recent=boost_recent, remove_dups=remove_dups
+        )
+        == expected
+    )
+    for top_k in (0, 1, 7, len(expected) + 1):
+        top = SearchPolicy.apply_search_policies(
+            copy.deepcopy(results),
+            boost_recent=boost_recent,
+            remove_dups=remove_dups,
+            top_k=top_k,
+        )
+        assert top == expected[:top_k]
@@ -0,0 +1,37 @@
+"""
+ベクトルのスキーマのテスト
+"""
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from schema.vector import VectorData, VectorMetadata
+
+METADATA = VectorMetadata(
+    source="scrapbox",
+    project_name="proj",
+    page_title="title",
+    page_id="id",
+    content_preview="preview",
+)
+
+
+def test_vector_data_keeps_float32_buffer_and_converts_at_json_boundary():
+    """float32の配列はコピーせずに保持し、JSONにするときだけリストにする"""
+    matrix = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+    vector = VectorData(id="proj#title#0", values=matrix[1], metadata=METADATA)
+
+    assert np.shares_memory(vector.values, matrix)
+    assert isinstance(vector.model_dump()["values"], np.ndarray)
+    assert vector.model_dump(mode="json")["values"] == [4.0, 5.0, 6.0, 7.0]
+
+
+def test_vector_data_converts_lists_and_rejects_matrices():
+    """リストはfloat32の配列に変換し、2次元の値は受け付けない"""
+    vector = VectorData(id="id", values=[0.5, 1], metadata=METADATA)
+
+    assert vector.values.dtype == np.float32
+    with pytest.raises(ValidationError):
+        VectorData(id="id", values=[[0.5, 1]], metadata=METADATA)